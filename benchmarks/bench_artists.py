@@ -0,0 +1,50 @@
+"""
+Benchmark of the best artist endpoint: the GROUP BY over all auctions against ``ArtistStats``.
+
+Builds ``--auctions`` auctions (100k by default, 500 artists), backfills the statistics with
+``rebuild_artist_stats`` and times:
+
+* group by: the query BestArtistAPIView used to run on every request,
+* stats: the top artist / top 10 read from ``artist_top_idx``,
+* maintenance: what one auction save now adds, recomputing its artist from ``auction_artist_idx``.
+"""
+import argparse
+
+from utils import setup_django, benchmark_database, make_auctions, timed
+
+setup_django()
+
+from django.db.models import Count  # noqa: E402
+
+from src.auction import artists  # noqa: E402
+from src.auction.models import Auction  # noqa: E402
+
+
+def group_by():
+    return (Auction.objects.values('artist_name', 'artist_birth_date', 'artist_death_date', 'artist_image')
+            .annotate(auction_count=Count('id')).order_by('-auction_count').first())
+
+
+def run(count, repeat):
+    with benchmark_database():
+        auctions = make_auctions(count)
+        backfill, artist_count = timed(artists.rebuild)
+        print(f"auctions: {count}, backfill of {artist_count} artists: {backfill:.2f}s")
+
+        old, best = timed(group_by, repeat=repeat)
+        top, stats = timed(lambda: artists.top_artists(1).first(), repeat=repeat)
+        assert (best['artist_name'], best['auction_count']) == (stats.artist_name, stats.auction_count)
+        top10, _ = timed(lambda: list(artists.top_artists(10)), repeat=repeat)
+        print(f"best artist: group by {old * 1000:.1f} ms, stats {top * 1000:.2f} ms (top 10 {top10 * 1000:.2f} ms)")
+
+        artist = artists.artist_of(auctions[0])
+        refresh, _ = timed(lambda: artists.refresh([artist]), repeat=repeat)
+        print(f"per save: recompute one artist ({count // artist_count} auctions) {refresh * 1000:.2f} ms")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--auctions', type=int, default=100_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    run(args.auctions, args.repeat)
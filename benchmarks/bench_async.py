@@ -0,0 +1,201 @@
+"""
+Load test of the read endpoints: the sync WSGI deployment (``gunicorn root.wsgi``, sync workers)
+against the ASGI one (``gunicorn -k uvicorn.workers.UvicornWorker root.asgi:application``, which
+serves ``src.auction.async_views``), with the same number of ``--workers`` processes.
+
+Both run against a benchmark database of ``--auctions`` auctions. Redis is reached through a proxy
+that delays every request by ``--redis-latency`` ms, like a Redis on another host; the database
+is the local SQLite file. For each ``--connections`` count, that many clients send requests to the
+``--paths`` in turn on keep-alive connections for ``--seconds``, and the table shows the
+throughput, the latency percentiles and the requests that failed or took longer than
+``--timeout`` seconds. The capacity is the most connections served with a p99 under ``--slo`` ms
+and no failures.
+
+    python benchmarks/bench_async.py --workers 2 --connections 8 32 128 --redis-latency 2
+"""
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import tempfile
+import time
+
+from utils import ROOT, setup_django, benchmark_database, make_auctions
+
+setup_django()
+
+from django.conf import settings  # noqa: E402
+
+SETTINGS_MODULE = """
+from root.settings import *
+
+DATABASES['default'].update(NAME={database!r}, OPTIONS={{'timeout': 60}})
+DEBUG = False
+"""
+
+SERVERS = {
+    'wsgi': ['gunicorn', '--bind', '127.0.0.1:{port}', '--workers', '{workers}', 'root.wsgi'],
+    'asgi': ['gunicorn', '--bind', '127.0.0.1:{port}', '--workers', '{workers}', '-k', 'uvicorn.workers.UvicornWorker',
+             'root.asgi:application'],
+}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+async def pipe(reader, writer, delay):
+    try:
+        while data := await reader.read(65536):
+            if delay:
+                await asyncio.sleep(delay)
+            writer.write(data)
+            await writer.drain()
+    except OSError:
+        pass
+    finally:
+        writer.close()
+
+
+async def start_redis_proxy(upstream_host, upstream_port, delay):
+    """
+    TCP proxy in front of Redis adding ``delay`` seconds to every request.
+    """
+    async def handle(client_reader, client_writer):
+        upstream_reader, upstream_writer = await asyncio.open_connection(upstream_host, upstream_port)
+        try:
+            await asyncio.gather(pipe(client_reader, upstream_writer, delay), pipe(upstream_reader, client_writer, 0))
+        except asyncio.CancelledError:
+            # The proxy stops with the benchmark
+            pass
+
+    server = await asyncio.start_server(handle, '127.0.0.1', 0)
+    return server, server.sockets[0].getsockname()[1]
+
+
+async def read_response(reader):
+    head = await reader.readuntil(b'\r\n\r\n')
+    lines = head.decode('latin-1').split('\r\n')
+    status = int(lines[0].split()[1])
+    headers = dict(line.lower().split(': ', 1) for line in lines[1:] if line)
+    if 'content-length' in headers:
+        await reader.readexactly(int(headers['content-length']))
+    elif headers.get('transfer-encoding') == 'chunked':
+        while size := int((await reader.readuntil(b'\r\n')).strip(), 16):
+            await reader.readexactly(size + 2)
+        await reader.readuntil(b'\r\n')
+    else:
+        await reader.read()
+    return status, headers.get('connection') != 'close'
+
+
+async def client(port, paths, deadline, timeout, latencies, failures):
+    reader = writer = None
+    index = 0
+    while time.perf_counter() < deadline:
+        path = paths[index % len(paths)]
+        index += 1
+        started = time.perf_counter()
+        try:
+            if writer is None:
+                reader, writer = await asyncio.wait_for(asyncio.open_connection('127.0.0.1', port), timeout)
+            writer.write(f'GET {path} HTTP/1.1\r\nHost: localhost\r\nAccept: application/json\r\n\r\n'.encode())
+            status, keep_alive = await asyncio.wait_for(read_response(reader), timeout)
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError):
+            failures.append(path)
+            keep_alive = False
+        else:
+            latencies.append(time.perf_counter() - started)
+            if status != 200:
+                failures.append(path)
+        if not keep_alive and writer is not None:
+            writer.close()
+            reader = writer = None
+    if writer is not None:
+        writer.close()
+
+
+async def load(port, paths, connections, seconds, timeout):
+    latencies, failures = [], []
+    deadline = time.perf_counter() + seconds
+    await asyncio.gather(*[client(port, paths[i % len(paths):] + paths[:i % len(paths)], deadline, timeout,
+                                  latencies, failures) for i in range(connections)])
+    return latencies, failures
+
+
+def start_server(kind, workers, env):
+    port = free_port()
+    command = [arg.format(port=port, workers=workers) for arg in SERVERS[kind]]
+    process = subprocess.Popen(command, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    for _ in range(100):
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return process, port
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError(f"{kind} server did not start: {process.stderr.read().decode()}")
+
+
+async def measure(args, paths, database):
+    location = settings.CACHES['default']['LOCATION']
+    host, _, rest = location.split('//', 1)[1].partition(':')
+    redis_port, _, db = rest.partition('/')
+    proxy, proxy_port = await start_redis_proxy(host, int(redis_port or 6379), args.redis_latency / 1000)
+
+    module_dir = tempfile.mkdtemp(prefix='aristo-bench-settings-')
+    with open(os.path.join(module_dir, 'bench_async_settings.py'), 'w') as file:
+        file.write(SETTINGS_MODULE.format(database=database))
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE='bench_async_settings', PYTHONPATH=f'{module_dir}:{ROOT}',
+               REDIS_URL=f'redis://127.0.0.1:{proxy_port}/{db or 1}')
+
+    print(f"{args.workers} workers, Redis latency {args.redis_latency} ms, paths: {' '.join(paths)}")
+    print(f"{'server':>6} {'conns':>6} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'failed':>7}")
+    capacity = {}
+    for kind in SERVERS:
+        process, port = start_server(kind, args.workers, env)
+        try:
+            # Warm up: worker startup, cached fragments
+            await load(port, paths, args.workers, 1, args.timeout)
+            for connections in args.connections:
+                latencies, failures = await load(port, paths, connections, args.seconds, args.timeout)
+                latencies.sort()
+                p50 = statistics.median(latencies) * 1000 if latencies else float('nan')
+                p99 = latencies[int(len(latencies) * 0.99)] * 1000 if latencies else float('nan')
+                print(f"{kind:>6} {connections:>6} {len(latencies) / args.seconds:>8.0f} {p50:>8.1f} "
+                      f"{p99:>8.1f} {len(failures):>7}")
+                if not failures and p99 <= args.slo:
+                    capacity[kind] = connections
+        finally:
+            process.terminate()
+            process.wait()
+    proxy.close()
+    for kind in SERVERS:
+        print(f"{kind} capacity: {capacity.get(kind, 0)} connections with p99 <= {args.slo} ms")
+
+
+def main(args):
+    with benchmark_database() as database:
+        auctions = make_auctions(args.auctions)
+        paths = [path.format(id=auctions[i].id) for i, path in enumerate(args.paths)]
+        asyncio.run(measure(args, paths, database))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--auctions', type=int, default=2000)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--connections', type=int, nargs='+', default=[8, 32, 128])
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--redis-latency', type=float, default=2.0, help="Milliseconds added to each Redis request.")
+    parser.add_argument('--timeout', type=float, default=5.0)
+    parser.add_argument('--slo', type=float, default=500.0, help="p99 latency target in milliseconds.")
+    parser.add_argument('--paths', nargs='+', default=[
+        '/api/v1/auction/{id}', '/api/v1/auction/list', '/api/v1/auction/top', '/api/v1/auction/faq',
+    ])
+    args = parser.parse_args()
+    main(args)
@@ -0,0 +1,106 @@
+"""
+Concurrency benchmark for bid placement.
+
+N bidder threads hammer one auction, each bidding a little above the last price it saw.
+The run reports accepted bids per second and then checks the invariants:
+
+* every accepted bid has a Bid row and there are no extra rows (no lost bids),
+* accepted amounts strictly increase in insertion order (no duplicate winners),
+* ``Auction.current_bid`` equals the highest Bid.
+
+``--legacy`` runs the old read / compare in Python / save() algorithm for comparison.
+"""
+import argparse
+import random
+import threading
+import time
+from decimal import Decimal
+
+from utils import setup_django, benchmark_database, make_user, make_auctions
+
+setup_django()
+
+from django.db import connection  # noqa: E402
+
+from src.auction.bidding import place_bid, BidRejected  # noqa: E402
+from src.auction.models import Auction, Bid  # noqa: E402
+
+
+def legacy_place_bid(auction_id, user, bid_amount):
+    auction = Auction.objects.get(id=auction_id)
+    current_bid = auction.current_bid if auction.current_bid is not None else auction.price
+    if float(bid_amount) <= current_bid:
+        raise BidRejected('too low')
+    bid = Bid.objects.create(auction=auction, user=user, bid_amount=bid_amount)
+    auction.current_bid = float(bid_amount)
+    auction.save()
+    return bid
+
+
+def bidder(auction_id, user, attempts, place, accepted, errors):
+    rng = random.Random(user.id)
+    try:
+        for _ in range(attempts):
+            seen = Auction.objects.filter(id=auction_id).values_list('current_bid', flat=True).get() or Decimal(100)
+            amount = Decimal(seen) + Decimal(rng.randint(1, 3))
+            try:
+                place(auction_id, user, amount)
+            except BidRejected:
+                continue
+            except Exception as e:  # database is locked and friends
+                errors.append(repr(e))
+                continue
+            accepted.append(amount)
+    finally:
+        connection.close()
+
+
+def run(bidders, attempts, legacy):
+    with benchmark_database():
+        auction = make_auctions(1)[0]
+        users = [make_user(f'bidder-{i}') for i in range(bidders)]
+        accepted, errors = [], []
+        place = legacy_place_bid if legacy else place_bid
+        threads = [
+            threading.Thread(target=bidder, args=(auction.id, user, attempts, place, accepted, errors))
+            for user in users
+        ]
+
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        amounts = list(Bid.objects.filter(auction=auction).order_by('id').values_list('bid_amount', flat=True))
+        auction.refresh_from_db()
+        increasing = all(a < b for a, b in zip(amounts, amounts[1:]))
+        duplicates = len(amounts) - len(set(amounts))
+
+        print(f"mode:                 {'legacy' if legacy else 'conditional update'}")
+        print(f"bidders x attempts:   {bidders} x {attempts}")
+        print(f"accepted bids:        {len(accepted)} in {elapsed:.2f}s ({len(accepted) / elapsed:.0f} bids/s)")
+        print(f"bid rows:             {len(amounts)}")
+        print(f"errors:               {len(errors)}")
+        print(f"strictly increasing:  {increasing}")
+        print(f"duplicate winners:    {duplicates}")
+        print(f"current_bid:          {auction.current_bid} (max bid {max(amounts) if amounts else None})")
+
+        ok = (
+            len(amounts) == len(accepted)
+            and increasing
+            and not duplicates
+            and (not amounts or Decimal(auction.current_bid) == max(amounts))
+        )
+        print('invariants:          ', 'OK' if ok else 'VIOLATED')
+        return ok
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--bidders', type=int, default=8)
+    parser.add_argument('--attempts', type=int, default=50)
+    parser.add_argument('--legacy', action='store_true')
+    args = parser.parse_args()
+    raise SystemExit(0 if run(args.bidders, args.attempts, args.legacy) else 1)
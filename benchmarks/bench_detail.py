@@ -0,0 +1,72 @@
+"""
+Benchmark of the auction detail view with and without its cached fragments.
+
+Builds ``--auctions`` auctions with precomputed related auctions, puts ``--bids`` bids on one of
+them and times one detail request:
+
+* cold: the cache is cleared before every request, every fragment is rebuilt from the database,
+* warm: the fragments are cached, the request reads them in two round trips,
+* 304: a warm request revalidated with its ETag.
+
+Also reports the queries of each. Needs the Redis of ``CACHES['default']``.
+"""
+import argparse
+from decimal import Decimal
+
+from utils import setup_django, benchmark_database, make_auctions, make_user, timed
+
+setup_django()
+
+from django.core.cache import cache  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test.utils import CaptureQueriesContext  # noqa: E402
+from rest_framework.test import APIRequestFactory  # noqa: E402
+
+from src.auction import counters, related  # noqa: E402
+from src.auction.bidding import place_bid  # noqa: E402
+from src.auction.views import AuctionDetailView  # noqa: E402
+
+
+def run(count, bids, repeat):
+    cache.clear()
+    with benchmark_database():
+        auctions = make_auctions(count)
+        related.refresh()
+        auction = auctions[0]
+        bidders = [make_user(f'bench-bidder-{i}') for i in range(10)]
+        for i in range(bids):
+            place_bid(auction.id, bidders[i % len(bidders)], Decimal(1000 + i))
+
+        view, factory = AuctionDetailView.as_view(), APIRequestFactory()
+        url = f'/api/v1/auction/{auction.id}'
+
+        def request(**headers):
+            response = view(factory.get(url, **headers), auction_id=auction.id)
+            return response.render() if hasattr(response, 'render') else response
+
+        def cold():
+            cache.clear()
+            return request()
+
+        def measure(name, func):
+            with CaptureQueriesContext(connection) as queries:
+                func()
+            seconds, response = timed(func, repeat=repeat)
+            print(f"{name:5} {seconds * 1000:7.2f} ms, {len(queries)} queries, status {response.status_code}")
+            return response
+
+        print(f"auctions: {count}, bids on the auction: {bids}")
+        measure('cold', cold)
+        etag = measure('warm', request)['ETag']
+        measure('304', lambda: request(HTTP_IF_NONE_MATCH=etag))
+        counters.flush()
+    cache.clear()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--auctions', type=int, default=10_000)
+    parser.add_argument('--bids', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+    run(args.auctions, args.bids, args.repeat)
@@ -0,0 +1,65 @@
+"""
+Benchmark of the image derivative pipeline (``src.auction.images``).
+
+Makes ``--images`` noisy screenshots-like PNGs of ``--width`` x ``--height`` pixels and reports:
+
+* the bytes a list card downloads: the original against the ``thumb`` WebP,
+* the time an upload spends making its derivatives,
+* the throughput of ``manage.py make_image_derivatives``: images rendered one after the other against
+  ``--workers`` at a time in the process pool.
+"""
+import argparse
+import io
+import os
+import time
+
+from utils import setup_django
+
+setup_django()
+
+from django.conf import settings  # noqa: E402
+from PIL import Image  # noqa: E402
+
+from src.auction import images  # noqa: E402
+
+
+def make_png(width, height, seed):
+    image = Image.frombytes('RGB', (width, height), os.urandom(width * height * 3 // 16) * 16)
+    image.paste((seed * 40 % 256, 120, 200), (0, 0, width // 2, height // 3))
+    output = io.BytesIO()
+    image.save(output, 'PNG')
+    return output.getvalue()
+
+
+def run(count, width, height, workers):
+    sources = [make_png(width, height, seed) for seed in range(count)]
+    settings.AUCTION_IMAGE_WORKERS = 0
+    started = time.perf_counter()
+    derivatives = [images.render_all(data) for data in sources]
+    inline = time.perf_counter() - started
+
+    settings.AUCTION_IMAGE_WORKERS = workers
+    list(images.executor().map(int, range(workers)))  # start the workers
+    started = time.perf_counter()
+    futures = [images.executor().submit(images.render, data, settings.AUCTION_IMAGE_SIZES,
+                                        settings.AUCTION_IMAGE_QUALITY) for data in sources]
+    for future in futures:
+        future.result()
+    pooled = time.perf_counter() - started
+
+    original = sum(len(data) for data in sources) / count
+    thumb = sum(len(rendered['thumb']) for rendered in derivatives) / count
+    print(f"images: {count} of {width}x{height}, original {original / 1024:.0f} KB, thumb {thumb / 1024:.1f} KB "
+          f"({original / thumb:.0f}x smaller)")
+    print(f"derivatives: {inline / count * 1000:.0f} ms per upload; backfill {count / inline:.1f} images/s "
+          f"inline, {count / pooled:.1f} images/s with {workers} workers")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--images', type=int, default=16)
+    parser.add_argument('--width', type=int, default=1600)
+    parser.add_argument('--height', type=int, default=1000)
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args()
+    run(args.images, args.width, args.height, args.workers)
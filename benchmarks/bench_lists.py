@@ -0,0 +1,81 @@
+"""
+Benchmark of the auction list endpoint with and without cursor pagination.
+
+Builds ``--auctions`` auctions (100k by default) and times ``GET /api/v1/auction/list``:
+
+* unpaginated: the old behaviour, every auction serialized into one response,
+* first page and a page in the middle of the catalogue with ``AuctionCursorPagination``.
+
+A cursor page is one range scan of ``auction_end_idx``, so the deep page costs the same as the
+first one.
+"""
+import argparse
+import base64
+import json
+from urllib.parse import urlencode
+
+from utils import setup_django, benchmark_database, make_auctions, timed
+
+setup_django()
+
+from django.db import connection  # noqa: E402
+from django.test.utils import CaptureQueriesContext  # noqa: E402
+from rest_framework.test import APIRequestFactory  # noqa: E402
+
+from src.auction.models import Auction  # noqa: E402
+from src.auction.views import AuctionListView  # noqa: E402
+
+
+class UnpaginatedAuctionListView(AuctionListView):
+    pagination_class = None
+
+
+def cursor_at(auction):
+    """
+    A CursorPagination cursor that starts right after ``auction``.
+    """
+    query = urlencode({'p': str(auction.auction_end_date)})
+    return base64.b64encode(query.encode()).decode()
+
+
+def measure(view, params, repeat):
+    factory = APIRequestFactory()
+
+    def call():
+        response = view(factory.get('/api/v1/auction/list', params))
+        response.render()
+        return response
+
+    with CaptureQueriesContext(connection) as queries:
+        seconds, response = timed(call, repeat=repeat)
+    return seconds, len(response.content), len(queries) // repeat
+
+
+def run(count, repeat):
+    with benchmark_database():
+        make_auctions(count)
+        middle = Auction.objects.order_by('auction_end_date', 'id')[count // 2]
+
+        rows = [
+            ('unpaginated', measure(UnpaginatedAuctionListView.as_view(), {}, 1)),
+            ('first page', measure(AuctionListView.as_view(), {}, repeat)),
+            ('middle page', measure(AuctionListView.as_view(), {'cursor': cursor_at(middle)}, repeat)),
+            ('middle page x100', measure(AuctionListView.as_view(), {'cursor': cursor_at(middle), 'page_size': 100},
+                                         repeat)),
+        ]
+        print(f"auctions: {count}")
+        for name, (seconds, size, queries) in rows:
+            print(f"{name:>18}: {seconds * 1000:9.1f} ms  {size / 1024:10.1f} KiB  {queries} queries")
+
+        plan = connection.cursor().execute(
+            'EXPLAIN QUERY PLAN ' + str(Auction.objects.order_by('auction_end_date', 'id')[:21].query)
+        ).fetchall()
+        print('plan:', json.dumps([row[-1] for row in plan]))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--auctions', type=int, default=100_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    run(args.auctions, args.repeat)
@@ -0,0 +1,84 @@
+"""
+Microbenchmark of the media URLs of the auction list (``src.auction.media``).
+
+Serializes ``--rows`` auction cards (``image1`` and ``owner_image`` thumbnails) with
+``AuctionListSerializer`` and reports the time per 1,000 rows with the image URLs built:
+
+* through the storage: ``.url()`` of the field file per row, made absolute with the request (the old way),
+* by ``media.url()``: one prefix per process and string operations,
+
+and the URL building alone (``--signed`` also signs the URLs).
+"""
+import argparse
+from datetime import timedelta
+from decimal import Decimal
+
+from utils import setup_django, timed
+
+setup_django()
+
+from django.conf import settings  # noqa: E402
+from django.utils.timezone import now  # noqa: E402
+from rest_framework.fields import ReadOnlyField  # noqa: E402
+from rest_framework.request import Request  # noqa: E402
+from rest_framework.test import APIRequestFactory  # noqa: E402
+
+from src.auction import media  # noqa: E402
+from src.auction.images import derivative_name  # noqa: E402
+from src.auction.models import Auction  # noqa: E402
+from src.auction.serializers import AuctionListSerializer  # noqa: E402
+
+HASH = '3f' * 32
+
+
+class StorageImageURLField(ReadOnlyField):
+    def to_representation(self, value):
+        if not value:
+            return None
+        url = value.storage.url(derivative_name(value.name, 'thumb'))
+        return self.context['request'].build_absolute_uri(url)
+
+
+class StorageAuctionListSerializer(AuctionListSerializer):
+    image1 = StorageImageURLField()
+    owner_image = StorageImageURLField(source='artist_image')
+
+
+def run(count, repeat, signed):
+    if signed:
+        settings.AUCTION_MEDIA_SIGNING_KEY = 'benchmark'
+        media._config.cache_clear()
+    request = Request(APIRequestFactory().get('/api/v1/auction/list'))
+    start = now()
+    instances = [Auction(id=i, name=f'Auction {i}', price=100 + i,
+                         auction_end_date=start + timedelta(days=1, seconds=i), artist_name=f'Artist {i % 500}',
+                         current_bid=Decimal('1250.50'),
+                         image1=f'auction_images/{HASH[:-4]}{i:04x}.jpg', artist_image=f'artist_image/{HASH}.png')
+                 for i in range(count)]
+    files = [instance.image1 for instance in instances]
+    context = {'request': request}
+
+    steps = {
+        'serializer, storage URLs': lambda: StorageAuctionListSerializer(instances, many=True, context=context).data,
+        'serializer, media.url()': lambda: AuctionListSerializer(instances, many=True, context=context).data,
+        'storage .url() alone': lambda: [
+            request.build_absolute_uri(file.storage.url(derivative_name(file.name, 'thumb'))) for file in files],
+        'media.url() alone': lambda: [media.url(file.name, 'thumb') for file in files],
+    }
+    print(f"rows: {count}, signed URLs: {signed}")
+    results = {}
+    for name, step in steps.items():
+        seconds, _ = timed(step, repeat=repeat)
+        results[name] = seconds / count * 1000
+        print(f"{name:>25}: {results[name] * 1000:8.2f} ms per 1,000 rows")
+    saved = results['serializer, storage URLs'] - results['serializer, media.url()']
+    print(f"{'saved':>25}: {saved * 1000:8.2f} ms per 1,000 rows")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=10_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--signed', action='store_true')
+    args = parser.parse_args()
+    run(args.rows, args.repeat, args.signed)
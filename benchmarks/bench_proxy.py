@@ -0,0 +1,131 @@
+"""
+Requests and writes per settled auction: manual re-bidding vs proxy bidding.
+
+In manual mode every bidder keeps re-POSTing one increment above the current bid until their
+budget runs out (what clients do today). In proxy mode each bidder registers their maximum once.
+A final run registers all proxies from concurrent threads and checks the outcome is still the
+one a sequential auction would give: the highest maximum wins, one increment above the runner-up.
+"""
+import argparse
+import random
+import threading
+from decimal import Decimal
+
+from utils import setup_django, benchmark_database, make_user, make_auctions, timed
+
+setup_django()
+
+from django.conf import settings  # noqa: E402
+from django.db import connection  # noqa: E402
+
+from src.auction.bidding import place_bid, register_proxy_bid, BidRejected  # noqa: E402
+from src.auction.models import Auction, Bid, ProxyBid  # noqa: E402
+
+
+class WriteCounter:
+    def __init__(self):
+        self.writes = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        if sql.lstrip().upper().startswith(('INSERT', 'UPDATE')):
+            self.writes += 1
+        return execute(sql, params, many, context)
+
+
+def manual(auction, users, budgets, increment):
+    requests = 0
+    while True:
+        placed = False
+        for user in random.sample(users, len(users)):
+            auction.refresh_from_db(fields=['current_bid'])
+            current = auction.current_bid if auction.current_bid is not None else Decimal(auction.price)
+            leader = Bid.objects.filter(auction=auction).order_by('-id').values_list('user_id', flat=True).first()
+            if leader == user.id or current + increment > budgets[user.id]:
+                continue
+            requests += 1
+            try:
+                place_bid(auction.id, user, current + increment)
+                placed = True
+            except BidRejected:
+                pass
+        if not placed:
+            return requests
+
+
+def proxy(auction, users, budgets):
+    for user in random.sample(users, len(users)):
+        try:
+            register_proxy_bid(auction.id, user, budgets[user.id])
+        except BidRejected:
+            pass  # already outbid beyond this budget
+    return len(users)
+
+
+def expected_outcome(budgets, increment):
+    ranked = sorted(budgets.items(), key=lambda item: -item[1])
+    (winner, top), (_, second) = ranked[0], ranked[1]
+    return winner, top if top == second else min(top, second + increment)
+
+
+def concurrent_proxy(auction, users, budgets):
+    def register(user):
+        try:
+            register_proxy_bid(auction.id, user, budgets[user.id])
+        except BidRejected:
+            pass
+        finally:
+            connection.close()
+
+    # Registration order decides ties, keep the maximums distinct for this check.
+    threads = [threading.Thread(target=register, args=(user,)) for user in users]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def run(bidders, seed):
+    random.seed(seed)
+    increment = Decimal(settings.AUCTION_BID_INCREMENT)
+    with benchmark_database():
+        users = [make_user(f'bidder-{i}') for i in range(bidders)]
+        budgets = {user.id: Decimal(random.randrange(200, 600)) for user in users}
+        print(f"{bidders} bidders, budgets {min(budgets.values())}..{max(budgets.values())}, increment {increment}")
+
+        for mode in ('manual', 'proxy'):
+            auction = make_auctions(1, owner=users[0])[0]
+            counter = WriteCounter()
+            with connection.execute_wrapper(counter):
+                elapsed, requests = timed(manual, auction, users, budgets, increment) if mode == 'manual' \
+                    else timed(proxy, auction, users, budgets)
+            auction.refresh_from_db()
+            last = Bid.objects.filter(auction=auction).order_by('-id').first()
+            print(f"{mode:>7}: {requests:5d} requests  {Bid.objects.filter(auction=auction).count():5d} bid rows  "
+                  f"{counter.writes:5d} write statements  "
+                  f"{elapsed * 1000:8.1f} ms  final {auction.current_bid} (user {last.user_id})")
+
+        distinct = {}
+        for user in users:
+            while budgets[user.id] in distinct.values():
+                budgets[user.id] += 1
+            distinct[user.id] = budgets[user.id]
+        auction = make_auctions(1, owner=users[0])[0]
+        concurrent_proxy(auction, users, distinct)
+        auction.refresh_from_db()
+        winner, price = expected_outcome(distinct, increment)
+        last = Bid.objects.filter(auction=auction).order_by('-id').first()
+        amounts = list(Bid.objects.filter(auction=auction).order_by('id').values_list('bid_amount', flat=True))
+        ok = (last.user_id == winner and auction.current_bid == price
+              and all(a < b for a, b in zip(amounts, amounts[1:]))
+              and ProxyBid.objects.filter(auction=auction, user_id=winner).exists())
+        print(f"concurrent registrations: winner {last.user_id} at {auction.current_bid} "
+              f"(expected {winner} at {price}) -> {'OK' if ok else 'VIOLATED'}")
+        return ok
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--bidders', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+    raise SystemExit(0 if run(args.bidders, args.seed) else 1)
@@ -0,0 +1,117 @@
+"""
+Benchmark of the related auctions of the detail page.
+
+Builds ``--auctions`` auctions (50k by default) and times:
+
+* scoring: the NumPy similarity of one block of auctions against all open ones, and the same
+  scores computed row by row in Python for a few auctions (extrapolated to the block),
+* full refresh: ``manage.py refresh_related``,
+* incremental refresh: ``refresh_dirty()`` after ``--new`` auctions were created,
+* lookup: the old ad-hoc same-category query against the precomputed lookup, per detail request.
+"""
+import argparse
+import math
+import time
+
+from utils import setup_django, benchmark_database, make_auctions, timed
+
+setup_django()
+
+from django.db import connection  # noqa: E402
+from django.utils.timezone import now  # noqa: E402
+
+from src.auction import related  # noqa: E402
+from src.auction.models import Auction  # noqa: E402
+from src.auction.serializers import RELATED_AUCTION_COLUMNS  # noqa: E402
+
+
+ATTRIBUTES = {Auction._meta.get_field(field).attname: weight for field, weight in related.FIELD_WEIGHTS.items()}
+
+
+def python_scores(query, candidates, max_views):
+    score = []
+    for candidate in candidates:
+        value = sum(weight for field, weight in ATTRIBUTES.items()
+                    if getattr(query, field) and getattr(query, field) == getattr(candidate, field))
+        if not value or candidate.id == query.id:
+            score.append(-math.inf)
+            continue
+        distance = abs(math.floor(math.log2(max(query.price, 1))) - math.floor(math.log2(max(candidate.price, 1))))
+        value += related.PRICE_WEIGHT * (1 if distance == 0 else 0.5 if distance == 1 else 0)
+        value += related.POPULARITY_WEIGHT * math.log1p(candidate.view) / math.log1p(max_views)
+        score.append(value)
+    return score
+
+
+def run(count, new, repeat):
+    with benchmark_database():
+        auctions = make_auctions(count, body_style=None)
+        for i, auction in enumerate(auctions):
+            auction.body_style = ('Painting', 'Sculpture', 'Print', 'Photograph')[i % 4]
+            auction.color_scheme = f'Scheme {i % 40}'
+        Auction.objects.bulk_update(auctions, ['body_style', 'color_scheme'], batch_size=5000)
+        print(f"auctions: {count}")
+
+        queries, candidates = related.load(Auction.objects.all(), related._open_auctions())
+        block, _ = timed(lambda: related.top_k(related.scores(queries.block(0, related.BLOCK_SIZE), candidates), 10),
+                         repeat=repeat)
+        sample = list(Auction.objects.all()[:5])
+        everyone = list(Auction.objects.all())
+        max_views = max(auction.view for auction in everyone)
+        python, _ = timed(lambda: [python_scores(auction, everyone, max_views) for auction in sample])
+        python *= related.BLOCK_SIZE / len(sample)
+        print(f"score {related.BLOCK_SIZE} auctions: numpy {block * 1000:.0f} ms, python ~{python * 1000:.0f} ms")
+
+        full, refreshed = timed(related.refresh)
+        print(f"full refresh: {full:.1f}s for {refreshed} auctions")
+
+        related.refresh_dirty()
+        created = make_auctions(new, owner=auctions[0].owner, artist_name='Artist 7', medium='Watercolor')
+        related.mark_dirty(*(auction.id for auction in created))
+        incremental, refreshed = timed(related.refresh_dirty)
+        print(f"incremental refresh after {new} new auctions: {incremental:.1f}s ({refreshed} lists recomputed)")
+
+        ids = [auction.id for auction in auctions[::max(count // 200, 1)]]
+
+        def ad_hoc():
+            for auction in Auction.objects.filter(id__in=ids).only('id', 'category_id'):
+                list(Auction.objects.filter(category_id=auction.category_id_id, auction_end_date__gt=now())
+                     .exclude(id=auction.id).only(*RELATED_AUCTION_COLUMNS)[:5])
+
+        def lookup():
+            for auction_id in ids:
+                related.related_auctions(auction_id, RELATED_AUCTION_COLUMNS)
+
+        def sql_only(queryset_for):
+            """
+            Time spent in the database alone, without building the query and the model instances.
+            """
+            total = 0.0
+            with connection.cursor() as cursor:
+                for auction_id in ids:
+                    sql, params = queryset_for(auction_id).query.sql_with_params()
+                    started = time.perf_counter()
+                    cursor.execute(sql, params)
+                    cursor.fetchall()
+                    total += time.perf_counter() - started
+            return total / len(ids)
+
+        categories = dict(Auction.objects.filter(id__in=ids).values_list('id', 'category_id'))
+        old, _ = timed(ad_hoc, repeat=repeat)
+        old_sql = sql_only(lambda auction_id: Auction.objects.filter(
+            category_id=categories[auction_id], auction_end_date__gt=now()).exclude(id=auction_id)
+            .only(*RELATED_AUCTION_COLUMNS)[:5])
+        precomputed, _ = timed(lookup, repeat=repeat)
+        precomputed_sql = sql_only(lambda auction_id: Auction.objects.filter(
+            related_to__auction_id=auction_id, auction_end_date__gt=now())
+            .only(*RELATED_AUCTION_COLUMNS).order_by('related_to__rank')[:5])
+        print(f"per detail request: ad-hoc {old / len(ids) * 1000:.2f} ms (SQL {old_sql * 1000:.3f} ms), "
+              f"precomputed {precomputed / len(ids) * 1000:.2f} ms (SQL {precomputed_sql * 1000:.3f} ms)")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--auctions', type=int, default=50_000)
+    parser.add_argument('--new', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    run(args.auctions, args.new, args.repeat)
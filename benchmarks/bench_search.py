@@ -0,0 +1,67 @@
+"""
+Benchmark of auction search: the full text index against ``icontains``.
+
+Builds ``--auctions`` auctions (120k by default) with varied descriptions, indexes them with
+``rebuild_search_index`` and times, per query:
+
+* legacy: ``name__icontains`` over the whole table, every match loaded (the old endpoint),
+* icontains x6: ``icontains`` on all searched columns, first page only (same coverage, no ranking),
+* index: ``search_auctions()`` count + first ranked page, what the endpoint runs now.
+"""
+import argparse
+import random
+
+from utils import setup_django, benchmark_database, make_auctions, timed
+
+setup_django()
+
+from src.auction import search  # noqa: E402
+from src.auction.models import Auction  # noqa: E402
+from src.auction.search import FallbackBackend, search_auctions, terms  # noqa: E402
+from src.auction.serializers import AUCTION_LIST_COLUMNS  # noqa: E402
+
+SYLLABLES = 'ka ra mo li sa na to ve du pe ri zo la mi go be nu ta'.split()
+# A Zipf-like vocabulary: a few very common words and a long tail of rare ones.
+WORDS = ('sunset river portrait bronze marble horse garden harbour winter abstract golden silk '
+         'minimalist baroque samarkand caravan pomegranate lapis').split()
+WORDS += sorted({''.join(random.Random(i).choices(SYLLABLES, k=3)) for i in range(20000)})
+WEIGHTS = [1 / (rank + 1) for rank in range(len(WORDS))]
+
+# common word, rare word, two words, prefix, lot name
+QUERIES = ('sunset', 'caravan', 'pomegranate lapis', 'bron', 'Auction 4242')
+
+
+def describe(auctions, batch_size=5000):
+    rng = random.Random(42)
+    for auction in auctions:
+        auction.description = ' '.join(rng.choices(WORDS, WEIGHTS, k=12))
+    Auction.objects.bulk_update(auctions, ['description'], batch_size=batch_size)
+
+
+def run(count, repeat, page_size=20):
+    with benchmark_database():
+        auctions = make_auctions(count)
+        describe(auctions)
+        seconds, indexed = timed(search.rebuild)
+        print(f"auctions: {count}, index built in {seconds:.1f}s ({indexed} documents)")
+        print(f"{'query':>20} {'legacy':>16} {'icontains x6':>16} {'index':>16}")
+
+        for query in QUERIES:
+            legacy, matches = timed(lambda: list(Auction.objects.filter(name__icontains=query)), repeat=repeat)
+            scan, _ = timed(lambda: FallbackBackend().ids(None, terms(query), 0, page_size), repeat=repeat)
+
+            def indexed_search():
+                results = search_auctions(query, only=AUCTION_LIST_COLUMNS)
+                return results.count(), results[:page_size]
+
+            index, (total, _) = timed(indexed_search, repeat=repeat)
+            print(f"{query:>20} {legacy * 1000:9.1f} ms {len(matches):>4} {scan * 1000:12.1f} ms "
+                  f"{index * 1000:9.1f} ms {total:>5}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--auctions', type=int, default=120_000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    run(args.auctions, args.repeat)
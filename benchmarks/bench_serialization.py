@@ -0,0 +1,68 @@
+"""
+Microbenchmark of the auction list serialization, in rows per second.
+
+For ``--rows`` auctions (with images, artists and bids) times, from the queryset to the bytes:
+
+* serializer: model instances + ``AuctionListSerializer`` + DRF's ``JSONRenderer`` (the old path),
+* fast path: ``values()`` rows + ``AuctionListRows`` + ``FastJSONRenderer``,
+
+and each step on its own, and checks both produce the same bytes.
+"""
+import argparse
+from decimal import Decimal
+
+from utils import setup_django, benchmark_database, make_auctions, timed
+
+setup_django()
+
+from rest_framework.renderers import JSONRenderer  # noqa: E402
+from rest_framework.request import Request  # noqa: E402
+from rest_framework.test import APIRequestFactory  # noqa: E402
+
+from src.auction import models, serializers  # noqa: E402
+from src.auction.models import Auction  # noqa: E402
+from src.auction.renderers import FastJSONRenderer  # noqa: E402
+from src.auction.serializers import AuctionListSerializer, AuctionListRows, AUCTION_LIST_COLUMNS  # noqa: E402
+
+
+def run(count, repeat):
+    with benchmark_database():
+        make_auctions(count, image1='auction_images/painting.jpg', artist_image='artist_image/portrait.jpg',
+                      current_bid=Decimal('1250.50'))
+        request = Request(APIRequestFactory().get('/api/v1/auction/list'))
+        queryset = Auction.objects.order_by('auction_end_date', 'id')
+        # One clock for both paths, so the output can be compared byte for byte.
+        current_time = serializers.now()
+        models.now = serializers.now = lambda: current_time
+
+        instances = list(queryset.only(*AUCTION_LIST_COLUMNS))
+        rows = list(queryset.values(*AUCTION_LIST_COLUMNS))
+        slow_data = AuctionListSerializer(instances, many=True, context={'request': request}).data
+        fast_data = AuctionListRows(request)(rows)
+        assert JSONRenderer().render(slow_data) == FastJSONRenderer().render(fast_data)
+
+        steps = {
+            'fetch instances': lambda: list(queryset.only(*AUCTION_LIST_COLUMNS)),
+            'fetch values()': lambda: list(queryset.values(*AUCTION_LIST_COLUMNS)),
+            'AuctionListSerializer': lambda: AuctionListSerializer(instances, many=True,
+                                                                   context={'request': request}).data,
+            'AuctionListRows': lambda: AuctionListRows(request)(rows),
+            'JSONRenderer': lambda: JSONRenderer().render(slow_data),
+            'FastJSONRenderer': lambda: FastJSONRenderer().render(fast_data),
+            'serializer (all)': lambda: JSONRenderer().render(AuctionListSerializer(
+                list(queryset.only(*AUCTION_LIST_COLUMNS)), many=True, context={'request': request}).data),
+            'fast path (all)': lambda: FastJSONRenderer().render(
+                AuctionListRows(request)(list(queryset.values(*AUCTION_LIST_COLUMNS)))),
+        }
+        print(f"rows: {count}")
+        for name, step in steps.items():
+            seconds, _ = timed(step, repeat=repeat)
+            print(f"{name:>22}: {count / seconds:>12,.0f} rows/s")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=20_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    run(args.rows, args.repeat)
@@ -0,0 +1,60 @@
+"""
+Benchmark of the top auctions endpoint: the ``view > 30`` filter against the Redis leaderboard.
+
+Builds ``--auctions`` auctions (100k by default, views 0..99 so ~70% pass the old threshold),
+ranks them with ``rebuild_leaderboard`` and times:
+
+* filter: the old query, every auction with more than 30 views, unordered and unbounded,
+* leaderboard: the first ``--limit`` auctions of the board plus the one query loading them,
+* record_view: the cost of a view now that it also scores the leaderboards.
+"""
+import argparse
+
+from utils import setup_django, benchmark_database, make_auctions, timed
+
+setup_django()
+
+from django.utils.timezone import now  # noqa: E402
+
+from src.auction import counters, leaderboard  # noqa: E402
+from src.auction.models import Auction  # noqa: E402
+from src.auction.views import TopAuctionsAPIView  # noqa: E402
+
+COLUMNS = TopAuctionsAPIView.only_fields
+
+
+def run(count, limit, repeat, views=2000):
+    with benchmark_database():
+        auctions = make_auctions(count)
+        seconds, ranked = timed(leaderboard.rebuild)
+        print(f"auctions: {count}, leaderboard of {ranked} built in {seconds:.2f}s")
+
+        old, rows = timed(lambda: list(Auction.objects.filter(view__gt=30, auction_end_date__gt=now())
+                                       .only(*COLUMNS)), repeat=repeat)
+
+        def top():
+            ranked = [auction_id for auction_id, _ in leaderboard.top('popular', 0, limit, 30)]
+            found = Auction.objects.filter(auction_end_date__gt=now()).only(*COLUMNS).in_bulk(ranked)
+            return [found[auction_id] for auction_id in ranked if auction_id in found]
+
+        new, top_rows = timed(top, repeat=repeat)
+        print(f"filter: {old * 1000:.1f} ms ({len(rows)} rows), leaderboard: {new * 1000:.2f} ms ({len(top_rows)} rows)")
+
+        conn = counters._connection()
+        ids = [auction.id for auction in auctions[:views]]
+        plain, _ = timed(lambda: [conn.eval(counters.RECORD_SCRIPT, 2, counters.PENDING_KEY, counters.PROCESSING_KEY,
+                                            auction_id) for auction_id in ids])
+        scored, _ = timed(lambda: [counters.record_view(auction_id) for auction_id in ids])
+        print(f"record_view: {plain / views * 1e6:.0f} us counter only, {scored / views * 1e6:.0f} us with the "
+              f"leaderboards (one round trip)")
+        conn.delete(counters.PENDING_KEY, leaderboard.POPULAR_KEY, leaderboard.TRENDING_KEY,
+                    leaderboard.TRENDING_EPOCH_KEY)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--auctions', type=int, default=100_000)
+    parser.add_argument('--limit', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    run(args.auctions, args.limit, args.repeat)
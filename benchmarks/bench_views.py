@@ -0,0 +1,88 @@
+"""
+Throughput benchmark for the auction detail view and its view counter.
+
+N client threads request the detail page of one auction M times each. The run reports requests
+per second and how many views ended up counted (after a flush for the Redis counters).
+
+``--legacy`` counts views the old way, ``instance.view += 1; instance.save()``, for comparison;
+concurrent requests then overwrite each other's increments and the row write contends with bids.
+Needs the Redis of ``CACHES['default']``.
+"""
+import argparse
+import threading
+import time
+
+from utils import setup_django, benchmark_database, make_auctions
+
+setup_django()
+
+from django.core.cache import cache  # noqa: E402
+from django.db import connection  # noqa: E402
+from rest_framework.test import APIRequestFactory  # noqa: E402
+
+from src.auction import counters  # noqa: E402
+from src.auction.models import Auction  # noqa: E402
+from src.auction.views import AuctionDetailView  # noqa: E402
+
+
+class LegacyAuctionDetailView(AuctionDetailView):
+    def count_view(self, auction_id):
+        instance = Auction.objects.get(id=auction_id)
+        instance.view += 1
+        instance.save()
+        return 0
+
+
+def client(view, auction_id, requests, errors):
+    factory = APIRequestFactory()
+    try:
+        for _ in range(requests):
+            try:
+                response = view(factory.get(f'/api/v1/auction/{auction_id}'), auction_id=auction_id)
+                if response.status_code != 200:
+                    errors.append(response.status_code)
+            except Exception as e:  # database is locked and friends
+                errors.append(repr(e))
+    finally:
+        connection.close()
+
+
+def run(clients, requests, legacy):
+    cache.clear()
+    with benchmark_database():
+        auction = make_auctions(1, view=0)[0]
+        view = (LegacyAuctionDetailView if legacy else AuctionDetailView).as_view()
+        errors = []
+        threads = [threading.Thread(target=client, args=(view, auction.id, requests, errors)) for _ in range(clients)]
+
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        flush_started = time.perf_counter()
+        counters.flush()
+        flush_elapsed = time.perf_counter() - flush_started
+        auction.refresh_from_db()
+        total = clients * requests
+
+        print(f"mode:              {'legacy save()' if legacy else 'redis counter'}")
+        print(f"clients x requests: {clients} x {requests}")
+        print(f"throughput:        {total / elapsed:.0f} req/s ({elapsed:.2f}s)")
+        print(f"errors:            {len(errors)}")
+        print(f"views counted:     {auction.view} of {total - len(errors)} (lost {total - len(errors) - auction.view})")
+        if not legacy:
+            print(f"flush:             {flush_elapsed * 1000:.1f} ms")
+        cache.clear()
+        return auction.view == total - len(errors)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=100)
+    parser.add_argument('--legacy', action='store_true')
+    args = parser.parse_args()
+    raise SystemExit(0 if run(args.clients, args.requests, args.legacy) else 1)
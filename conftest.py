@@ -0,0 +1,122 @@
+import os
+import uuid
+from datetime import timedelta
+from urllib.parse import urlsplit
+
+import pytest
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils.timezone import now
+from rest_framework.test import APIClient
+
+from src.auction.models import Auction, Category
+from src.users.models import User
+
+
+# Redis database of the tests on the server of REDIS_URL, unless TEST_REDIS_URL says otherwise
+TEST_REDIS_DB = 15
+
+
+@pytest.fixture(scope='session', autouse=True)
+def redis_test_database():
+    """
+    Run the tests on their own Redis database: ``clear_cache`` flushes it, and the order book, deadlines
+    and leaderboards use raw keys that a ``KEY_PREFIX`` would not keep apart.
+    """
+    default = settings.CACHES['default']
+    location = os.getenv('TEST_REDIS_URL') or urlsplit(default['LOCATION'])._replace(path=f'/{TEST_REDIS_DB}').geturl()
+    assert location != default['LOCATION'], "the tests would flush the Redis database of the application"
+    with override_settings(CACHES={'default': {**default, 'LOCATION': location, 'KEY_PREFIX': 'test'}}):
+        yield
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """
+    Redis state (order book, counters, cached responses) must not leak between tests.
+    """
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def create_user():
+    """
+    Create a user with a unique email and username.
+    """
+    def _create_user(email=None, password="password123", username=None, full_name="Test User"):
+        if not email:
+            email = f"testuser-{uuid.uuid4()}@example.com"  # Generate a unique email
+        if not username:
+            username = f"testuser-{uuid.uuid4()}"  # Generate a unique username
+        return User.objects.create_user(email=email, password=password, username=username, full_name=full_name)
+    return _create_user
+
+
+@pytest.fixture
+def create_auction(create_user):
+    """
+    Create an auction running for a day from now; ``fields`` override any column. Without a ``category_id``
+    or an ``owner``, the auction gets a new "Art" category and a new user.
+    """
+    def _create_auction(**fields):
+        values = {
+            'name': "Test Auction", 'location': "Test Location", 'lot_ref_num': "LOT123", 'lot_num_two': "01",
+            'piece_title': "Test Piece", 'price': 100, 'auction_start_date': now(),
+            'auction_end_date': now() + timedelta(days=1), **fields,
+        }
+        if 'category_id' not in values:
+            values['category_id'] = Category.objects.create(name="Art")
+        if 'owner' not in values:
+            values['owner'] = create_user()
+        return Auction.objects.create(**values)
+    return _create_auction
+
+
+@pytest.fixture
+def make_auction(create_user, create_auction, django_capture_on_commit_callbacks):
+    """
+    Create a live auction that started an hour ago and ends in ``ends_in``, running its on-commit hooks
+    (deadlines, leaderboard, related lists, artist stats). The auctions of a test share one owner and
+    one "Art" category; ``fields`` override any column.
+    """
+    owner, category = create_user(), Category.objects.create(name="Art")
+
+    def _make_auction(starts_in=timedelta(hours=-1), ends_in=timedelta(days=1), **fields):
+        with django_capture_on_commit_callbacks(execute=True):
+            return create_auction(**{
+                'auction_start_date': now() + starts_in, 'auction_end_date': now() + ends_in,
+                'status': Auction.StatusChoices.LIVE, 'category_id': category, 'owner': owner, **fields,
+            })
+    return _make_auction
+
+
+@pytest.fixture
+def assert_query_budget():
+    """
+    Request ``url`` at growing list sizes and fail when any request runs more queries than the
+    ``query_budget`` declared by ``view``.
+
+    ``grow(n)`` must add ``n`` more rows to whatever the endpoint lists::
+
+        assert_query_budget(reverse('list'), AuctionListView, lambda n: [create_auction() for _ in range(n)])
+    """
+    def check(url, view, grow, sizes=(1, 5, 15), client=None, **params):
+        assert view.query_budget is not None, f"{view.__name__} does not declare a query_budget"
+        client = client or APIClient()
+        size = 0
+        for target in sizes:
+            grow(target - size)
+            size = target
+            with CaptureQueriesContext(connection) as queries:
+                response = client.get(url, params)
+            assert response.status_code == 200, response.content
+            sql = "\n".join(query['sql'] for query in queries.captured_queries)
+            assert len(queries) <= view.query_budget, (
+                f"{view.__name__} ran {len(queries)} queries for {size} rows, "
+                f"its budget is {view.query_budget}:\n{sql}"
+            )
+    return check
@@ -2,6 +2,9 @@
 ASGI config for aristo_auctions project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+The live auction streams (``/api/v1/auction/<id>/stream``) need to be served from here, and the
+read endpoints with an async version (``src.auction.async_views``) are answered by it: requests are
+resolved with ``root.async_urls``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
@@ -9,8 +12,22 @@ https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
 
 import os
 
-from django.core.asgi import get_asgi_application
+import django
+from django.core.handlers.asgi import ASGIHandler
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'root.settings')
 
-application = get_asgi_application()
+
+class AsyncURLConfHandler(ASGIHandler):
+    urlconf = 'root.async_urls'
+
+    def create_request(self, scope, body_file):
+        request, error_response = super().create_request(scope, body_file)
+        if request is not None:
+            request.urlconf = self.urlconf
+        return request, error_response
+
+
+# What get_asgi_application() does, with the handler above
+django.setup(set_prefix=False)
+application = AsyncURLConfHandler()
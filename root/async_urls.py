@@ -0,0 +1,11 @@
+"""
+URLconf of the ASGI application (``root.asgi``): the async versions of the read endpoints
+(``src.auction.async_views``), then everything of ``root.urls``.
+"""
+from django.urls import path, include
+
+from root import urls
+
+urlpatterns = [
+    path('api/v1/auction/', include('src.auction.async_urls')),
+] + urls.urlpatterns
@@ -47,6 +47,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'src.auction.routers.replica_middleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -230,13 +231,81 @@ EMAIL_USE_TLS = os.getenv('EMAIL_USE_TLS')
 CACHES = {
     'default': {
         'BACKEND': 'django_redis.cache.RedisCache',
-        'LOCATION': 'redis://127.0.0.1:6379/1',
+        'LOCATION': os.getenv('REDIS_URL', 'redis://127.0.0.1:6379/1'),
         'OPTIONS': {
             'CLIENT_CLASS': 'django_redis.client.DefaultClient',
         }
     }
 }
 
+# Auction Config
+
+# Step used by proxy (automatic) bidding when outbidding a competitor
+AUCTION_BID_INCREMENT = '1.00'
+# Validate bids on live auctions against the Redis order book, needs `manage.py flush_bids` running
+AUCTION_ORDER_BOOK = os.getenv('AUCTION_ORDER_BOOK', 'False') == 'True'
+AUCTION_ORDER_BOOK_TAIL = 20
+AUCTION_ORDER_BOOK_FLUSH_BATCH = 500
+# Soft close: a bid in the last WINDOW seconds moves the end back by EXTENSION seconds (0 disables it)
+AUCTION_SOFT_CLOSE_WINDOW = int(os.getenv('AUCTION_SOFT_CLOSE_WINDOW', 120))
+AUCTION_SOFT_CLOSE_EXTENSION = int(os.getenv('AUCTION_SOFT_CLOSE_EXTENSION', 120))
+# Longest sleep of `manage.py run_scheduler`, bounds the status lag of new or edited auctions
+AUCTION_SCHEDULER_MAX_SLEEP = 5
+# Auctions per page of the auction lists, clients may ask for up to AUCTION_MAX_PAGE_SIZE
+AUCTION_PAGE_SIZE = 20
+AUCTION_MAX_PAGE_SIZE = 100
+# Bids per page in the auction detail and the bid history endpoint
+AUCTION_BID_HISTORY_PAGE_SIZE = 20
+# Lifetime of cached responses; they are invalidated by version on change, this only bounds garbage
+AUCTION_RESPONSE_CACHE_TIMEOUT = 24 * 3600
+# Stampede protection of src.auction.cache.remember(): longest single recomputation, seconds an expired
+# entry is still served while it is recomputed, eagerness of the early recomputation (0 disables it)
+AUCTION_CACHE_LOCK_TIMEOUT = 10
+AUCTION_CACHE_STALE_TIMEOUT = 30
+AUCTION_CACHE_EARLY_EXPIRY_BETA = 1.0
+# Top auctions leaderboard: a bid counts as this many views; half-life of the trending score
+AUCTION_LEADERBOARD_BID_WEIGHT = 10
+AUCTION_TRENDING_HALF_LIFE = 6 * 3600
+# Related auctions precomputed per auction (`manage.py refresh_related`), the detail page shows the first 5
+AUCTION_RELATED_COUNT = 10
+# Lifetime of the cached auction detail fragments (invalidated by version), bounds stale bidder names
+AUCTION_DETAIL_CACHE_TIMEOUT = 3600
+# Lifetime of the related auctions fragment of the auction detail, bounds stale bids of related auctions
+AUCTION_DETAIL_RELATED_TIMEOUT = 60
+# Seconds between `time` events on the live auction stream
+AUCTION_STREAM_HEARTBEAT = 15
+# WebP derivatives made on upload (longest edge in pixels), see src.auction.images; processes encoding them
+AUCTION_IMAGE_SIZES = {'thumb': 320, 'medium': 960}
+AUCTION_IMAGE_QUALITY = 80
+AUCTION_IMAGE_WORKERS = 2
+# Media URLs (src.auction.media): host (or CDN) in front of MEDIA_URL, cache-busting version of the files not
+# named after their content, HMAC key signing them and lifetime of the signatures in seconds (0: no expiry)
+AUCTION_MEDIA_HOST = os.getenv('AUCTION_MEDIA_HOST', 'https://aristoback.ikramovna.me')
+AUCTION_MEDIA_VERSION = os.getenv('AUCTION_MEDIA_VERSION', '')
+AUCTION_MEDIA_SIGNING_KEY = os.getenv('AUCTION_MEDIA_SIGNING_KEY', '')
+AUCTION_MEDIA_SIGNED_TTL = int(os.getenv('AUCTION_MEDIA_SIGNED_TTL', 0))
+# Email outbox (src.users.outbox, `manage.py send_emails`): emails per batch, seconds a batch is leased to a
+# sender (an email of a sender that died is sent again after it), attempts before giving up, delay of the
+# first retry in seconds (doubled per attempt, up to the max)
+AUCTION_EMAIL_BATCH_SIZE = 50
+AUCTION_EMAIL_LEASE = 600
+AUCTION_EMAIL_MAX_ATTEMPTS = 8
+AUCTION_EMAIL_RETRY_DELAY = 30
+AUCTION_EMAIL_RETRY_MAX_DELAY = 3600
+# Read replicas of the default database (src.auction.routers): comma separated `host[:port]` (or files with
+# SQLite) in AUCTION_DB_REPLICAS, and the seconds a client that wrote keeps reading the primary
+AUCTION_DB_REPLICAS = []
+for number, location in enumerate(filter(None, os.getenv('AUCTION_DB_REPLICAS', '').split(',')), 1):
+    if DATABASES['default']['ENGINE'].endswith('sqlite3'):
+        replica = {'NAME': location}
+    else:
+        host, _, port = location.partition(':')
+        replica = {'HOST': host, 'PORT': port or DATABASES['default'].get('PORT', '')}
+    DATABASES[f'replica{number}'] = {**DATABASES['default'], **replica, 'TEST': {'MIRROR': 'default'}}
+    AUCTION_DB_REPLICAS.append(f'replica{number}')
+DATABASE_ROUTERS = ['src.auction.routers.ReplicaRouter']
+AUCTION_DB_PIN_SECONDS = int(os.getenv('AUCTION_DB_PIN_SECONDS', 10))
+
 CKEDITOR_CONFIGS = {
     'default': {
         'toolbar': 'full',
@@ -1,6 +1,8 @@
 from django.contrib import admin
+from django.utils.timezone import now
 from import_export.admin import ImportExportModelAdmin
 
+from src.auction import artists, detail, scheduler
 from src.auction.models import *
 
 
@@ -58,12 +60,20 @@ class AuctionAdmin(ImportExportModelAdmin):
     readonly_fields = ("view",)
     actions = ["mark_as_completed", "mark_as_pending"]
 
+    # The bulk UPDATEs bypass the signals, apply what the scheduler does on a transition.
     def mark_as_completed(self, request, queryset):
-        queryset.update(status='completed')
+        auction_ids = list(queryset.values_list('id', flat=True))
+        queryset.update(status='completed', updated_at=now())
+        detail.invalidate_live(*auction_ids)
+        scheduler.closed(*auction_ids)
+        artists.refresh_auctions(auction_ids)
     mark_as_completed.short_description = "Mark selected auctions as completed"
 
     def mark_as_pending(self, request, queryset):
-        queryset.update(status='pending')
+        auction_ids = list(queryset.values_list('id', flat=True))
+        queryset.update(status='pending', updated_at=now())
+        detail.invalidate_live(*auction_ids)
+        artists.refresh_auctions(auction_ids)
     mark_as_pending.short_description = "Mark selected auctions as pending"
 
     def get_queryset(self, request):
@@ -139,4 +149,11 @@ class ContactAdmin(admin.ModelAdmin):
 class AuctionFavoriteAdmin(admin.ModelAdmin):
     list_display = ('auction', 'user')
     search_fields = ('auction__name', 'user__full_name')
-    ordering = ('-id',)
\ No newline at end of file
+    ordering = ('-id',)
+
+
+@admin.register(ProxyBid)
+class ProxyBidAdmin(admin.ModelAdmin):
+    list_display = ('auction', 'user', 'max_amount', 'created_at')
+    search_fields = ('auction__name', 'user__full_name')
+    ordering = ('-created_at',)
@@ -0,0 +1,67 @@
+"""
+Async access to the Redis of the ``default`` cache, for the async views (``src.auction.async_views``).
+
+``connection()`` is a ``redis.asyncio`` client per event loop (like ``live.broadcaster()``), on the
+cache's Redis, closed with its loop. ``get``, ``get_many`` and ``set`` read and write entries of the
+Django cache with the same keys and the same encoding as django-redis, so the async and the sync
+code share them.
+"""
+import asyncio
+import weakref
+
+import redis.asyncio
+from django.conf import settings
+from django.core.cache import cache
+
+_connections = weakref.WeakKeyDictionary()
+
+
+async def _close_with_loop(client):
+    # asyncio.run(), asgiref and uvicorn cancel the pending tasks before closing a loop
+    try:
+        await asyncio.Future()
+    finally:
+        await client.aclose()
+
+
+def connection():
+    loop = asyncio.get_running_loop()
+    if loop not in _connections:
+        client = redis.asyncio.from_url(settings.CACHES['default']['LOCATION'])
+        _connections[loop] = client, loop.create_task(_close_with_loop(client))
+    return _connections[loop][0]
+
+
+def make_key(key):
+    return cache.client.make_key(key)
+
+
+def decode(value):
+    return cache.client.decode(value)
+
+
+async def get(key):
+    value = await connection().get(make_key(key))
+    return None if value is None else decode(value)
+
+
+async def get_many(keys):
+    """
+    ``{key: value}`` of the ``keys`` found, like ``cache.get_many``.
+    """
+    keys = list(keys)
+    if not keys:
+        return {}
+    values = await connection().mget([make_key(key) for key in keys])
+    return {key: decode(value) for key, value in zip(keys, values) if value is not None}
+
+
+async def set(key, value, timeout):
+    await connection().set(make_key(key), cache.client.encode(value), ex=timeout)
+
+
+async def add(key, value):
+    """
+    Store ``value`` without expiry unless ``key`` exists, like ``cache.add(key, value, None)``.
+    """
+    return bool(await connection().set(make_key(key), cache.client.encode(value), nx=True))
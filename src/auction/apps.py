@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class AuctionConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'src.auction'
+
+    def ready(self):
+        from django.db.models.signals import post_migrate
+
+        from src.auction import signals  # noqa: F401
+        from src.auction.search import create_schema
+        post_migrate.connect(create_schema, sender=self)
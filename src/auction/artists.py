@@ -0,0 +1,124 @@
+"""
+Artist statistics.
+
+``ArtistStats`` holds, per artist, the number of auctions, the number of live ones and the
+hammer value (final ``current_bid``) of the completed ones, so the best artists are read from
+the ``artist_top_idx`` index instead of grouping the whole ``Auction`` table.
+
+A row is recomputed from the artist's own auctions (``auction_artist_idx``) whenever one of them
+is created, edited or deleted (``src.auction.signals``) or changes status in the scheduler. The
+row is locked first, so concurrent updates of one artist are applied one after the other.
+Bulk inserts and updates bypass this, ``python manage.py rebuild_artist_stats`` recomputes all.
+"""
+import hashlib
+import json
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+
+from src.auction.models import Auction, ArtistStats
+
+ARTIST_FIELDS = ('artist_name', 'artist_birth_date', 'artist_death_date', 'artist_image')
+
+Status = Auction.StatusChoices
+
+
+def _aggregates():
+    sold = Q(status=Status.COMPLETED, current_bid__gt=0)
+    return dict(
+        auction_count=Count('id'),
+        live_count=Count('id', filter=Q(status=Status.LIVE)),
+        sold_count=Count('id', filter=sold),
+        total_hammer_value=Sum('current_bid', filter=sold),
+    )
+
+
+def _normalize(artist):
+    name, birth_date, death_date, image = artist
+    return name, birth_date, death_date, getattr(image, 'name', image) or None
+
+
+def artist_of(auction):
+    """
+    The artist of an auction, or None when it has no artist name.
+    """
+    artist = _normalize(tuple(getattr(auction, field) for field in ARTIST_FIELDS))
+    return artist if artist[0] else None
+
+
+def artist_key(artist):
+    return hashlib.sha1(json.dumps(artist, default=str).encode()).hexdigest()
+
+
+def _lookup(artist):
+    lookup = Q()
+    for field, value in zip(ARTIST_FIELDS, artist):
+        if value is None and field == 'artist_image':
+            # An auction without an image may have NULL or '' in the column.
+            lookup &= Q(artist_image__isnull=True) | Q(artist_image='')
+        elif value is None:
+            lookup &= Q(**{f'{field}__isnull': True})
+        else:
+            lookup &= Q(**{field: value})
+    return lookup
+
+
+def _apply(stats, totals):
+    stats.auction_count = totals['auction_count']
+    stats.live_count = totals['live_count']
+    stats.sold_count = totals['sold_count']
+    stats.total_hammer_value = totals['total_hammer_value'] or Decimal('0')
+    stats.average_final_bid = (
+        (stats.total_hammer_value / stats.sold_count).quantize(Decimal('0.01')) if stats.sold_count else None)
+    return stats
+
+
+def refresh(artists):
+    """
+    Recompute the statistics of the given artists (tuples of ``ARTIST_FIELDS`` values).
+    """
+    for artist in {_normalize(artist) for artist in artists if artist and artist[0]}:
+        key = artist_key(artist)
+        with transaction.atomic():
+            stats, _ = ArtistStats.objects.select_for_update().get_or_create(
+                key=key, defaults=dict(zip(ARTIST_FIELDS, artist)))
+            totals = Auction.objects.filter(_lookup(artist)).aggregate(**_aggregates())
+            if not totals['auction_count']:
+                stats.delete()
+                continue
+            _apply(stats, totals).save()
+
+
+def refresh_auctions(auction_ids):
+    """
+    Recompute the statistics of the artists of the given auctions.
+    """
+    if auction_ids:
+        refresh(Auction.objects.filter(id__in=auction_ids).values_list(*ARTIST_FIELDS).distinct())
+
+
+def rebuild(batch_size=5000):
+    """
+    Recompute every artist with one GROUP BY over the auctions. Returns the number of artists.
+    """
+    rows = (Auction.objects.exclude(artist_name__isnull=True).exclude(artist_name='')
+            .values(*ARTIST_FIELDS).annotate(**_aggregates()).order_by())
+    stats = {}
+    for row in rows:
+        artist = _normalize(tuple(row[field] for field in ARTIST_FIELDS))
+        key = artist_key(artist)
+        if key in stats:
+            # NULL and '' images are grouped apart by the database but are the same artist here.
+            for name in ('auction_count', 'live_count', 'sold_count'):
+                row[name] += getattr(stats[key], name)
+            row['total_hammer_value'] = (row['total_hammer_value'] or 0) + stats[key].total_hammer_value
+        stats[key] = _apply(ArtistStats(key=key, **dict(zip(ARTIST_FIELDS, artist))), row)
+    with transaction.atomic():
+        ArtistStats.objects.all().delete()
+        ArtistStats.objects.bulk_create(stats.values(), batch_size=batch_size)
+    return len(stats)
+
+
+def top_artists(limit):
+    return ArtistStats.objects.order_by('-auction_count', 'id')[:limit]
@@ -0,0 +1,14 @@
+from django.urls import path
+
+from src.auction import async_views
+
+# Served before src.auction.urls by the ASGI application, see root.async_urls
+urlpatterns = [
+    path("faq", async_views.faq, name='faq'),
+    path("category", async_views.categories, name='category'),
+    path('category/<int:category_id>', async_views.category_auctions, name='category'),
+    path('list', async_views.auction_list, name='list'),
+    path('<int:auction_id>', async_views.auction_detail, name='detail'),
+    path('top', async_views.top_auctions, name='top'),
+    path('best-artist', async_views.best_artist, name='best-artist'),
+]
@@ -0,0 +1,186 @@
+"""
+Async versions of the read-heavy auction endpoints, served by the ASGI workers (``root.asgi``).
+
+Under ``gunicorn root.wsgi`` a request waiting on the database or on Redis holds a whole sync
+worker. These views await instead, so one worker serves many such requests at a time: Redis is read
+with ``redis.asyncio`` (``src.auction.aio``) and the database with Django's async ORM.
+
+They answer the same URLs with the same JSON (and conditional GET validators) as the DRF views of
+``src.auction.views``, whose declarations they reuse; ``root.async_urls`` puts them in front of
+``root.urls`` for the ASGI application only. Being plain Django views, they only speak JSON (no
+browsable API, no authentication: the endpoints are public).
+"""
+import functools
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from django.views.decorators.http import require_safe
+from rest_framework.exceptions import APIException, NotFound
+from rest_framework.request import Request
+
+from src.auction import aio, conditional, detail, leaderboard, media
+from src.auction.artists import top_artists
+from src.auction.cache import aget_versions, response_key
+from src.auction.counters import arecord_view, apending_views
+from src.auction.models import Auction, Category, Faq
+from src.auction.pagination import AuctionCursorPagination
+from src.auction.renderers import FastJSONRenderer
+from src.auction.routers import primary
+from src.auction.serializers import AuctionListRows
+from src.auction.views import FaqAPIView, CategoryListCreateAPIView, TopAuctionsAPIView
+
+
+def json_response(data, status=200):
+    return HttpResponse(FastJSONRenderer().render(data), status=status, content_type='application/json')
+
+
+def read_view(view):
+    """
+    GET/HEAD only; DRF's ``APIException`` are answered like DRF does.
+    """
+    @require_safe
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        try:
+            return await view(request, *args, **kwargs)
+        except APIException as exc:
+            data = exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}
+            return json_response(data, status=exc.status_code)
+    return wrapper
+
+
+def conditional_response(request, etag, last_modified=None):
+    """
+    The 304 (or 412) answering a conditional GET, None when the body must be sent.
+    """
+    return get_conditional_response(request, etag=etag,
+                                    last_modified=int(last_modified.timestamp()) if last_modified else None)
+
+
+def set_validators(response, etag, last_modified=None):
+    if response.status_code in (200, 304):
+        if etag:
+            response['ETag'] = etag
+        if last_modified:
+            response['Last-Modified'] = http_date(last_modified.timestamp())
+    return response
+
+
+async def cached_resource(request, view_class, queryset):
+    """
+    ``ConditionalGetMixin`` + ``CachedResponseMixin`` of a cached resource (faq, category), the
+    response cache entries are shared with the sync views.
+    """
+    name = view_class.cache_name
+    version, = await aget_versions(name)
+    etag = conditional.make_etag(name, version)
+    response = conditional_response(request, etag)
+    if response is None:
+        key = response_key(name, version, request.path)
+        content = await aio.get(key)
+        if content is None:
+            with primary():
+                instances = [instance async for instance in queryset]
+                content = FastJSONRenderer().render(view_class.serializer_class(instances, many=True).data)
+            await aio.set(key, content, settings.AUCTION_RESPONSE_CACHE_TIMEOUT)
+        response = HttpResponse(content, content_type='application/json')
+    return set_validators(response, etag)
+
+
+@read_view
+async def faq(request):
+    return await cached_resource(request, FaqAPIView, Faq.objects.all())
+
+
+@read_view
+async def categories(request):
+    return await cached_resource(request, CategoryListCreateAPIView, Category.objects.all())
+
+
+async def auction_page(request, queryset, parent=None):
+    """
+    A page of ``AuctionListRows`` (the ``ValuesListMixin`` fast path) behind the list ETag; 404
+    when the ``parent`` queryset (the category) is empty.
+    """
+    # From the primary, like ConditionalGetMixin
+    with primary():
+        etag, _ = await conditional.aauction_list_validators()
+        response = conditional_response(request, etag)
+        if response is None:
+            if parent is not None and not await parent.aexists():
+                raise NotFound()
+            rows = AuctionListRows(request)
+            paginator = AuctionCursorPagination()
+            page = await paginator.apaginate_queryset(queryset.values(*rows.fields), Request(request))
+            response = json_response(paginator.get_paginated_response(rows(page)).data)
+    return set_validators(response, etag)
+
+
+@read_view
+async def auction_list(request):
+    return await auction_page(request, Auction.objects.all())
+
+
+@read_view
+async def category_auctions(request, category_id):
+    return await auction_page(request, Auction.objects.filter(category_id=category_id),
+                              parent=Category.objects.filter(id=category_id))
+
+
+@read_view
+async def auction_detail(request, auction_id):
+    parts = await detail.afragments(auction_id)
+    if parts is None:
+        raise NotFound()
+    etag, last_modified = detail.validators(auction_id, parts)
+    response = conditional_response(request, etag, last_modified)
+    # Not modified is still a view
+    views = await arecord_view(auction_id)
+    if response is None:
+        response = json_response(detail.response_data(parts, views))
+    return set_validators(response, etag, last_modified)
+
+
+@read_view
+async def top_auctions(request):
+    board, limit, status = TopAuctionsAPIView.parse_params(request.GET)
+    if status and status not in leaderboard.OPEN_STATUSES:
+        # Only running auctions are ranked
+        return json_response([])
+
+    view = TopAuctionsAPIView()
+    queryset = view.shape_queryset(view.get_queryset())
+    min_score = view.min_views if board == 'popular' else None
+    auctions, ended, offset = [], [], 0
+    while len(auctions) < limit:
+        ranked = [auction_id for auction_id, _ in await leaderboard.atop(board, offset, limit, min_score)]
+        found = await queryset.ain_bulk(ranked)
+        ended += [auction_id for auction_id in ranked if auction_id not in found]
+        auctions += [found[auction_id] for auction_id in ranked
+                     if auction_id in found and (not status or found[auction_id].status == status)]
+        if len(ranked) < limit:
+            break
+        offset += limit
+    await leaderboard.aremove(*ended)
+
+    auctions = auctions[:limit]
+    views = await apending_views(auction.id for auction in auctions)
+    for auction in auctions:
+        auction.view += views.get(auction.id, 0)
+    return json_response(view.serializer_class(auctions, many=True).data)
+
+
+@read_view
+async def best_artist(request):
+    artist = await top_artists(1).afirst()
+    if not artist:
+        return json_response({"message": "No artists found."}, status=404)
+    return json_response({
+        "artist_name": artist.artist_name,
+        "artist_birth_date": artist.artist_birth_date,
+        "artist_death_date": artist.artist_death_date,
+        "artist_image": media.url(artist.artist_image.name, 'thumb'),
+        "auction_count": artist.auction_count,
+    })
@@ -0,0 +1,189 @@
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q, F, Value, DecimalField
+from django.utils.timezone import now
+
+from src.auction import deadlines, detail, leaderboard, orderbook
+from src.auction.live import publish, publish_on_commit
+from src.auction.models import Auction, Bid, ProxyBid
+from src.auction.routers import primary
+
+AUCTION_ENDED_MESSAGE = "Auction does not exist or has ended."
+BID_TOO_LOW_MESSAGE = "Bid amount must be higher than the current bid or starting price."
+
+
+class BidRejected(Exception):
+    """
+    Raised when a bid can not be accepted. The message is safe to return to the client.
+    """
+
+
+def bid_event(bid, auction_end_date=None):
+    event = {
+        'auction': bid.auction_id,
+        'user': bid.user.full_name,
+        'bid_amount': bid.bid_amount,
+        'current_bid': bid.bid_amount,
+        'bid_time': bid.bid_time,
+    }
+    if auction_end_date:
+        # Sent whenever the bid may have extended the auction (soft close).
+        event['auction_end_date'] = auction_end_date
+    return event
+
+
+def soft_close(auction_id, bid_time):
+    """
+    After an UPDATE that applied ``deadlines.extended_end_date(bid_time)``: return the end date when
+    the bid fell in the soft close window (and move the deadline once the transaction commits),
+    otherwise None.
+    """
+    if not settings.AUCTION_SOFT_CLOSE_WINDOW or not settings.AUCTION_SOFT_CLOSE_EXTENSION:
+        return None
+    end_date = Auction.objects.values_list('auction_end_date', flat=True).get(id=auction_id)
+    if end_date >= bid_time + deadlines.soft_close_window() + deadlines.soft_close_extension():
+        return None
+    transaction.on_commit(lambda: deadlines.extend(auction_id, end_date))
+    return end_date
+
+
+def place_bid(auction_id, user, bid_amount: Decimal) -> Bid:
+    """
+    Accept a bid with a single conditional UPDATE.
+
+    ``current_bid`` only advances when the new amount is still higher than the current bid
+    (or the starting price when there is no bid yet), so two concurrent bidders can never both win.
+    The same UPDATE applies the soft close extension. The ``Bid`` row is inserted in the same
+    transaction, and registered proxy bids answer it before the transaction commits.
+    """
+    bid_time = now()
+    amount = Value(bid_amount, output_field=DecimalField(max_digits=10, decimal_places=2))
+    open_auction = Auction.objects.filter(id=auction_id, auction_end_date__gt=bid_time)
+
+    with transaction.atomic():
+        accepted = open_auction.filter(
+            Q(current_bid__lt=amount) | Q(current_bid__isnull=True, price__lt=amount)
+        ).update(current_bid=bid_amount, auction_end_date=deadlines.extended_end_date(bid_time), updated_at=bid_time)
+        if accepted:
+            bid = Bid.objects.create(auction_id=auction_id, user=user, bid_amount=bid_amount)
+            publish_on_commit(auction_id, 'bid', bid_event(bid, soft_close(auction_id, bid_time)))
+            leaderboard.record_bids_on_commit(auction_id)
+            detail.invalidate_live_on_commit(auction_id)
+            resolve_proxy_bids(auction_id)
+            return bid
+
+    # The UPDATE matched nothing, find out why for the error message.
+    if open_auction.exists():
+        raise BidRejected(BID_TOO_LOW_MESSAGE)
+    raise BidRejected(AUCTION_ENDED_MESSAGE)
+
+
+def submit_bid(auction_id, user, bid_amount: Decimal) -> Bid:
+    """
+    Entry point for ``PlaceBidAPIView``.
+
+    Live auctions are validated against the in-memory order book when ``AUCTION_ORDER_BOOK`` is on
+    (the returned Bid is persisted by the next flush); everything else goes through ``place_bid``.
+    """
+    # The order book is seeded from the auction row and its proxies: a lagging replica would let it
+    # accept bids below the real high bid.
+    with primary():
+        if settings.AUCTION_ORDER_BOOK:
+            result, bid, auction_end_date = orderbook.place(auction_id, user, bid_amount)
+            if result == orderbook.ACCEPTED:
+                publish(auction_id, 'bid', bid_event(bid, auction_end_date))
+                leaderboard.record_bids(auction_id)
+                return bid
+            if result == orderbook.TOO_LOW:
+                raise BidRejected(BID_TOO_LOW_MESSAGE)
+            if result == orderbook.ENDED:
+                raise BidRejected(AUCTION_ENDED_MESSAGE)
+            if result == orderbook.SETTLED_IN_DATABASE:
+                # The bids the book accepted before the hand over must be persisted first
+                orderbook.settle(auction_id)
+            # NOT_LOADED / SETTLED_IN_DATABASE: the database decides.
+        return place_bid(auction_id, user, bid_amount)
+
+
+def resolve_proxy_bids(auction_id, bid_time=None):
+    """
+    Let the registered proxy bids of an auction compete in one pass.
+
+    Only the visible outcome is written: the runner-up's bid at its maximum and the winner's bid one
+    increment above it (capped at the winner's maximum), then ``current_bid``. Must run inside a
+    transaction that holds the auction row lock. Returns the created bids.
+
+    With ``bid_time`` the proxy bids count as a new bid for soft close; without it they answer a
+    bid that already did.
+    """
+    increment = Decimal(settings.AUCTION_BID_INCREMENT)
+    auction = Auction.objects.values('price', 'current_bid').get(id=auction_id)
+    floor = auction['current_bid'] if auction['current_bid'] is not None else Decimal(auction['price'])
+    leader = Bid.objects.filter(auction_id=auction_id).order_by('-id').values_list('user_id', flat=True).first()
+
+    proxies = list(
+        ProxyBid.objects.filter(auction_id=auction_id, max_amount__gt=floor)
+        .select_related('user').order_by('-max_amount', 'created_at')[:2]
+    )
+    if not proxies:
+        return []
+    winner, runner_up = proxies[0], (proxies[1] if len(proxies) > 1 else None)
+
+    bids = []
+    if runner_up is None:
+        if winner.user_id == leader:
+            return []
+        bids.append(Bid(auction_id=auction_id, user=winner.user, bid_amount=min(winner.max_amount, floor + increment)))
+    elif runner_up.max_amount == winner.max_amount:
+        # Equal maximums: the earlier registration wins at that amount.
+        bids.append(Bid(auction_id=auction_id, user=winner.user, bid_amount=winner.max_amount))
+    else:
+        if runner_up.user_id != leader:
+            bids.append(Bid(auction_id=auction_id, user=runner_up.user, bid_amount=runner_up.max_amount))
+        bids.append(Bid(
+            auction_id=auction_id, user=winner.user,
+            bid_amount=min(winner.max_amount, runner_up.max_amount + increment),
+        ))
+
+    bids = Bid.objects.bulk_create(bids)
+    if bid_time:
+        Auction.objects.filter(id=auction_id).update(
+            current_bid=bids[-1].bid_amount, auction_end_date=deadlines.extended_end_date(bid_time), updated_at=now())
+        auction_end_date = soft_close(auction_id, bid_time)
+    else:
+        Auction.objects.filter(id=auction_id).update(current_bid=bids[-1].bid_amount, updated_at=now())
+        auction_end_date = None
+    for bid in bids:
+        publish_on_commit(auction_id, 'bid', bid_event(bid, auction_end_date))
+    leaderboard.record_bids_on_commit(auction_id, len(bids))
+    detail.invalidate_live_on_commit(auction_id)
+    return bids
+
+
+def register_proxy_bid(auction_id, user, max_amount: Decimal) -> ProxyBid:
+    """
+    Register (or raise) a user's maximum for an auction and resolve all proxies right away.
+    """
+    with primary():
+        if settings.AUCTION_ORDER_BOOK:
+            # Auctions with proxies are settled in the database, hand them over from the order book.
+            orderbook.hand_over(auction_id)
+
+        bid_time = now()
+        with transaction.atomic():
+            # A no-op write takes the row lock (the write lock on SQLite) before anything is read,
+            # so concurrent registrations on one auction are resolved one at a time.
+            if not Auction.objects.filter(id=auction_id, auction_end_date__gt=bid_time).update(
+                    current_bid=F('current_bid')):
+                raise BidRejected(AUCTION_ENDED_MESSAGE)
+            auction = Auction.objects.values('price', 'current_bid').get(id=auction_id)
+            floor = auction['current_bid'] if auction['current_bid'] is not None else Decimal(auction['price'])
+            if max_amount <= floor:
+                raise BidRejected(BID_TOO_LOW_MESSAGE)
+
+            proxy, _ = ProxyBid.objects.update_or_create(
+                auction_id=auction_id, user=user, defaults={'max_amount': max_amount})
+            resolve_proxy_bids(auction_id, bid_time)
+        return proxy
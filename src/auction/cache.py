@@ -0,0 +1,155 @@
+"""
+Versioned response cache.
+
+Every cached resource (``faq``, ``about``, ...) has a version number in the ``default`` cache.
+Rendered responses are stored under a key that contains the version, and saving or deleting
+one of the models a resource is built from bumps the version once the transaction commits, so a
+change is visible on the very next request and nothing depends on a TTL. Entries of older
+versions are never read again and expire after ``AUCTION_RESPONSE_CACHE_TIMEOUT``.
+
+``remember()`` guards expensive entries of hot keys against stampedes, see its docstring.
+``aget_versions()`` reads versions from async views (``src.auction.aio``).
+Cached values are built from the primary database, never from a replica lagging behind the version.
+"""
+import math
+import random
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from redis.exceptions import LockError
+
+from src.auction import aio, media
+from src.auction.routers import primary
+
+VERSION_KEY = 'cache-version:{}'
+RESPONSE_KEY = 'response:{}:{}:{}:{}'
+LOCK_KEY = 'lock:{}'
+
+NOT_READ = object()
+
+
+def get_version(name):
+    key = VERSION_KEY.format(name)
+    version = cache.get(key)
+    if version is None:
+        # Start from the clock so versions are not reused after the cache was flushed.
+        cache.add(key, time.time_ns() // 1000, None)
+        version = cache.get(key)
+    return version
+
+
+def get_versions(*names):
+    """
+    ``[get_version(name) for name in names]`` in one round trip when they all exist.
+    """
+    keys = [VERSION_KEY.format(name) for name in names]
+    found = cache.get_many(keys)
+    return [found[key] if key in found else get_version(name) for key, name in zip(keys, names)]
+
+
+async def aget_versions(*names):
+    """
+    ``get_versions()`` for async views.
+    """
+    keys = [VERSION_KEY.format(name) for name in names]
+    found = await aio.get_many(keys)
+    versions = []
+    for key in keys:
+        if key not in found:
+            await aio.add(key, time.time_ns() // 1000)
+            found[key] = await aio.get(key)
+        versions.append(found[key])
+    return versions
+
+
+def bump_version(name):
+    try:
+        return cache.incr(VERSION_KEY.format(name))
+    except ValueError:
+        return get_version(name)
+
+
+def response_key(name, version, path):
+    # Responses hold media URLs, signed ones expire (src.auction.media)
+    return RESPONSE_KEY.format(name, version, media.signing_window(), path)
+
+
+def invalidate_on(name, *models):
+    """
+    Bump the version of ``name`` after every committed save/delete of ``models`` (many-to-many
+    ``through`` models are watched with ``m2m_changed``).
+    """
+    def receiver(sender, **kwargs):
+        transaction.on_commit(lambda: bump_version(name))
+
+    for model in models:
+        if model._meta.auto_created:
+            m2m_changed.connect(receiver, sender=model, weak=False, dispatch_uid=f'{name}-{model._meta.label}')
+        else:
+            post_save.connect(receiver, sender=model, weak=False, dispatch_uid=f'{name}-save-{model._meta.label}')
+            post_delete.connect(receiver, sender=model, weak=False, dispatch_uid=f'{name}-delete-{model._meta.label}')
+
+
+def _store(key, compute, timeout):
+    started = time.monotonic()
+    with primary():
+        value = compute()
+    delta = time.monotonic() - started
+    # The stale grace period is kept past the expiry, see remember()
+    cache.set(key, (value, time.time() + timeout, delta), timeout + settings.AUCTION_CACHE_STALE_TIMEOUT)
+    return value
+
+
+def is_fresh(entry):
+    """
+    Probabilistic early expiration ("XFetch"): the closer the expiry and the slower the
+    recomputation, the likelier one reader is told to recompute ahead of everybody else.
+    """
+    _, expires_at, delta = entry
+    return time.time() - delta * settings.AUCTION_CACHE_EARLY_EXPIRY_BETA * math.log(1 - random.random()) < expires_at
+
+
+def remember(key, compute, timeout, entry=NOT_READ):
+    """
+    Return the cached ``compute()`` under ``key``, computing it on a miss, with at most one
+    computation at a time per key across all workers:
+
+    * single flight: the computation holds a Redis lock, concurrent readers of a missing key wait
+      for it (up to ``AUCTION_CACHE_LOCK_TIMEOUT``) and read its result,
+    * stale while revalidate: an entry is kept ``AUCTION_CACHE_STALE_TIMEOUT`` past its expiry;
+      meanwhile the lock holder recomputes it and the other readers get the stale value,
+    * probabilistic early expiration: readers start recomputing shortly before the expiry.
+
+    Exceptions of ``compute`` are not cached. ``entry`` is what ``cache.get(key)`` returned when the
+    caller already read it (``cache.get_many``).
+    """
+    if entry is NOT_READ:
+        entry = cache.get(key)
+    if entry is not None and is_fresh(entry):
+        return entry[0]
+
+    lock = cache.lock(LOCK_KEY.format(key), timeout=settings.AUCTION_CACHE_LOCK_TIMEOUT, sleep=0.01)
+    if entry is not None:
+        if not lock.acquire(blocking=False):
+            return entry[0]
+    elif lock.acquire(blocking_timeout=settings.AUCTION_CACHE_LOCK_TIMEOUT):
+        # Computed while we were waiting?
+        entry = cache.get(key)
+        if entry is not None and entry[1] > time.time():
+            lock.release()
+            return entry[0]
+    else:
+        # The lock holder is stuck, do not wait any longer
+        return _store(key, compute, timeout)
+
+    try:
+        return _store(key, compute, timeout)
+    finally:
+        try:
+            lock.release()
+        except LockError:
+            # Held longer than AUCTION_CACHE_LOCK_TIMEOUT, somebody else has it now
+            pass
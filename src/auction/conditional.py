@@ -0,0 +1,52 @@
+"""
+Validators for conditional GETs (``ConditionalGetMixin``).
+
+Each function returns ``(etag, last_modified)`` without loading or serializing the body:
+
+* cached resources (faq, category, ...): their ``src.auction.cache`` version, no query,
+* an auction: the versions of its cached fragments, see ``src.auction.detail.validators``,
+* the auction lists: ``max(updated_at)`` (``auction_updated_idx``) plus the ``auction`` version,
+  bumped on saves and deletes (a delete does not move the max), and the ``category`` version
+  (filters on the category name).
+
+ETags are weak: a body may differ in fields that move with the clock or outside the row
+(remaining time, views not flushed yet) while the auction data is the same. ``Auction.updated_at``
+is set by every write but the view counter flush.
+
+``aauction_list_validators()`` is the same for async views.
+"""
+from django.db.models import Max
+
+from src.auction import media
+from src.auction.cache import get_version, aget_versions
+from src.auction.models import Auction
+
+
+def _timestamp(value):
+    return int(value.timestamp() * 1_000_000) if value else 0
+
+
+def make_etag(*parts):
+    window = media.signing_window()
+    if window:
+        # Signed media URLs of the body expire, see src.auction.media
+        parts = (*parts, f'm{window}')
+    return 'W/"{}"'.format('-'.join(str(part) for part in parts))
+
+
+def cached_resource_validators(name):
+    return make_etag(name, get_version(name)), None
+
+
+def auction_list_validators():
+    """
+    The ETag only: ``If-Modified-Since`` alone could not tell that an auction was deleted.
+    """
+    latest = Auction.objects.aggregate(latest=Max('updated_at'))['latest']
+    return make_etag('auctions', get_version('auction'), get_version('category'), _timestamp(latest)), None
+
+
+async def aauction_list_validators():
+    latest = (await Auction.objects.aaggregate(latest=Max('updated_at')))['latest']
+    auction_version, category_version = await aget_versions('auction', 'category')
+    return make_etag('auctions', auction_version, category_version, _timestamp(latest)), None
@@ -0,0 +1,123 @@
+"""
+Auction view counters.
+
+A page view is one atomic HINCRBY on a Redis hash instead of a read-modify-write of the whole
+auction row. ``python manage.py flush_views`` periodically moves the hash aside and adds the
+counts to ``Auction.view`` with a single ``UPDATE ... SET view = view + CASE ...``. Counts that
+are not flushed yet are added on read (``pending_views``), so lists stay near real time.
+
+A flush renames the pending hash to a processing hash and deletes it after the UPDATE commits;
+a crashed flush is replayed by the next one. A crash between the commit and the delete counts
+that batch twice, which is acceptable for view counts.
+"""
+from django.db import transaction
+from django.db.models import Case, F, Value, When
+from django_redis import get_redis_connection
+
+from src.auction import aio, detail, leaderboard
+from src.auction.models import Auction
+
+PENDING_KEY = 'views:pending'
+PROCESSING_KEY = 'views:processing'
+FLUSH_LOCK_KEY = 'views:flush-lock'
+# Auctions per UPDATE statement, keeps the CASE expression and its parameters bounded
+FLUSH_BATCH = 500
+
+# KEYS: pending, processing
+# ARGV: auction id
+RECORD_SCRIPT = """
+local pending = redis.call('HINCRBY', KEYS[1], ARGV[1], 1)
+return pending + tonumber(redis.call('HGET', KEYS[2], ARGV[1]) or '0')
+"""
+
+# KEYS: pending, processing
+CLAIM_SCRIPT = """
+if redis.call('EXISTS', KEYS[2]) == 0 and redis.call('EXISTS', KEYS[1]) == 1 then
+    redis.call('RENAME', KEYS[1], KEYS[2])
+end
+return redis.call('HGETALL', KEYS[2])
+"""
+
+
+def _connection():
+    return get_redis_connection('default')
+
+
+def record_view(auction_id):
+    """
+    Count one view of an auction (and score it on the leaderboards). Returns the number of its views
+    not flushed to the database yet.
+    """
+    pipe = _connection().pipeline(transaction=False)
+    pipe.eval(RECORD_SCRIPT, 2, PENDING_KEY, PROCESSING_KEY, auction_id)
+    leaderboard.record(auction_id, pipe=pipe)
+    return pipe.execute()[0]
+
+
+async def arecord_view(auction_id):
+    """
+    ``record_view()`` for async views.
+    """
+    pipe = aio.connection().pipeline(transaction=False)
+    pipe.eval(RECORD_SCRIPT, 2, PENDING_KEY, PROCESSING_KEY, auction_id)
+    leaderboard.record(auction_id, pipe=pipe)
+    return (await pipe.execute())[0]
+
+
+def pending_views(auction_ids):
+    """
+    Return ``{auction_id: views not flushed yet}`` for the given auctions (missing means 0).
+    """
+    auction_ids = list(auction_ids)
+    if not auction_ids:
+        return {}
+    pipe = _connection().pipeline(transaction=False)
+    pipe.hmget(PENDING_KEY, auction_ids)
+    pipe.hmget(PROCESSING_KEY, auction_ids)
+    return _count_views(auction_ids, *pipe.execute())
+
+
+async def apending_views(auction_ids):
+    """
+    ``pending_views()`` for async views.
+    """
+    auction_ids = list(auction_ids)
+    if not auction_ids:
+        return {}
+    pipe = aio.connection().pipeline(transaction=False)
+    pipe.hmget(PENDING_KEY, auction_ids)
+    pipe.hmget(PROCESSING_KEY, auction_ids)
+    return _count_views(auction_ids, *await pipe.execute())
+
+
+def _count_views(auction_ids, pending, processing):
+    counts = {}
+    for auction_id, *values in zip(auction_ids, pending, processing):
+        count = sum(int(value) for value in values if value)
+        if count:
+            counts[auction_id] = count
+    return counts
+
+
+def flush():
+    """
+    Add the pending view counts to ``Auction.view``. Returns the number of views written.
+    """
+    conn = _connection()
+    with conn.lock(FLUSH_LOCK_KEY, timeout=300):
+        claimed = conn.eval(CLAIM_SCRIPT, 2, PENDING_KEY, PROCESSING_KEY)
+        counts = {int(auction_id): int(count) for auction_id, count in zip(claimed[::2], claimed[1::2])}
+        if counts:
+            items = list(counts.items())
+            with transaction.atomic():
+                for start in range(0, len(items), FLUSH_BATCH):
+                    batch = items[start:start + FLUSH_BATCH]
+                    Auction.objects.filter(id__in=[auction_id for auction_id, _ in batch]).update(
+                        view=F('view') + Case(
+                            *[When(id=auction_id, then=Value(count)) for auction_id, count in batch],
+                            default=Value(0),
+                        )
+                    )
+            conn.delete(PROCESSING_KEY)
+            detail.invalidate_live(*counts)
+    return sum(counts.values())
@@ -0,0 +1,123 @@
+"""
+Auction deadlines and soft close.
+
+The end date of every open (upcoming or live) auction is kept in a Redis sorted set scored by
+its epoch timestamp, so the scheduler finds the auctions that are due with one ZRANGEBYSCORE
+instead of scanning the ``Auction`` table. ``post_save``/``post_delete`` keep the set in sync
+(``src.auction.signals``); ``rebuild()`` recreates it from the database.
+
+Soft close: a bid accepted less than ``AUCTION_SOFT_CLOSE_WINDOW`` seconds before the end pushes
+the end back by ``AUCTION_SOFT_CLOSE_EXTENSION`` seconds. The extension is part of the statement
+(or Lua script) that accepts the bid, see ``extended_end_date()`` and ``src.auction.orderbook``.
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db.models import Case, F, When
+from django.utils.timezone import now
+from django_redis import get_redis_connection
+
+from src.auction.models import Auction
+
+DEADLINES_KEY = 'auction:deadlines'
+
+OPEN_STATUSES = (Auction.StatusChoices.UPCOMING, Auction.StatusChoices.LIVE)
+
+
+def _connection():
+    return get_redis_connection('default')
+
+
+def soft_close_window():
+    return timedelta(seconds=settings.AUCTION_SOFT_CLOSE_WINDOW)
+
+
+def soft_close_extension():
+    return timedelta(seconds=settings.AUCTION_SOFT_CLOSE_EXTENSION)
+
+
+def extended_end_date(bid_time):
+    """
+    Expression for ``auction_end_date`` after a bid at ``bid_time``, for use in the UPDATE that accepts it.
+    """
+    if not settings.AUCTION_SOFT_CLOSE_WINDOW or not settings.AUCTION_SOFT_CLOSE_EXTENSION:
+        return F('auction_end_date')
+    return Case(
+        When(auction_end_date__lt=bid_time + soft_close_window(),
+             then=F('auction_end_date') + soft_close_extension()),
+        default=F('auction_end_date'),
+    )
+
+
+def track(auction_id, end_date):
+    _connection().zadd(DEADLINES_KEY, {auction_id: end_date.timestamp()})
+
+
+def extend(auction_id, end_date):
+    """
+    Move a deadline to ``end_date`` unless it is already later (a concurrent extension won).
+    """
+    _connection().zadd(DEADLINES_KEY, {auction_id: end_date.timestamp()}, gt=True)
+
+
+def untrack(*auction_ids):
+    if auction_ids:
+        _connection().zrem(DEADLINES_KEY, *auction_ids)
+
+
+def deadline(auction_id):
+    score = _connection().zscore(DEADLINES_KEY, auction_id)
+    return datetime.fromtimestamp(score, dt_timezone.utc) if score is not None else None
+
+
+def due(current_time=None):
+    """
+    Ids of the tracked auctions whose deadline has passed.
+    """
+    current_time = current_time or now()
+    return [int(auction_id) for auction_id in
+            _connection().zrangebyscore(DEADLINES_KEY, '-inf', f'({current_time.timestamp()}')]
+
+
+def next_deadline():
+    """
+    The earliest tracked deadline, or None.
+    """
+    first = _connection().zrange(DEADLINES_KEY, 0, 0, withscores=True)
+    return datetime.fromtimestamp(first[0][1], dt_timezone.utc) if first else None
+
+
+def resync(auction_ids):
+    """
+    Reset the deadlines of the given auctions from the database, dropping the ones no longer open.
+    """
+    open_auctions = dict(
+        Auction.objects.filter(id__in=auction_ids, status__in=OPEN_STATUSES).values_list('id', 'auction_end_date'))
+    if open_auctions:
+        # GT: an extension committed after the read above must not be undone.
+        _connection().zadd(DEADLINES_KEY, {auction_id: end.timestamp() for auction_id, end in open_auctions.items()},
+                           gt=True)
+    untrack(*(auction_id for auction_id in auction_ids if auction_id not in open_auctions))
+
+
+def rebuild(batch_size=5000):
+    """
+    Recreate the sorted set from the open auctions in the database. Returns the number tracked.
+    """
+    conn = _connection()
+    pipe = conn.pipeline()
+    pipe.delete(DEADLINES_KEY)
+    count = 0
+    deadlines = {}
+    for auction_id, end_date in Auction.objects.filter(status__in=OPEN_STATUSES).values_list(
+            'id', 'auction_end_date').iterator(chunk_size=batch_size):
+        deadlines[auction_id] = end_date.timestamp()
+        if len(deadlines) >= batch_size:
+            pipe.zadd(DEADLINES_KEY, deadlines)
+            count += len(deadlines)
+            deadlines = {}
+    if deadlines:
+        pipe.zadd(DEADLINES_KEY, deadlines)
+        count += len(deadlines)
+    pipe.execute()
+    return count
@@ -0,0 +1,201 @@
+"""
+Cached fragments of the auction detail response (``AuctionDetailView``).
+
+The response is put together from three fragments in the ``default`` cache, read in two round
+trips (their versions, then the fragments themselves):
+
+* static: what only changes when the auction is saved: name, description, images, additional
+  details... Its version is bumped by ``src.auction.signals`` on save and delete.
+* live: the bid state: current bid, status, end date, stored view count and the first bid
+  history page. Its version is also bumped by the bulk writes to it (``invalidate_live``): bids,
+  the order book flush, status transitions, view flushes and the admin actions.
+* related: the best related auctions, under the ``related`` version bumped when they are
+  recomputed. They show other auctions' bids, so they expire after ``AUCTION_DETAIL_RELATED_TIMEOUT``.
+
+A missing fragment is rebuilt from the database by one worker at a time (``cache.remember``) and
+stored under the version read beforehand, so a write committed in between is never hidden by it.
+``afragments()`` reads them from async views and hands missing or expiring ones to ``fragments()``.
+What moves with the clock (``time_remaining``, "Bid 5 minutes ago") is rendered per request.
+Bidder names and pictures are copied into the live fragment, a profile change shows within
+``AUCTION_DETAIL_CACHE_TIMEOUT``.
+"""
+import zlib
+from datetime import UTC, datetime, timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.timezone import now
+
+from src.auction import aio, media, related
+from src.auction.cache import get_versions, aget_versions, bump_version, remember, is_fresh
+from src.auction.conditional import make_etag
+from src.auction.models import Auction
+from src.auction.pagination import bid_history_page
+from src.auction.serializers import AuctionDetailSerializer, RelatedAuctionSerializer, RELATED_AUCTION_COLUMNS, \
+    bid_history_entry, render_bid_history_entry
+
+FRAGMENT_KEY = 'auction-detail:{}:{}:{}:{}'
+
+STATIC_FIELDS = ('id', 'name', 'location', 'description', 'images', 'video')
+ADDITIONAL_FIELDS = (
+    'lot_ref_num', 'lot_num_two', 'piece_title', 'price', 'dimensions', 'framed_text', 'body_style', 'medium',
+    'color_scheme', 'condition', 'warranty', 'date_prod', 'artist_name', 'artist_birth_date', 'artist_death_date',
+)
+COLUMNS = (
+    'id', 'name', 'location', 'current_bid', 'description', 'status', 'image1', 'image2', 'image3', 'image4',
+    'video', 'view', 'auction_end_date', 'category_id', 'updated_at', *ADDITIONAL_FIELDS,
+)
+
+
+def static_name(auction_id):
+    return f'auction-static:{auction_id}'
+
+
+def live_name(auction_id):
+    return f'auction-live:{auction_id}'
+
+
+def invalidate(auction_id):
+    bump_version(static_name(auction_id))
+    bump_version(live_name(auction_id))
+
+
+def invalidate_live(*auction_ids):
+    for auction_id in auction_ids:
+        bump_version(live_name(auction_id))
+
+
+def invalidate_live_on_commit(*auction_ids):
+    transaction.on_commit(lambda: invalidate_live(*auction_ids))
+
+
+def _represent(serializer, field_names, instance):
+    data = {}
+    for name in field_names:
+        field = serializer.fields[name]
+        attribute = field.get_attribute(instance)
+        data[name] = None if attribute is None else field.to_representation(attribute)
+    return data
+
+
+def build_static(instance):
+    fragment = _represent(AuctionDetailSerializer(), STATIC_FIELDS, instance)
+    fragment['additional_details'] = [{name: getattr(instance, name) for name in ADDITIONAL_FIELDS}]
+    fragment['category_id'] = instance.category_id_id
+    return fragment
+
+
+def build_live(instance):
+    fragment = _represent(AuctionDetailSerializer(), ('current_bid', 'status', 'view'), instance)
+    bids, fragment['bid_history_next'] = bid_history_page(instance.id)
+    fragment['bids'] = [bid_history_entry(bid) for bid in bids]
+    fragment['auction_end_date'] = instance.auction_end_date
+    fragment['updated_at'] = instance.updated_at
+    return fragment
+
+
+def build_related(auction_id, category_id):
+    columns = (*RELATED_AUCTION_COLUMNS, 'updated_at')
+    auctions = list(related.related_auctions(auction_id, columns))
+    if not auctions:
+        # Not computed yet (new auction before the next `manage.py refresh_dirty_related` pass)
+        auctions = list(Auction.objects.filter(
+            category_id=category_id,
+            auction_end_date__gt=now()
+        ).exclude(id=auction_id).only(*columns)[:5])
+    updated_at = max((auction.updated_at for auction in auctions), default=None)
+    return {
+        'items': [dict(item) for item in RelatedAuctionSerializer(auctions, many=True).data],
+        'updated_at': updated_at,
+        # Changes when the list or one of its auctions does, part of the ETag
+        'stamp': zlib.crc32(repr(([auction.id for auction in auctions], updated_at)).encode()),
+    }
+
+
+def fragment_keys(auction_id, versions):
+    # The fragments hold media URLs, signed ones expire (src.auction.media)
+    window = media.signing_window()
+    return {part: FRAGMENT_KEY.format(part, auction_id, version, window)
+            for part, version in zip(('static', 'live', 'related'), versions)}
+
+
+def fragments(auction_id):
+    """
+    ``{'static': ..., 'live': ..., 'related': ...}`` of an auction, None when it does not exist.
+    The ``versions`` entry identifies them.
+    """
+    versions = get_versions(static_name(auction_id), live_name(auction_id), 'related')
+    keys = fragment_keys(auction_id, versions)
+    found = cache.get_many(keys.values())
+
+    loaded = []
+
+    def load():
+        # Static and live are built from the same row
+        if not loaded:
+            loaded.append(Auction.objects.only(*COLUMNS).get(id=auction_id))
+        return loaded[0]
+
+    timeout = settings.AUCTION_DETAIL_CACHE_TIMEOUT
+    try:
+        static = remember(keys['static'], lambda: build_static(load()), timeout, found.get(keys['static']))
+        live = remember(keys['live'], lambda: build_live(load()), timeout, found.get(keys['live']))
+    except Auction.DoesNotExist:
+        return None
+    related_auctions = remember(keys['related'], lambda: build_related(auction_id, static['category_id']),
+                                settings.AUCTION_DETAIL_RELATED_TIMEOUT, found.get(keys['related']))
+    return {'static': static, 'live': live, 'related': related_auctions, 'versions': versions}
+
+
+async def afragments(auction_id):
+    """
+    ``fragments()`` for async views: cached fragments are read with the async client, the rest is
+    built by ``fragments()`` in a thread.
+    """
+    versions = await aget_versions(static_name(auction_id), live_name(auction_id), 'related')
+    keys = list(fragment_keys(auction_id, versions).values())
+    found = await aio.get_many(keys)
+    entries = [found.get(key) for key in keys]
+    if not all(entry is not None and is_fresh(entry) for entry in entries):
+        return await sync_to_async(fragments)(auction_id)
+    static, live, related_auctions = (entry[0] for entry in entries)
+    return {'static': static, 'live': live, 'related': related_auctions, 'versions': versions}
+
+
+def validators(auction_id, parts):
+    static_version, live_version, _ = parts['versions']
+    etag = make_etag('auction', auction_id, static_version, live_version, parts['related']['stamp'])
+    last_modified = max(value for value in (parts['live']['updated_at'], parts['related']['updated_at']) if value)
+    window = media.signing_window()
+    if window:
+        # A body of an earlier window holds expiring media URLs
+        last_modified = max(last_modified, datetime.fromtimestamp(window * settings.AUCTION_MEDIA_SIGNED_TTL, tz=UTC))
+    return etag, last_modified
+
+
+def response_data(parts, views):
+    """
+    The detail response; ``views`` are added to the stored view count.
+    """
+    static, live = parts['static'], parts['live']
+    current_time = now()
+    time_diff = live['auction_end_date'] - current_time
+    end_time = current_time + timedelta(days=time_diff.days, seconds=time_diff.seconds)
+    return {
+        'id': static['id'],
+        'name': static['name'],
+        'location': static['location'],
+        'current_bid': live['current_bid'],
+        'description': static['description'],
+        'status': live['status'],
+        'images': static['images'],
+        'video': static['video'],
+        'view': live['view'] + views,
+        'bid_history': [render_bid_history_entry(entry, current_time) for entry in live['bids']],
+        'bid_history_next': live['bid_history_next'],
+        'time_remaining': end_time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'additional_details': static['additional_details'],
+        'best_related_auctions': parts['related']['items'],
+    }
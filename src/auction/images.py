@@ -0,0 +1,117 @@
+"""
+Derivatives (WebP thumbnails and medium sizes) of uploaded images.
+
+Image fields store their files with ``ImageStorage``: an image is stored under the SHA-256 of its
+content (``auction_images/<sha256>.jpg``) once its derivatives are written, one
+``derivatives/<sha256>-<size>.webp`` per ``AUCTION_IMAGE_SIZES`` entry (longest edge in pixels),
+encoded in a process pool (``manage.py make_image_derivatives`` renders many images in parallel).
+Every name changes with the content, so the files can be cached forever.
+
+``derivative_name(name, size)`` maps a stored name to its derivative with a string operation, no
+query and no storage call. Files stored before (``manage.py make_image_derivatives`` re-stores
+them) or that Pillow cannot read have no hash in their name: ``derivative_name`` returns the
+original.
+"""
+import hashlib
+import io
+import posixpath
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile, File
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+from PIL import Image, ImageOps
+
+HASHED_NAME = re.compile(r'(?:.*/)?([0-9a-f]{64})\.\w+')
+DERIVATIVE_NAME = 'derivatives/{}-{}.webp'
+
+# What Pillow raises on files it cannot decode
+IMAGE_ERRORS = (OSError, ValueError, SyntaxError, Image.DecompressionBombError)
+
+_executor = None
+
+
+def executor():
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=settings.AUCTION_IMAGE_WORKERS or None)
+    return _executor
+
+
+def derivative_name(name, size):
+    match = HASHED_NAME.fullmatch(name)
+    if match is None or size not in settings.AUCTION_IMAGE_SIZES:
+        return name
+    return DERIVATIVE_NAME.format(match[1], size)
+
+
+def render(data, sizes, quality):
+    """
+    ``{size: WebP bytes}`` of the image in ``data``, scaled down to each ``{size: edge}`` pixels on
+    its longest side. Decoded once, each size is scaled from the previous, larger one.
+    """
+    rendered = {}
+    with Image.open(io.BytesIO(data)) as image:
+        # JPEGs are decoded at a reduced scale right away when that is enough
+        image.draft('RGB', (max(sizes.values()),) * 2)
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if image.has_transparency_data else 'RGB')
+        for size, edge in sorted(sizes.items(), key=lambda item: -item[1]):
+            image.thumbnail((edge, edge), Image.LANCZOS)
+            output = io.BytesIO()
+            image.save(output, 'WEBP', quality=quality, method=4)
+            rendered[size] = output.getvalue()
+    return rendered
+
+
+def render_all(data):
+    """
+    ``render()`` every ``AUCTION_IMAGE_SIZES`` entry, in the process pool unless ``AUCTION_IMAGE_WORKERS`` is 0.
+    """
+    args = (data, settings.AUCTION_IMAGE_SIZES, settings.AUCTION_IMAGE_QUALITY)
+    if not settings.AUCTION_IMAGE_WORKERS:
+        return render(*args)
+    return executor().submit(render, *args).result()
+
+
+@deconstructible
+class ImageStorage(FileSystemStorage):
+    """
+    ``FileSystemStorage`` that stores images under their content hash, after their derivatives.
+    """
+    def save(self, name, content, max_length=None):
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        return self.save_image(name, content, max_length) or super().save(name, content, max_length)
+
+    def save_image(self, name, content, max_length=None, derivatives=None):
+        """
+        Store an image and its derivatives (rendered here unless given), returns its hashed name
+        (None when it is not an image).
+        """
+        content.seek(0)
+        data = content.read()
+        content.seek(0)
+        try:
+            with Image.open(io.BytesIO(data)) as image:
+                extension = posixpath.splitext(name)[1].lower() or f'.{image.format.lower()}'
+            derivatives = derivatives or render_all(data)
+        except IMAGE_ERRORS:
+            return None
+
+        digest = hashlib.sha256(data).hexdigest()
+        for size, rendered in derivatives.items():
+            derivative = DERIVATIVE_NAME.format(digest, size)
+            if not self.exists(derivative):
+                super().save(derivative, ContentFile(rendered))
+        name = posixpath.join(posixpath.dirname(name), digest + extension)
+        if self.exists(name):
+            # Same content uploaded before
+            return name
+        return super().save(name, content, max_length)
+
+
+image_storage = ImageStorage()
@@ -0,0 +1,161 @@
+"""
+Popularity leaderboards of the open auctions.
+
+Two Redis sorted sets rank the upcoming and live auctions:
+
+* ``popular``: views plus ``AUCTION_LEADERBOARD_BID_WEIGHT`` per accepted bid, all time,
+* ``trending``: the same events, each weighted ``2 ** (age / AUCTION_TRENDING_HALF_LIFE)`` relative
+  to a stored epoch, so recent activity outranks old activity without ever rewriting the set.
+  When the weights grow too large the whole set is scaled down once and the epoch moved.
+
+An auction enters the sets when it is saved open (``src.auction.signals``) and leaves them when it
+completes (scheduler), is cancelled or deleted. Events only increment auctions already on the
+board, so a late view of an ended auction does not bring it back. ``TopAuctionsAPIView`` reads the
+first N entries (O(log n + N)) and loads those auctions in one query.
+"""
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+from django.utils.timezone import now
+from django_redis import get_redis_connection
+
+from src.auction import aio
+from src.auction.models import Auction, Bid
+
+POPULAR_KEY = 'leaderboard:popular'
+TRENDING_KEY = 'leaderboard:trending'
+TRENDING_EPOCH_KEY = 'leaderboard:trending:epoch'
+BOARDS = {'popular': POPULAR_KEY, 'trending': TRENDING_KEY}
+
+# Half-lives after which the trending scores are scaled back, keeps them far from float limits
+REBASE_AFTER = 64
+
+OPEN_STATUSES = (Auction.StatusChoices.UPCOMING, Auction.StatusChoices.LIVE)
+
+# KEYS: popular, trending, trending epoch
+# ARGV: auction id, weight, now (epoch seconds), half-life (seconds), rebase after (half-lives)
+RECORD_SCRIPT = """
+if not redis.call('ZSCORE', KEYS[1], ARGV[1]) then
+    return 0
+end
+redis.call('ZINCRBY', KEYS[1], ARGV[2], ARGV[1])
+local current, half_life = tonumber(ARGV[3]), tonumber(ARGV[4])
+local epoch = tonumber(redis.call('GET', KEYS[3]))
+if not epoch then
+    epoch = current
+    redis.call('SET', KEYS[3], epoch)
+end
+local exponent = (current - epoch) / half_life
+if exponent > tonumber(ARGV[5]) then
+    local shift = math.floor(exponent)
+    redis.call('ZUNIONSTORE', KEYS[2], 1, KEYS[2], 'WEIGHTS', tostring(2 ^ -shift))
+    epoch = epoch + shift * half_life
+    exponent = exponent - shift
+    redis.call('SET', KEYS[3], tostring(epoch))
+end
+redis.call('ZINCRBY', KEYS[2], tostring(tonumber(ARGV[2]) * 2 ^ exponent), ARGV[1])
+return 1
+"""
+
+
+def _connection():
+    return get_redis_connection('default')
+
+
+def record(auction_id, weight=1, pipe=None):
+    """
+    Add ``weight`` to an auction's scores (queued on ``pipe`` when given). No-op when it is not on the board.
+    """
+    (pipe or _connection()).eval(RECORD_SCRIPT, 3, POPULAR_KEY, TRENDING_KEY, TRENDING_EPOCH_KEY, auction_id,
+                                 weight, time.time(), settings.AUCTION_TRENDING_HALF_LIFE, REBASE_AFTER)
+
+
+def record_bids(auction_id, count=1):
+    record(auction_id, count * settings.AUCTION_LEADERBOARD_BID_WEIGHT)
+
+
+def record_bids_on_commit(auction_id, count=1):
+    transaction.on_commit(lambda: record_bids(auction_id, count))
+
+
+def track(auction_id, views=0):
+    """
+    Put an open auction on the boards; ``views`` (its stored count) is a floor for the popular score.
+    """
+    pipe = _connection().pipeline(transaction=False)
+    pipe.zadd(POPULAR_KEY, {auction_id: views}, gt=True)
+    pipe.zadd(TRENDING_KEY, {auction_id: 0}, nx=True)
+    pipe.execute()
+
+
+def remove(*auction_ids):
+    if auction_ids:
+        pipe = _connection().pipeline(transaction=False)
+        pipe.zrem(POPULAR_KEY, *auction_ids)
+        pipe.zrem(TRENDING_KEY, *auction_ids)
+        pipe.execute()
+
+
+async def aremove(*auction_ids):
+    if auction_ids:
+        pipe = aio.connection().pipeline(transaction=False)
+        pipe.zrem(POPULAR_KEY, *auction_ids)
+        pipe.zrem(TRENDING_KEY, *auction_ids)
+        await pipe.execute()
+
+
+def _top_args(board, offset, limit, min_score):
+    low = f'({min_score}' if min_score is not None else '-inf'
+    return (BOARDS[board], '+inf', low), dict(start=offset, num=limit, withscores=True)
+
+
+def top(board='popular', offset=0, limit=20, min_score=None):
+    """
+    ``[(auction_id, score), ...]`` best first, only scores above ``min_score`` when given.
+    """
+    args, kwargs = _top_args(board, offset, limit, min_score)
+    return [(int(auction_id), score) for auction_id, score in _connection().zrevrangebyscore(*args, **kwargs)]
+
+
+async def atop(board='popular', offset=0, limit=20, min_score=None):
+    args, kwargs = _top_args(board, offset, limit, min_score)
+    return [(int(auction_id), score) for auction_id, score in await aio.connection().zrevrangebyscore(*args, **kwargs)]
+
+
+def rebuild(batch_size=5000):
+    """
+    Recreate the boards from the database: views and bid counts for ``popular``, the bids of the last
+    ``REBASE_AFTER`` half-lives for ``trending``. Views are not timestamped, so they do not trend
+    until they happen again. Returns the number of auctions on the board.
+    """
+    half_life, bid_weight = settings.AUCTION_TRENDING_HALF_LIFE, settings.AUCTION_LEADERBOARD_BID_WEIGHT
+    current_time = now()
+    open_auctions = Auction.objects.filter(status__in=OPEN_STATUSES, auction_end_date__gt=current_time)
+    popular = {
+        auction_id: views + bids * bid_weight for auction_id, views, bids in open_auctions.annotate(
+            bid_count=Count('bids')).values_list('id', 'view', 'bid_count').iterator(chunk_size=batch_size)
+    }
+    trending = dict.fromkeys(popular, 0)
+    for auction_id, bid_time in Bid.objects.filter(
+            auction__in=open_auctions, bid_time__gte=current_time - timedelta(seconds=REBASE_AFTER * half_life),
+    ).values_list('auction_id', 'bid_time').iterator(chunk_size=batch_size):
+        if auction_id in trending:
+            trending[auction_id] += bid_weight * 2 ** ((bid_time - current_time).total_seconds() / half_life)
+
+    pipe = _connection().pipeline()
+    pipe.delete(POPULAR_KEY, TRENDING_KEY)
+    pipe.set(TRENDING_EPOCH_KEY, current_time.timestamp())
+    auction_ids = list(popular)
+    for start in range(0, len(auction_ids), batch_size):
+        batch = auction_ids[start:start + batch_size]
+        pipe.zadd(POPULAR_KEY, {auction_id: popular[auction_id] for auction_id in batch})
+        pipe.zadd(TRENDING_KEY, {auction_id: trending[auction_id] for auction_id in batch})
+    pipe.execute()
+    return len(popular)
+
+
+def exists():
+    return bool(_connection().exists(POPULAR_KEY))
@@ -0,0 +1,213 @@
+"""
+Live auction events pushed to clients with Server-Sent Events.
+
+Writers call ``publish()`` (bids, status changes); it goes out on a Redis pub/sub channel per
+auction, so events reach every gunicorn/uvicorn worker. Inside a worker one ``Broadcaster`` per
+event loop holds a single Redis subscription per auction and fans each message out to the local
+stream connections, so a popular lot costs one Redis subscription per worker, not per client.
+
+A lost Redis connection is logged and the subscriptions are restored, with a growing delay
+between attempts; events published in between are missed (clients get the state again with the
+next ``bid``/``status`` event). A malformed message is logged and skipped.
+
+``GET /api/v1/auction/<id>/stream`` must be served by the ASGI application (``root.asgi``);
+under a sync WSGI worker every open stream would pin a whole worker.
+"""
+import asyncio
+import json
+import logging
+import weakref
+
+import redis.asyncio
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.http import StreamingHttpResponse, Http404
+from django.utils.timezone import now
+from django.views.decorators.http import require_GET
+from django_redis import get_redis_connection
+from redis.exceptions import ConnectionError as RedisConnectionError, TimeoutError as RedisTimeoutError
+
+from src.auction.models import Auction
+
+logger = logging.getLogger(__name__)
+
+QUEUE_SIZE = 100
+# Seconds between attempts to restore a lost subscription, doubled up to the max
+RECONNECT_DELAY = 0.5
+RECONNECT_MAX_DELAY = 30
+
+
+def channel_name(auction_id):
+    return f'auction:{auction_id}:events'
+
+
+def remaining_seconds(end_date):
+    return max(int((end_date - now()).total_seconds()), 0)
+
+
+def _frame(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, cls=DjangoJSONEncoder)}\n\n"
+
+
+def publish(auction_id, event, data):
+    """
+    Broadcast an event (``bid``, ``status``, ...) to everyone streaming this auction.
+    """
+    message = json.dumps({'event': event, 'data': data}, cls=DjangoJSONEncoder)
+    get_redis_connection('default').publish(channel_name(auction_id), message)
+
+
+def publish_on_commit(auction_id, event, data):
+    transaction.on_commit(lambda: publish(auction_id, event, data))
+
+
+class Broadcaster:
+    """
+    Per event loop fan-out of Redis pub/sub messages to local subscriber queues.
+    """
+
+    def __init__(self):
+        self._client = redis.asyncio.from_url(settings.CACHES['default']['LOCATION'])
+        self._pubsub = self._client.pubsub()
+        self._queues = {}
+        self._reader = None
+
+    async def subscribe(self, auction_id):
+        queue = asyncio.Queue(QUEUE_SIZE)
+        channel = channel_name(auction_id)
+        if channel not in self._queues:
+            await self._pubsub.subscribe(channel)
+            self._queues.setdefault(channel, set())
+        self._queues[channel].add(queue)
+        if self._reader is None:
+            self._reader = asyncio.create_task(self._read())
+        return queue
+
+    async def unsubscribe(self, auction_id, queue):
+        channel = channel_name(auction_id)
+        queues = self._queues.get(channel, set())
+        queues.discard(queue)
+        if not queues and channel in self._queues:
+            del self._queues[channel]
+            try:
+                await self._pubsub.unsubscribe(channel)
+            except (RedisConnectionError, RedisTimeoutError):
+                # Not subscribed again by the reader once it reconnects
+                pass
+
+    async def _read(self):
+        try:
+            while True:
+                try:
+                    message = await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                except (RedisConnectionError, RedisTimeoutError):
+                    logger.warning("Lost the live events subscription, reconnecting", exc_info=True)
+                    await self._reconnect()
+                    continue
+                if message:
+                    self._dispatch(message)
+        except Exception:
+            logger.exception("Live events reader stopped")
+            raise
+        finally:
+            # subscribe() starts a new reader
+            self._reader = None
+
+    async def _reconnect(self):
+        delay = RECONNECT_DELAY
+        while True:
+            await asyncio.sleep(delay)
+            try:
+                await self._pubsub.aclose()
+                self._pubsub = self._client.pubsub()
+                if self._queues:
+                    await self._pubsub.subscribe(*self._queues)
+                return
+            except (RedisConnectionError, RedisTimeoutError):
+                delay = min(delay * 2, RECONNECT_MAX_DELAY)
+
+    async def close(self):
+        # Streams closed afterwards have nothing to unsubscribe from
+        self._queues.clear()
+        if self._reader is not None:
+            self._reader.cancel()
+            await asyncio.gather(self._reader, return_exceptions=True)
+        await self._pubsub.aclose()
+        await self._client.aclose()
+
+    def _dispatch(self, message):
+        try:
+            payload = json.loads(message['data'])
+            frame = _frame(payload['event'], payload['data'])
+        except (ValueError, TypeError, KeyError):
+            logger.exception("Skipped a malformed live event on %s", message['channel'])
+            return
+        for queue in list(self._queues.get(message['channel'].decode(), ())):
+            if queue.full():
+                # A client that can not keep up only misses intermediate events.
+                queue.get_nowait()
+            queue.put_nowait((payload, frame))
+
+
+_broadcasters = weakref.WeakKeyDictionary()
+
+
+async def _close_with_loop(broadcaster):
+    # Like src.auction.aio: the pending tasks are cancelled before a loop is closed
+    try:
+        await asyncio.Future()
+    finally:
+        await broadcaster.close()
+
+
+def broadcaster():
+    loop = asyncio.get_running_loop()
+    if loop not in _broadcasters:
+        instance = Broadcaster()
+        _broadcasters[loop] = instance, loop.create_task(_close_with_loop(instance))
+    return _broadcasters[loop][0]
+
+
+def auction_state(auction):
+    return {
+        'auction': auction['id'],
+        'status': auction['status'],
+        'current_bid': auction['current_bid'],
+        'auction_end_date': auction['auction_end_date'],
+        'time_remaining': remaining_seconds(auction['auction_end_date']),
+    }
+
+
+async def _events(auction):
+    queue = await broadcaster().subscribe(auction['id'])
+    end_date = auction['auction_end_date']
+    try:
+        yield _frame('snapshot', auction_state(auction))
+        while True:
+            try:
+                payload, frame = await asyncio.wait_for(queue.get(), timeout=settings.AUCTION_STREAM_HEARTBEAT)
+            except asyncio.TimeoutError:
+                yield _frame('time', {'auction': auction['id'], 'time_remaining': remaining_seconds(end_date)})
+                continue
+            if payload['data'].get('auction_end_date'):
+                end_date = Auction._meta.get_field('auction_end_date').to_python(payload['data']['auction_end_date'])
+            yield frame
+    finally:
+        await broadcaster().unsubscribe(auction['id'], queue)
+
+
+@require_GET
+async def auction_stream(request, auction_id):
+    """
+    Server-Sent Events stream of one auction: a ``snapshot`` first, then ``bid`` and ``status``
+    events as they happen and a ``time`` event with the remaining seconds on every heartbeat.
+    """
+    auction = await Auction.objects.filter(id=auction_id).values(
+        'id', 'status', 'current_bid', 'auction_end_date').afirst()
+    if auction is None:
+        raise Http404
+    response = StreamingHttpResponse(_events(auction), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,23 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from src.auction import orderbook
+
+
+class Command(BaseCommand):
+    help = "Persist bids accepted by the live auction order book (replays an interrupted flush first)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=1.0, help="Seconds between flushes.")
+        parser.add_argument('--batch-size', type=int, default=None)
+        parser.add_argument('--once', action='store_true', help="Flush once and exit.")
+
+    def handle(self, *args, **options):
+        while True:
+            written = orderbook.flush(options['batch_size'])
+            if written:
+                self.stdout.write(f"Flushed {written} bids")
+            if options['once']:
+                break
+            time.sleep(options['interval'])
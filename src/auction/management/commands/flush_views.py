@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from src.auction import counters
+
+
+class Command(BaseCommand):
+    help = "Add the auction view counts collected in Redis to Auction.view (replays an interrupted flush first)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=5.0, help="Seconds between flushes.")
+        parser.add_argument('--once', action='store_true', help="Flush once and exit.")
+
+    def handle(self, *args, **options):
+        while True:
+            written = counters.flush()
+            if written:
+                self.stdout.write(f"Flushed {written} views")
+            if options['once']:
+                break
+            time.sleep(options['interval'])
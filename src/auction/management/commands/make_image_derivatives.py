@@ -0,0 +1,49 @@
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand
+from django.db.models import ImageField
+
+from src.auction import images
+
+
+class Command(BaseCommand):
+    help = "Re-store the images uploaded before the derivative pipeline under their content hash, with derivatives."
+
+    def handle(self, *args, **options):
+        pending = []
+        for model in apps.get_models():
+            for field in model._meta.concrete_fields:
+                if isinstance(field, ImageField) and isinstance(field.storage, images.ImageStorage):
+                    names = model.objects.exclude(**{f'{field.name}__isnull': True}).exclude(**{field.name: ''}) \
+                        .values_list(field.name, flat=True).distinct()
+                    pending += [(model, field, name) for name in names
+                                if not images.HASHED_NAME.fullmatch(name) and field.storage.exists(name)]
+
+        stored = 0
+        batch_size = max(settings.AUCTION_IMAGE_WORKERS, 1) * 4
+        for start in range(0, len(pending), batch_size):
+            batch = pending[start:start + batch_size]
+            sources = []
+            for _, field, name in batch:
+                with field.storage.open(name) as file:
+                    sources.append(file.read())
+            # Rendered in parallel, stored one by one
+            futures = [images.executor().submit(images.render, data, settings.AUCTION_IMAGE_SIZES,
+                                                settings.AUCTION_IMAGE_QUALITY) for data in sources]
+            for (model, field, name), data, future in zip(batch, sources, futures):
+                try:
+                    derivatives = future.result()
+                except images.IMAGE_ERRORS:
+                    continue
+                new_name = field.storage.save_image(name, ContentFile(data), derivatives=derivatives)
+                self.rename(model, field, name, new_name)
+                stored += 1
+        self.stdout.write(f"Stored {stored} images with their derivatives")
+
+    def rename(self, model, field, name, new_name):
+        # Saved one by one so the caches and indexes built from the rows follow
+        auto_now = [other.name for other in model._meta.concrete_fields if getattr(other, 'auto_now', False)]
+        for instance in model.objects.filter(**{field.name: name}):
+            setattr(instance, field.attname, new_name)
+            instance.save(update_fields=[field.name, *auto_now])
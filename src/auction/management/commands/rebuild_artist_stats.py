@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from src.auction import artists
+
+
+class Command(BaseCommand):
+    help = "Recompute the statistics of every artist (backfill, or after bulk imports)."
+
+    def handle(self, *args, **options):
+        count = artists.rebuild()
+        self.stdout.write(f"Computed statistics of {count} artists")
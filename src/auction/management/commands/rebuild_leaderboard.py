@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from src.auction import leaderboard
+
+
+class Command(BaseCommand):
+    help = "Recreate the top auction leaderboards from view counts and bids (after losing Redis or bulk imports)."
+
+    def handle(self, *args, **options):
+        count = leaderboard.rebuild()
+        self.stdout.write(f"Ranked {count} auctions")
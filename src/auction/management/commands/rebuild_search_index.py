@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from src.auction import search
+
+
+class Command(BaseCommand):
+    help = "Recreate the auction search index (after bulk imports or restoring a backup)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        count = search.rebuild(options['batch_size'])
+        self.stdout.write(f"Indexed {count} auctions")
@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from src.auction import related
+
+
+class Command(BaseCommand):
+    help = "Recompute the related auctions touched by the auctions saved or closed since the last run."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=5.0, help="Seconds between refreshes.")
+        parser.add_argument('--once', action='store_true', help="Refresh once and exit.")
+
+    def handle(self, *args, **options):
+        while True:
+            refreshed = related.refresh_dirty()
+            if refreshed:
+                self.stdout.write(f"Refreshed related auctions of {refreshed} auctions")
+            if options['once']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from src.auction import related
+
+
+class Command(BaseCommand):
+    help = "Recompute the related auctions of every auction (after bulk imports or changing the weights)."
+
+    def handle(self, *args, **options):
+        count = related.refresh()
+        self.stdout.write(f"Computed related auctions of {count} auctions")
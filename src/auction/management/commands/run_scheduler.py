@@ -0,0 +1,36 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils.timezone import now
+
+from src.auction import deadlines, leaderboard
+from src.auction.scheduler import advance_statuses, next_transition_at, transition_metrics
+
+
+class Command(BaseCommand):
+    help = "Move auctions from upcoming to live to completed as their start and end dates pass."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Apply due transitions once and exit.")
+
+    def handle(self, *args, **options):
+        # Auctions saved while Redis was unavailable (or bulk inserted) are not tracked yet.
+        self.stdout.write(f"Tracking {deadlines.rebuild()} auction deadlines")
+        if not leaderboard.exists():
+            # Redis was flushed, rebuild the scores that can be derived from the database.
+            self.stdout.write(f"Ranking {leaderboard.rebuild()} auctions on the leaderboards")
+        while True:
+            started, completed = advance_statuses()
+            if started or completed:
+                metrics = transition_metrics()
+                self.stdout.write(f"{len(started)} live, {len(completed)} completed "
+                                  f"(max lag {metrics['max_lag_seconds']:.2f}s)")
+            if options['once']:
+                break
+            # Sleep until the next start/end date, but wake up regularly to pick up new or edited auctions.
+            delay = settings.AUCTION_SCHEDULER_MAX_SLEEP
+            next_at = next_transition_at()
+            if next_at:
+                delay = min(delay, max((next_at - now()).total_seconds(), 0))
+            time.sleep(delay)
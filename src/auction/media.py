@@ -0,0 +1,127 @@
+"""
+Absolute URLs of the uploaded media.
+
+Every URL of a stored file the API returns is built by ``url(name)``: ``AUCTION_MEDIA_HOST`` (the
+site, or a CDN in front of it) followed by ``MEDIA_URL`` and the quoted name. The prefix is
+computed once per process and a name is turned into a URL with string operations, without the
+storage ``.url()`` call or the request, so list serializers can afford one per row.
+
+* versioned URLs: ``AUCTION_MEDIA_VERSION`` is appended (``?v=``) to the names that do not change
+  with the content (the hashed names of ``src.auction.images`` never need it), bump it to have the
+  CDN fetch them again,
+* signed URLs: with ``AUCTION_MEDIA_SIGNING_KEY`` every URL carries an HMAC-SHA256 ``signature`` of
+  its path and query, and an ``expires`` timestamp when ``AUCTION_MEDIA_SIGNED_TTL`` is set. Expiries
+  are rounded up to the TTL so the URLs of a file stay the same (and cacheable) for a TTL at a time.
+  nginx checks them before serving ``/media/`` (``auth_request`` to ``access()``) when it is built with
+  ``AUCTION_MEDIA_ACCESS=signed``; the default ``public`` build serves the files without the subrequest.
+
+Cached responses, fragments and ETags holding signed URLs are keyed by ``signing_window()``: what
+is built in a window is served during that window only, and its URLs are valid until the end of
+the next one.
+"""
+import base64
+import functools
+import hmac
+import re
+import time
+from urllib.parse import urljoin, urlsplit, urlencode, parse_qsl
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.http import HttpResponse
+from django.utils.encoding import filepath_to_uri
+
+from src.auction.images import derivative_name
+
+# Characters urllib's quote() leaves alone in filepath_to_uri()
+PLAIN_PATH = re.compile(r"[A-Za-z0-9_.\-~/!*()']*")
+# Names that change with the content: the hashed images and their derivatives
+CONTENT_NAME = re.compile(r'(?:.*/)?[0-9a-f]{64}(?:-\w+)?\.\w+')
+
+
+@functools.lru_cache(maxsize=None)
+def _config():
+    media_url = settings.MEDIA_URL
+    if not urlsplit(media_url).netloc:
+        media_url = settings.AUCTION_MEDIA_HOST.rstrip('/') + urljoin('/', media_url)
+    if not media_url.endswith('/'):
+        media_url += '/'
+    key = settings.AUCTION_MEDIA_SIGNING_KEY
+    return (media_url, len(media_url) - len(urlsplit(media_url).path), settings.AUCTION_MEDIA_VERSION,
+            key.encode() if key else None, settings.AUCTION_MEDIA_SIGNED_TTL)
+
+
+def _reset(setting, **kwargs):
+    if setting == 'MEDIA_URL' or setting.startswith('AUCTION_MEDIA_'):
+        _config.cache_clear()
+
+
+setting_changed.connect(_reset)
+
+
+def _signature(key, path):
+    digest = hmac.new(key, path.encode(), 'sha256').digest()
+    return base64.urlsafe_b64encode(digest[:16]).rstrip(b'=').decode()
+
+
+def signing_window():
+    """
+    The number of the current ``AUCTION_MEDIA_SIGNED_TTL`` window, 0 when URLs do not expire.
+    """
+    _, _, _, key, ttl = _config()
+    return int(time.time()) // ttl if key and ttl else 0
+
+
+def url(name, size=None):
+    """
+    Absolute URL of the stored file ``name``, or of its ``size`` derivative when it has one.
+    """
+    if not name:
+        return None
+    if size:
+        name = derivative_name(name, size)
+    prefix, host_length, version, key, ttl = _config()
+    if '/.' in '/' + name:
+        # Dot segments are resolved like the storage does
+        location = urljoin(prefix, filepath_to_uri(name).lstrip('/'))
+    else:
+        # Most names have nothing to quote
+        location = prefix + (name if PLAIN_PATH.fullmatch(name) else filepath_to_uri(name)).lstrip('/')
+    if not (version or key):
+        return location
+
+    params = []
+    if version and not CONTENT_NAME.fullmatch(name):
+        params.append(('v', version))
+    if key:
+        if ttl:
+            params.append(('expires', (signing_window() + 2) * ttl))
+        path = location[host_length:] + ('?' + urlencode(params) if params else '')
+        params.append(('signature', _signature(key, path)))
+    return f'{location}?{urlencode(params)}' if params else location
+
+
+def check_signature(path):
+    """
+    Whether ``path`` (with its query) carries a valid, unexpired signature.
+    """
+    _, _, _, key, _ = _config()
+    location, _, query = path.partition('?')
+    params = parse_qsl(query)
+    if key is None or not params or params[-1][0] != 'signature':
+        return False
+    signed = location + ('?' + urlencode(params[:-1]) if len(params) > 1 else '')
+    expires = dict(params).get('expires')
+    if expires is not None and (not expires.isdigit() or int(expires) < time.time()):
+        return False
+    return hmac.compare_digest(params[-1][1], _signature(key, signed))
+
+
+def access(request):
+    """
+    ``auth_request`` of nginx: 204 when the media URL in ``X-Original-URI`` may be served, 403 otherwise.
+    """
+    _, _, _, key, _ = _config()
+    if key is None or check_signature(request.headers.get('X-Original-URI', '')):
+        return HttpResponse(status=204)
+    return HttpResponse(status=403)
@@ -0,0 +1,135 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework.renderers import BrowsableAPIRenderer
+from rest_framework.response import Response
+
+from src.auction.cache import get_version, response_key
+from src.auction.routers import primary
+from src.auction.renderers import FastJSONRenderer
+
+
+class QueryShapeMixin:
+    """
+    Declare the query shape of a generic view next to its serializer.
+
+    ``select_related_fields`` / ``prefetch_related_fields`` load the relations the serializer
+    walks, ``only_fields`` limits the columns to the ones it reads. ``query_budget`` is the number
+    of queries one request may run whatever the number of rows; the ``assert_query_budget``
+    test fixture enforces it.
+    """
+    select_related_fields = ()
+    prefetch_related_fields = ()
+    only_fields = ()
+    query_budget = None
+
+    def shape_queryset(self, queryset):
+        if self.select_related_fields:
+            queryset = queryset.select_related(*self.select_related_fields)
+        if self.prefetch_related_fields:
+            queryset = queryset.prefetch_related(*self.prefetch_related_fields)
+        if self.only_fields:
+            queryset = queryset.only(*self.only_fields)
+        return queryset
+
+    def filter_queryset(self, queryset):
+        return self.shape_queryset(super().filter_queryset(queryset))
+
+
+class ConditionalGetMixin:
+    """
+    Answer conditional GETs (``If-None-Match`` / ``If-Modified-Since``) of JSON requests with a 304
+    before the body is built.
+
+    ``get_validators(request)`` returns ``(etag, last_modified)``, either may be None, and must be
+    cheap (see ``src.auction.conditional``). They are sent on every 200 and 304 response.
+    ``conditional_response`` gets the 304 (or 412) before it is returned.
+
+    The validators and the body are read from the primary: the versions in the validators are bumped
+    when the primary commits, a body read from a lagging replica would be tagged with a version it
+    does not have (see ``src.auction.routers``).
+    """
+    def get_validators(self, request):
+        raise NotImplementedError
+
+    def conditional_response(self, request, response):
+        return response
+
+    def get(self, request, *args, **kwargs):
+        if request.accepted_renderer.format != 'json':
+            return super().get(request, *args, **kwargs)
+
+        with primary():
+            self.etag, self.last_modified = self.get_validators(request)
+            response = get_conditional_response(
+                request, etag=self.etag,
+                last_modified=int(self.last_modified.timestamp()) if self.last_modified else None,
+            )
+            if response is not None:
+                return self.conditional_response(request, response)
+            return super().get(request, *args, **kwargs)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if response.status_code in (200, 304):
+            if getattr(self, 'etag', None):
+                response['ETag'] = self.etag
+            if getattr(self, 'last_modified', None):
+                response['Last-Modified'] = http_date(self.last_modified.timestamp())
+        return response
+
+
+class CachedResponseMixin:
+    """
+    Serve a view's JSON from the versioned response cache (``src.auction.cache``).
+
+    On a hit the stored bytes are returned as they are: no query, no serializer, no renderer.
+    ``cache_name`` is the resource whose version is bumped by ``cache.invalidate_on``. Entries are
+    keyed by the path: the views read no query parameters, and any ``?x=N`` would be a new entry.
+    """
+    cache_name = None
+
+    def get(self, request, *args, **kwargs):
+        if request.accepted_renderer.format != 'json':
+            return super().get(request, *args, **kwargs)
+
+        self.cache_key = response_key(self.cache_name, get_version(self.cache_name), request.path)
+        content = cache.get(self.cache_key)
+        if content is not None:
+            return HttpResponse(content, content_type=request.accepted_media_type)
+        # Stored under the version read above, see src.auction.routers
+        with primary():
+            return super().get(request, *args, **kwargs)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if getattr(self, 'cache_key', None) and isinstance(response, Response) and response.status_code == 200:
+            response.render()
+            cache.set(self.cache_key, response.content, settings.AUCTION_RESPONSE_CACHE_TIMEOUT)
+        return response
+
+
+class ValuesListMixin:
+    """
+    Opt-in fast path for high-volume list endpoints.
+
+    JSON requests fetch the page with ``values(*row_serializer_class.fields)`` and turn the rows
+    into the response with ``row_serializer_class(request)(rows)``, which must produce exactly what
+    ``serializer_class`` produces, and render it with ``FastJSONRenderer``. Other formats (the
+    browsable API) go through ``serializer_class`` as before.
+    """
+    row_serializer_class = None
+    renderer_classes = (FastJSONRenderer, BrowsableAPIRenderer)
+
+    def list(self, request, *args, **kwargs):
+        if self.row_serializer_class is None or request.accepted_renderer.format != 'json':
+            return super().list(request, *args, **kwargs)
+
+        row_serializer = self.row_serializer_class(request)
+        queryset = self.filter_queryset(self.get_queryset()).values(*row_serializer.fields)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(row_serializer(page))
+        return Response(row_serializer(queryset))
@@ -1,6 +1,7 @@
 from django.db.models import *
 from django.utils.timezone import now
 
+from src.auction.images import image_storage
 from src.users.models import User
 
 
@@ -43,7 +44,7 @@ class Faq(Model):
 
 
 class AboutImage(Model):
-    image = ImageField(upload_to='about/', blank=True, null=True)
+    image = ImageField(upload_to='about/', storage=image_storage, blank=True, null=True)
 
     class Meta:
         verbose_name = "About Us Image"
@@ -120,7 +121,7 @@ class Address(Model):
 
 class Category(Model):
     name = CharField(max_length=255)
-    image = ImageField(upload_to='category/', null=True, blank=True)
+    image = ImageField(upload_to='category/', storage=image_storage, null=True, blank=True)
 
     class Meta:
         verbose_name = 'Category'
@@ -161,13 +162,13 @@ class Auction(Model):
     artist_birth_date = DateField(blank=True, null=True)
     artist_death_date = DateField(blank=True, null=True)
     artist_address = TextField(blank=True, null=True)
-    artist_image = ImageField(upload_to='artist_image/', blank=True, null=True)
+    artist_image = ImageField(upload_to='artist_image/', storage=image_storage, blank=True, null=True)
     artist_bio = TextField(blank=True, null=True)
     date_prod = DateField(blank=True, null=True)
-    image1 = ImageField(upload_to='auction_images/', blank=True, null=True)
-    image2 = ImageField(upload_to='auction_images/', blank=True, null=True)
-    image3 = ImageField(upload_to='auction_images/', blank=True, null=True)
-    image4 = ImageField(upload_to='auction_images/', blank=True, null=True)
+    image1 = ImageField(upload_to='auction_images/', storage=image_storage, blank=True, null=True)
+    image2 = ImageField(upload_to='auction_images/', storage=image_storage, blank=True, null=True)
+    image3 = ImageField(upload_to='auction_images/', storage=image_storage, blank=True, null=True)
+    image4 = ImageField(upload_to='auction_images/', storage=image_storage, blank=True, null=True)
     video = CharField(max_length=255, blank=True, null=True)
 
     category_id = ForeignKey('Category', CASCADE, related_name='category')
@@ -179,9 +180,33 @@ class Auction(Model):
     condition = CharField(max_length=255, blank=True, null=True)  # Example: Brand New, Restored
     warranty = CharField(max_length=255, blank=True, null=True)  # Example: 3 Years Limited
     view = IntegerField(default=0)
+    # Set on every change of the auction (bulk updates set it explicitly), except view flushes
+    updated_at = DateTimeField(auto_now=True)
 
-    def update_status(self):
+    class Meta:
+        indexes = [
+            # Keyset pagination of the auction lists, see AuctionCursorPagination.
+            Index(fields=['auction_end_date', 'id'], name='auction_end_idx'),
+            # Category lists and related auctions (category_id + auction_end_date__gt).
+            Index(fields=['category_id', 'auction_end_date', 'id'], name='auction_category_end_idx'),
+            # AuctionFilter: status / auction_period equality with the list ordering, price ranges.
+            Index(fields=['status', 'auction_end_date', 'id'], name='auction_status_end_idx'),
+            Index(fields=['auction_period', 'auction_end_date', 'id'], name='auction_period_end_idx'),
+            Index(fields=['price'], name='auction_price_idx'),
+            # Recomputing the stats of one artist, see src.auction.artists.
+            Index(fields=['artist_name'], name='auction_artist_idx'),
+            # The scheduler's next start / due start lookups. Not a partial index on status='upcoming': SQLite
+            # only uses a partial index for a literal condition, and the status is a query parameter.
+            Index(fields=['status', 'auction_start_date'], name='auction_status_start_idx'),
+            # max(updated_at), the validator of the auction lists, see src.auction.conditional.
+            Index(fields=['updated_at'], name='auction_updated_idx'),
+        ]
 
+    def update_status(self):
+        """
+        Recompute the status of this auction. The scheduler (`manage.py run_scheduler`) does this
+        in bulk for all auctions, this is for one-off use.
+        """
         current_time = now()
         if self.auction_end_date < current_time:
             self.status = self.StatusChoices.COMPLETED
@@ -191,7 +216,7 @@ class Auction(Model):
             self.status = self.StatusChoices.UPCOMING
         else:
             self.status = self.StatusChoices.CANCELLED
-        self.save()
+        self.save(update_fields=['status', 'updated_at'])
 
     def get_remaining_time(self):
         """
@@ -222,5 +247,78 @@ class Bid(Model):
     bid_amount = DecimalField(max_digits=10, decimal_places=2)
     bid_time = DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Bid history is read highest first, with the id as tie breaker for keyset pagination.
+            Index(fields=['auction', '-bid_amount', '-id'], name='bid_history_idx'),
+        ]
+
     def __str__(self):
         return f"{self.user.username} - {self.bid_amount:.2f}"
+
+
+class ProxyBid(Model):
+    auction = ForeignKey(Auction, on_delete=CASCADE, related_name='proxy_bids')
+    user = ForeignKey(User, on_delete=CASCADE, related_name='proxy_bids')
+    max_amount = DecimalField(max_digits=10, decimal_places=2)
+    created_at = DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Proxy Bid'
+        verbose_name_plural = 'Proxy Bids'
+        db_table = 'proxy_bid'
+        unique_together = ('auction', 'user')
+        indexes = [
+            # resolve_proxy_bids reads the top two maximums of an auction.
+            Index(fields=['auction', '-max_amount', 'created_at'], name='proxy_bid_rank_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} - up to {self.max_amount:.2f}"
+
+
+class RelatedAuction(Model):
+    """
+    Precomputed "best related auctions": the top neighbours of an auction by ``src.auction.related``.
+    """
+    auction = ForeignKey(Auction, on_delete=CASCADE, related_name='related_auctions')
+    related = ForeignKey(Auction, on_delete=CASCADE, related_name='related_to')
+    rank = PositiveSmallIntegerField()
+    score = FloatField()
+
+    class Meta:
+        db_table = 'related_auction'
+        unique_together = ('auction', 'rank')
+
+    def __str__(self):
+        return f"{self.auction_id} -> {self.related_id} ({self.score:.2f})"
+
+
+class ArtistStats(Model):
+    """
+    Per artist aggregate of the auctions, kept up to date by ``src.auction.artists``.
+
+    An artist is the combination of the ``artist_*`` fields of ``Auction``, ``key`` is their digest.
+    """
+    key = CharField(max_length=40, unique=True)
+    artist_name = CharField(max_length=255)
+    artist_birth_date = DateField(blank=True, null=True)
+    artist_death_date = DateField(blank=True, null=True)
+    artist_image = ImageField(upload_to='artist_image/', storage=image_storage, blank=True, null=True)
+    auction_count = PositiveIntegerField(default=0)
+    live_count = PositiveIntegerField(default=0)
+    sold_count = PositiveIntegerField(default=0)
+    total_hammer_value = DecimalField(max_digits=14, decimal_places=2, default=0)
+    average_final_bid = DecimalField(max_digits=10, decimal_places=2, blank=True, null=True)
+    updated_at = DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'artist_stats'
+        verbose_name_plural = 'artist stats'
+        indexes = [
+            # Top artists (BestArtistAPIView, TopArtistsAPIView) read the first rows of this index.
+            Index(fields=['-auction_count', 'id'], name='artist_top_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.artist_name} ({self.auction_count})"
@@ -0,0 +1,317 @@
+"""
+In-memory order book for live auctions.
+
+While an auction is ``live`` its high bid, high bidder and the recent bid tail live in Redis
+(the ``default`` entry of ``CACHES``). A bid is validated and accepted by one Lua script, so
+acceptance costs a single Redis round trip instead of several SQL queries.
+
+Accepted bids are appended to a pending list and written to the database in batches by
+``python manage.py flush_bids``. A flush first moves a batch to a processing list and only
+deletes it after the database transaction commits; if the worker dies in between, the next
+flush replays the processing list. Replays are idempotent because bids on one auction are
+strictly increasing, so ``(auction, bid_amount)`` identifies a bid. For the pending list to
+survive a Redis restart, Redis must run with ``appendonly yes``.
+"""
+import json
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils.timezone import now
+from django_redis import get_redis_connection
+
+from src.auction import deadlines, detail
+from src.auction.models import Auction, Bid, ProxyBid
+
+PENDING_KEY = 'orderbook:pending'
+PROCESSING_KEY = 'orderbook:processing'
+FLUSH_LOCK_KEY = 'orderbook:flush-lock'
+
+# Values of the proxied marker: bids stopped going to the order book, then its bids were all flushed
+HANDING_OVER = b'0'
+SETTLED = b'1'
+PROXIED_TTL = 30 * 24 * 3600
+
+SETTLED_IN_DATABASE = -2
+NOT_LOADED = -1
+ENDED = 0
+TOO_LOW = 1
+ACCEPTED = 2
+
+# KEYS: book, tail, pending, proxied marker, deadlines
+# ARGV: amount in cents, user id, now (epoch seconds), tail length, bid entry (json),
+#       soft close window, soft close extension (seconds), auction id
+# Returns {result, new end (epoch seconds) when the bid extended the auction}
+PLACE_SCRIPT = """
+if redis.call('EXISTS', KEYS[4]) == 1 then
+    return {-2, false}
+end
+local book = redis.call('HMGET', KEYS[1], 'high', 'ends_at')
+if not book[1] then
+    return {-1, false}
+end
+local ends_at = tonumber(book[2])
+if tonumber(ARGV[3]) >= ends_at then
+    return {0, false}
+end
+if tonumber(ARGV[1]) <= tonumber(book[1]) then
+    return {1, false}
+end
+local entry = ARGV[5]
+local extended = false
+if ends_at - tonumber(ARGV[3]) < tonumber(ARGV[6]) then
+    ends_at = ends_at + tonumber(ARGV[7])
+    extended = string.format('%.6f', ends_at)
+    redis.call('HSET', KEYS[1], 'ends_at', extended)
+    redis.call('ZADD', KEYS[5], 'GT', extended, ARGV[8])
+    local data = cjson.decode(entry)
+    data['auction_end_date'] = extended
+    entry = cjson.encode(data)
+end
+redis.call('HSET', KEYS[1], 'high', ARGV[1], 'bidder', ARGV[2])
+redis.call('LPUSH', KEYS[2], entry)
+redis.call('LTRIM', KEYS[2], 0, tonumber(ARGV[4]) - 1)
+redis.call('RPUSH', KEYS[3], entry)
+return {2, extended}
+"""
+
+# KEYS: book, tail
+# ARGV: high in cents, bidder id or '', ends_at (epoch seconds), expire at (epoch seconds), tail entries...
+LOAD_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    return 0
+end
+redis.call('HSET', KEYS[1], 'high', ARGV[1], 'bidder', ARGV[2], 'ends_at', ARGV[3])
+redis.call('EXPIREAT', KEYS[1], ARGV[4])
+redis.call('DEL', KEYS[2])
+for i = 5, #ARGV do
+    redis.call('RPUSH', KEYS[2], ARGV[i])
+end
+redis.call('EXPIREAT', KEYS[2], ARGV[4])
+return 1
+"""
+
+# KEYS: pending, processing
+# ARGV: batch size
+CLAIM_SCRIPT = """
+local items = redis.call('LRANGE', KEYS[1], 0, tonumber(ARGV[1]) - 1)
+if #items > 0 then
+    redis.call('LTRIM', KEYS[1], #items, -1)
+    redis.call('RPUSH', KEYS[2], unpack(items))
+end
+return items
+"""
+
+
+def book_key(auction_id):
+    return f'orderbook:{auction_id}'
+
+
+def tail_key(auction_id):
+    return f'orderbook:{auction_id}:tail'
+
+
+def proxied_key(auction_id):
+    return f'orderbook:{auction_id}:proxied'
+
+
+def to_cents(amount: Decimal) -> int:
+    return int(amount * 100)
+
+
+def from_cents(cents) -> Decimal:
+    return Decimal(int(cents)) / 100
+
+
+def from_timestamp(value) -> datetime:
+    return datetime.fromtimestamp(float(value), dt_timezone.utc)
+
+
+def _connection():
+    return get_redis_connection('default')
+
+
+def _entry(auction_id, user_id, bid_amount, bid_time):
+    return json.dumps({
+        'auction': auction_id,
+        'user': user_id,
+        'bid_amount': str(bid_amount),
+        'bid_time': bid_time.isoformat(),
+    })
+
+
+def load(auction_id) -> bool:
+    """
+    Load a live auction into the order book. Returns False when the auction is not live.
+    """
+    auction = Auction.objects.filter(id=auction_id).values(
+        'status', 'price', 'current_bid', 'auction_end_date').first()
+    if not auction or auction['status'] != Auction.StatusChoices.LIVE:
+        return False
+    # A soft close extension may not have been flushed to the database yet.
+    end_date = max(auction['auction_end_date'], deadlines.deadline(auction_id) or auction['auction_end_date'])
+    if end_date <= now():
+        return False
+
+    if ProxyBid.objects.filter(auction_id=auction_id).exists():
+        _mark_proxied(auction_id)
+        return False
+
+    high = auction['current_bid'] if auction['current_bid'] is not None else auction['price']
+    recent = Bid.objects.filter(auction_id=auction_id).order_by('-id')[:settings.AUCTION_ORDER_BOOK_TAIL]
+    tail = [_entry(auction_id, bid.user_id, bid.bid_amount, bid.bid_time) for bid in recent]
+    ends_at = end_date.timestamp()
+    expire_at = int((end_date + timedelta(days=1)).timestamp())
+    bidder = recent[0].user_id if tail else ''
+
+    _connection().eval(LOAD_SCRIPT, 2, book_key(auction_id), tail_key(auction_id),
+                       to_cents(Decimal(high)), bidder, ends_at, expire_at, *tail)
+    return True
+
+
+def place(auction_id, user, bid_amount: Decimal):
+    """
+    Try to accept a bid against the order book.
+
+    Returns ``(ACCEPTED, bid, new_end_date)`` with an unsaved ``Bid`` that will be persisted by the
+    next flush (``new_end_date`` is set when the bid extended the auction, see soft close in
+    ``src.auction.deadlines``), ``(ENDED | TOO_LOW, None, None)`` when it is rejected, or
+    ``(NOT_LOADED | SETTLED_IN_DATABASE, None, None)`` when the auction is not live or has proxy
+    bids and the caller should use the database path.
+    """
+    bid_time = now()
+    keys = (book_key(auction_id), tail_key(auction_id), PENDING_KEY, proxied_key(auction_id),
+            deadlines.DEADLINES_KEY)
+    args = (to_cents(bid_amount), user.id, bid_time.timestamp(), settings.AUCTION_ORDER_BOOK_TAIL,
+            _entry(auction_id, user.id, bid_amount, bid_time),
+            settings.AUCTION_SOFT_CLOSE_WINDOW if settings.AUCTION_SOFT_CLOSE_EXTENSION else 0,
+            settings.AUCTION_SOFT_CLOSE_EXTENSION, auction_id)
+    conn = _connection()
+
+    result, extended = conn.eval(PLACE_SCRIPT, len(keys), *keys, *args)
+    if result == NOT_LOADED and load(auction_id):
+        result, extended = conn.eval(PLACE_SCRIPT, len(keys), *keys, *args)
+    if result != ACCEPTED:
+        return result, None, None
+    bid = Bid(auction_id=auction_id, user=user, bid_amount=bid_amount, bid_time=bid_time)
+    return ACCEPTED, bid, from_timestamp(extended) if extended else None
+
+
+def _mark_proxied(auction_id):
+    # Kept when the auction is already settled
+    _connection().set(proxied_key(auction_id), HANDING_OVER, ex=PROXIED_TTL, nx=True)
+
+
+def settle(auction_id):
+    """
+    Once an auction is handed over, make sure the bids the order book accepted for it are in the
+    database before the database validates a new bid: a ``hand_over`` may still be waiting for the
+    flush lock. Flushes once per hand over.
+    """
+    conn = _connection()
+    if conn.get(proxied_key(auction_id)) != SETTLED:
+        flush()
+        conn.set(proxied_key(auction_id), SETTLED, ex=PROXIED_TTL)
+
+
+def hand_over(auction_id):
+    """
+    Stop accepting bids for an auction in the order book and persist everything pending, so the
+    database is authoritative again (used once the auction gets proxy bids).
+    """
+    _mark_proxied(auction_id)
+    settle(auction_id)
+
+
+def high_bid(auction_id):
+    """
+    Return ``(amount, bidder_id)`` from the order book, or None when the auction is not loaded.
+    """
+    high, bidder = _connection().hmget(book_key(auction_id), 'high', 'bidder')
+    if high is None:
+        return None
+    return from_cents(high), int(bidder) if bidder else None
+
+
+def recent_bids(auction_id):
+    """
+    Return the recent bid tail, newest first.
+    """
+    return [json.loads(item) for item in _connection().lrange(tail_key(auction_id), 0, -1)]
+
+
+def _persist(entries):
+    """
+    Write a batch of accepted bids and advance ``Auction.current_bid``, skipping bids that a
+    previous (crashed) flush already committed.
+    """
+    bids, end_dates = {}, {}
+    for entry in entries:
+        data = json.loads(entry)
+        amount = Decimal(data['bid_amount'])
+        if data.get('auction_end_date'):
+            end_date = from_timestamp(data['auction_end_date'])
+            end_dates[data['auction']] = max(end_date, end_dates.get(data['auction'], end_date))
+        bids[(data['auction'], amount)] = Bid(
+            auction_id=data['auction'],
+            user_id=data['user'],
+            bid_amount=amount,
+            bid_time=datetime.fromisoformat(data['bid_time']).astimezone(dt_timezone.utc),
+        )
+
+    auction_ids = {auction_id for auction_id, _ in bids}
+    with transaction.atomic():
+        for auction_id, end_date in end_dates.items():
+            Auction.objects.filter(id=auction_id, auction_end_date__lt=end_date).update(
+                auction_end_date=end_date, updated_at=now(),
+            )
+
+        existing = Bid.objects.filter(
+            auction_id__in=auction_ids, bid_amount__in={amount for _, amount in bids},
+        ).values_list('auction_id', 'bid_amount')
+        for key in existing:
+            bids.pop((key[0], Decimal(key[1])), None)
+        if not bids:
+            return 0
+
+        # bid_time is auto_now_add, restore the time the bid was accepted after the insert.
+        accepted_at = [bid.bid_time for bid in bids.values()]
+        created = Bid.objects.bulk_create(bids.values())
+        for bid, bid_time in zip(created, accepted_at):
+            bid.bid_time = bid_time
+        Bid.objects.bulk_update(created, ['bid_time'])
+
+        highest = {}
+        for auction_id, amount in bids:
+            highest[auction_id] = max(amount, highest.get(auction_id, amount))
+        for auction_id, amount in highest.items():
+            Auction.objects.filter(
+                Q(current_bid__lt=amount) | Q(current_bid__isnull=True), id=auction_id,
+            ).update(current_bid=amount, updated_at=now())
+        detail.invalidate_live_on_commit(*auction_ids)
+    return len(created)
+
+
+def flush(batch_size=None):
+    """
+    Persist pending bids in batches. Returns the number of Bid rows written.
+    """
+    batch_size = batch_size or settings.AUCTION_ORDER_BOOK_FLUSH_BATCH
+    conn = _connection()
+    written = 0
+    with conn.lock(FLUSH_LOCK_KEY, timeout=300):
+        # Replay whatever a crashed flush left behind before claiming new work.
+        leftover = conn.lrange(PROCESSING_KEY, 0, -1)
+        if leftover:
+            written += _persist(leftover)
+            conn.delete(PROCESSING_KEY)
+
+        while True:
+            entries = conn.eval(CLAIM_SCRIPT, 2, PENDING_KEY, PROCESSING_KEY, batch_size)
+            if not entries:
+                break
+            written += _persist(entries)
+            conn.delete(PROCESSING_KEY)
+    return written
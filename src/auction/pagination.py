@@ -0,0 +1,88 @@
+import base64
+from decimal import Decimal, InvalidOperation
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+from src.auction.models import Bid
+
+
+def encode_cursor(*values):
+    return base64.urlsafe_b64encode('|'.join(str(value) for value in values).encode()).decode()
+
+
+def decode_cursor(cursor, size):
+    try:
+        values = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+    except (ValueError, UnicodeDecodeError):
+        raise ValidationError({"cursor": "Invalid cursor."})
+    if len(values) != size:
+        raise ValidationError({"cursor": "Invalid cursor."})
+    return values
+
+
+def bid_history_page(auction_id, cursor=None, page_size=None):
+    """
+    Return ``(bids, next_cursor)`` for an auction's bids, highest first.
+
+    Keyset pagination on ``(bid_amount, id)``: a page is one range scan of ``bid_history_idx``
+    no matter how deep it is, and the bidder is fetched in the same query.
+    """
+    page_size = page_size or settings.AUCTION_BID_HISTORY_PAGE_SIZE
+    bids = (
+        Bid.objects.filter(auction_id=auction_id)
+        .select_related('user')
+        .only('id', 'bid_amount', 'bid_time', 'user', 'user__full_name', 'user__image')
+        .order_by('-bid_amount', '-id')
+    )
+    if cursor:
+        amount, bid_id = decode_cursor(cursor, 2)
+        try:
+            amount, bid_id = Decimal(amount), int(bid_id)
+        except (InvalidOperation, ValueError):
+            raise ValidationError({"cursor": "Invalid cursor."})
+        if not amount.is_finite():
+            raise ValidationError({"cursor": "Invalid cursor."})
+        bids = bids.filter(Q(bid_amount__lt=amount) | Q(bid_amount=amount, id__lt=bid_id))
+
+    bids = list(bids[:page_size + 1])
+    if len(bids) > page_size:
+        last = bids[page_size - 1]
+        return bids[:page_size], encode_cursor(last.bid_amount, last.id)
+    return bids, None
+
+
+class AuctionCursorPagination(CursorPagination):
+    """
+    Keyset pagination for auction lists, soonest ending first.
+
+    Pages are ``{"next": url, "previous": url, "results": [...]}``; follow ``next`` until it is null.
+    ``?page_size=`` picks the page size up to ``AUCTION_MAX_PAGE_SIZE``. The ordering matches
+    ``auction_end_idx`` (and ``auction_category_end_idx`` per category), so a page is one range
+    scan however deep it is.
+    """
+    ordering = ('auction_end_date', 'id')
+    page_size = settings.AUCTION_PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = settings.AUCTION_MAX_PAGE_SIZE
+
+    async def apaginate_queryset(self, queryset, request):
+        """
+        ``paginate_queryset()`` for async views, run in the ORM's thread (the async ORM calls go
+        through ``sync_to_async`` too).
+        """
+        return await sync_to_async(self.paginate_queryset)(queryset, request)
+
+
+class AuctionSearchPagination(PageNumberPagination):
+    """
+    Page numbers for ranked search results (a keyset on the rank is not stable across index updates).
+
+    Pages are ``{"count": n, "next": url, "previous": url, "results": [...]}``.
+    """
+    page_size = settings.AUCTION_PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = settings.AUCTION_MAX_PAGE_SIZE
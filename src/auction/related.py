@@ -0,0 +1,237 @@
+"""
+Related auctions.
+
+For every auction the top ``AUCTION_RELATED_COUNT`` open auctions that resemble it are computed
+in batch and stored in ``RelatedAuction``, so the detail page reads them with one indexed query.
+
+Similarity is computed with NumPy over whole blocks of auctions at once: equal category, artist,
+medium, body style and colour scheme add their weight, the price bucket (powers of two) adds
+``PRICE_WEIGHT`` when equal and half of it when adjacent, and popularity (``log1p(view)``, scaled
+to 0..1) adds up to ``POPULARITY_WEIGHT``. A candidate must share at least one attribute.
+
+Auctions that are saved or close are put in a dirty set in Redis; ``refresh_dirty()`` (run by
+``manage.py refresh_dirty_related``) recomputes their lists, the lists that show them and the lists
+of open auctions they may now enter. ``manage.py refresh_related`` recomputes everything, closed
+auctions included.
+"""
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max, Min
+from django.utils.timezone import now
+from django_redis import get_redis_connection
+
+from src.auction.cache import bump_version
+from src.auction.models import Auction, RelatedAuction
+
+DIRTY_KEY = 'related:dirty'
+
+FIELD_WEIGHTS = {
+    'category_id': 3.0,
+    'artist_name': 3.0,
+    'medium': 1.5,
+    'body_style': 1.0,
+    'color_scheme': 0.5,
+}
+# Attribute weights are multiples of this, so the sum of the shared ones fits a uint8
+ATTRIBUTE_STEP = 0.5
+PRICE_WEIGHT = 1.0
+POPULARITY_WEIGHT = 0.5
+
+# Query rows scored per block, bounds the memory of the score matrix
+BLOCK_SIZE = 512
+
+COLUMNS = ('id', *FIELD_WEIGHTS, 'price', 'view')
+
+
+def _connection():
+    return get_redis_connection('default')
+
+
+def _open_auctions():
+    return Auction.objects.filter(
+        status__in=[Auction.StatusChoices.UPCOMING, Auction.StatusChoices.LIVE], auction_end_date__gt=now())
+
+
+class Features:
+    """
+    Column arrays of a set of auctions, text attributes as integer codes (-1 for empty).
+    """
+
+    def __init__(self, rows, codes, max_views):
+        columns = list(zip(*rows)) if rows else [()] * len(COLUMNS)
+        data = dict(zip(COLUMNS, columns))
+        self.ids = np.array(data['id'], dtype=np.int64)
+        self.fields = {
+            field: np.array([codes[field].setdefault(_normalize(value), len(codes[field])) if _normalize(value)
+                             else -1 for value in data[field]], dtype=np.int32)
+            for field in FIELD_WEIGHTS
+        }
+        prices = np.maximum(np.array(data['price'], dtype=np.float64), 1)
+        self.price_bucket = np.floor(np.log2(prices)).astype(np.int32)
+        popularity = np.log1p(np.array(data['view'], dtype=np.float64))
+        self.popularity = (popularity / np.log1p(max_views) if max_views else popularity * 0).astype(np.float32)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def block(self, start, stop):
+        part = object.__new__(Features)
+        part.ids = self.ids[start:stop]
+        part.fields = {field: values[start:stop] for field, values in self.fields.items()}
+        part.price_bucket = self.price_bucket[start:stop]
+        part.popularity = self.popularity[start:stop]
+        return part
+
+
+def _normalize(value):
+    return str(value).strip().lower() if value not in (None, '') else ''
+
+
+def load(*querysets):
+    """
+    Features for each queryset, with text codes and the popularity scale shared between them.
+    """
+    codes = {field: {} for field in FIELD_WEIGHTS}
+    max_views = Auction.objects.aggregate(max_views=Max('view'))['max_views'] or 0
+    return [Features(list(queryset.order_by('id').values_list(*COLUMNS)), codes, max_views) for queryset in querysets]
+
+
+def scores(queries, candidates):
+    """
+    ``len(queries) x len(candidates)`` similarity matrix; -inf where nothing is shared or for self.
+    """
+    # Shared attributes are summed as small integers (weights are multiples of ATTRIBUTE_STEP)
+    shared = np.zeros((len(queries), len(candidates)), dtype=np.uint8)
+    for field, weight in FIELD_WEIGHTS.items():
+        # Empty is -1 on the query side and -2 on the candidate side, so it never matches.
+        q, c = queries.fields[field], np.where(candidates.fields[field] < 0, -2, candidates.fields[field])
+        shared += (q[:, None] == c[None, :]).view(np.uint8) * np.uint8(weight / ATTRIBUTE_STEP)
+    score = shared.astype(np.float32)
+    score *= np.float32(ATTRIBUTE_STEP)
+
+    # One row of price terms per distinct price bucket of the block, then gathered per query
+    buckets, inverse = np.unique(queries.price_bucket, return_inverse=True)
+    distance = np.abs(buckets[:, None] - candidates.price_bucket[None, :])
+    price = np.float32(PRICE_WEIGHT) * np.select([distance == 0, distance == 1], [1.0, 0.5], 0.0).astype(np.float32)
+    score += price[inverse.ravel()]
+    score += np.float32(POPULARITY_WEIGHT) * candidates.popularity[None, :]
+
+    score[shared == 0] = -np.inf
+    # Ids are sorted (querysets are ordered by id), so each query finds itself with a binary search
+    position = np.searchsorted(candidates.ids, queries.ids)
+    is_self = position < len(candidates)
+    is_self[is_self] = candidates.ids[position[is_self]] == queries.ids[is_self]
+    score[np.nonzero(is_self)[0], position[is_self]] = -np.inf
+    return score
+
+
+def top_k(score, k):
+    """
+    Column indices and scores of the ``k`` best finite scores of each row, best first.
+    """
+    if score.shape[1] > k:
+        index = np.argpartition(score, -k, axis=1)[:, -k:]
+    else:
+        index = np.broadcast_to(np.arange(score.shape[1]), score.shape)
+    picked = np.take_along_axis(score, index, axis=1)
+    order = np.argsort(-picked, axis=1, kind='stable')
+    return np.take_along_axis(index, order, axis=1), np.take_along_axis(picked, order, axis=1)
+
+
+def compute(queries, candidates, k=None):
+    """
+    Yield ``(auction_id, [(related_id, score), ...])`` for every query auction.
+    """
+    k = k or settings.AUCTION_RELATED_COUNT
+    for start in range(0, len(queries), BLOCK_SIZE):
+        block = queries.block(start, start + BLOCK_SIZE)
+        index, best = top_k(scores(block, candidates), k)
+        for row, auction_id in enumerate(block.ids):
+            yield int(auction_id), [(int(candidates.ids[i]), float(s))
+                                    for i, s in zip(index[row], best[row]) if np.isfinite(s)]
+
+
+def store(results):
+    """
+    Replace the related auctions of the given auctions. Returns the number of auctions written.
+    """
+    results = list(results)
+    auction_ids = [auction_id for auction_id, _ in results]
+    with transaction.atomic():
+        for start in range(0, len(auction_ids), 5000):
+            RelatedAuction.objects.filter(auction_id__in=auction_ids[start:start + 5000]).delete()
+        RelatedAuction.objects.bulk_create([
+            RelatedAuction(auction_id=auction_id, related_id=related_id, rank=rank, score=score)
+            for auction_id, neighbours in results
+            for rank, (related_id, score) in enumerate(neighbours)
+        ], batch_size=5000)
+        # Part of the auction detail validator, see src.auction.conditional
+        transaction.on_commit(lambda: bump_version('related'))
+    return len(results)
+
+
+def refresh(auction_ids=None):
+    """
+    Recompute the related auctions of ``auction_ids`` (all auctions when None).
+    """
+    queries = Auction.objects.all() if auction_ids is None else Auction.objects.filter(id__in=auction_ids)
+    query_features, candidates = load(queries, _open_auctions())
+    return store(compute(query_features, candidates))
+
+
+def mark_dirty(*auction_ids):
+    if auction_ids:
+        _connection().sadd(DIRTY_KEY, *auction_ids)
+
+
+def _affected(changed_ids):
+    """
+    Auctions whose stored list may change because ``changed_ids`` were added, edited or closed:
+    the ones that list them now, and open ones they would now enter. Only open auctions are scanned,
+    so the cost does not grow with the closed ones.
+    """
+    affected = set(RelatedAuction.objects.filter(related_id__in=changed_ids).values_list('auction_id', flat=True))
+
+    changed, open_auctions = load(_open_auctions().filter(id__in=changed_ids), _open_auctions())
+    if not len(changed):
+        return affected
+    best = np.full(len(open_auctions), -np.inf, dtype=np.float32)
+    for start in range(0, len(open_auctions), BLOCK_SIZE):
+        best[start:start + BLOCK_SIZE] = scores(open_auctions.block(start, start + BLOCK_SIZE), changed).max(axis=1)
+    candidates = {int(auction_id): float(score)
+                  for auction_id, score in zip(open_auctions.ids, best) if np.isfinite(score)}
+
+    ids = list(candidates)
+    for start in range(0, len(ids), 5000):
+        stored = dict((row['auction_id'], row) for row in RelatedAuction.objects.filter(
+            auction_id__in=ids[start:start + 5000]).values('auction_id').annotate(kth=Min('score'), n=Count('id')))
+        for auction_id in ids[start:start + 5000]:
+            row = stored.get(auction_id)
+            if row is None or row['n'] < settings.AUCTION_RELATED_COUNT or candidates[auction_id] > row['kth']:
+                affected.add(auction_id)
+    return affected
+
+
+def refresh_dirty():
+    """
+    Recompute the lists touched by the auctions marked dirty since the last run. Returns the number of
+    auctions refreshed.
+    """
+    conn = _connection()
+    changed = [int(auction_id) for auction_id in conn.spop(DIRTY_KEY, 10000) or []]
+    if not changed:
+        return 0
+    try:
+        return refresh(set(changed) | _affected(changed))
+    except Exception:
+        conn.sadd(DIRTY_KEY, *changed)
+        raise
+
+
+def related_auctions(auction_id, columns, limit=5):
+    """
+    The best related auctions that are still running, one indexed query.
+    """
+    return list(Auction.objects.filter(related_to__auction_id=auction_id, auction_end_date__gt=now())
+                .only(*columns).order_by('related_to__rank')[:limit])
@@ -0,0 +1,35 @@
+"""
+JSON renderer backed by ``orjson``.
+
+Produces the same bytes as DRF's ``JSONRenderer`` with this project's settings (compact, UTF-8,
+``\\u2028``/``\\u2029`` escaped): values orjson would format differently (dates, decimals, ...) go
+through DRF's encoder, and anything orjson refuses, as well as indented output, is handed to
+``JSONRenderer`` itself. Without orjson installed it simply is ``JSONRenderer``.
+
+One difference remains: floats that Python writes in exponent form (``1e+16``, ``1e-05``) are written
+``1e16``/``1e-5``. Use it for payloads without such floats, like the auction list rows.
+"""
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+ORJSON_OPTIONS = (orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS | orjson.OPT_NON_STR_KEYS
+                  if orjson else 0)
+
+
+class FastJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (orjson is None or data is None or self.ensure_ascii or not self.compact or not self.strict
+                or self.get_indent(accepted_media_type, renderer_context or {}) is not None):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, default=self.encoder_class().default, option=ORJSON_OPTIONS)
+        except (orjson.JSONEncodeError, ValueError):
+            # Integers over 64 bits, invalid unicode, ...: let the stdlib decide.
+            return super().render(data, accepted_media_type, renderer_context)
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
@@ -0,0 +1,152 @@
+"""
+Read replicas of the database (``settings.AUCTION_DB_REPLICAS``) for the read endpoints.
+
+``ReplicaRouter`` sends the reads of the auction models made while serving a request (``replica_middleware``)
+to one replica, chosen per request. Everything else goes to the primary (``default``):
+
+- the writes (bids, favorites, users...) and the users models,
+- the reads in a transaction, which read to write (a bid locks its auction),
+- the reads that follow a write in the same request,
+- the reads of the bid paths (``bidding.submit_bid``, ``register_proxy_bid``), which check bids against
+  the current high bid,
+- the code running outside requests: management commands, flushers, the scheduler.
+
+Replicas lag behind the primary, so a client that wrote keeps reading the primary for
+``AUCTION_DB_PIN_SECONDS`` (read your writes): an authenticated user through a Redis key, an anonymous client
+through a cookie.
+
+Caches filled under a version (``src.auction.cache``) are built from the primary (``primary()``): a write
+bumps the version on commit, a reader rebuilding the new version from a replica that has not replayed the
+write yet would store the old data under it, and serve it until the entry expires. For the same reason
+the responses validated by an ETag that holds such a version (``ConditionalGetMixin``: the auction lists
+and details) are read from the primary.
+"""
+import contextvars
+import random
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils.decorators import sync_and_async_middleware
+
+REPLICA_APPS = {'auction'}
+PIN_COOKIE = 'db_pin'
+
+_state = contextvars.ContextVar('replica_state', default=None)
+_primary = contextvars.ContextVar('read_primary', default=False)
+
+
+def pin_key(user_id):
+    return f'db-pin:{user_id}'
+
+
+class RequestState:
+    """
+    Routing of one request: its replica and whether it reads the primary.
+    """
+    def __init__(self, request):
+        self.request = request
+        self.replica = random.choice(settings.AUCTION_DB_REPLICAS)
+        self.wrote = False
+        self._pinned_users = {}
+
+    def user_id(self):
+        # DRF sets the user it authenticated on the Django request
+        user = getattr(self.request, 'user', None)
+        return user.pk if user is not None and user.is_authenticated else None
+
+    def pinned(self):
+        if self.wrote or PIN_COOKIE in self.request.COOKIES:
+            return True
+        user_id = self.user_id()
+        if user_id is None:
+            return False
+        if user_id not in self._pinned_users:
+            self._pinned_users[user_id] = cache.get(pin_key(user_id)) is not None
+        return self._pinned_users[user_id]
+
+    def finish(self, response):
+        """
+        Pin the client to the primary when the request wrote.
+        """
+        if self.wrote:
+            user_id = self.user_id()
+            if user_id is None:
+                response.set_cookie(PIN_COOKIE, '1', max_age=settings.AUCTION_DB_PIN_SECONDS, httponly=True)
+            else:
+                cache.set(pin_key(user_id), 1, settings.AUCTION_DB_PIN_SECONDS)
+        return response
+
+
+@contextmanager
+def primary():
+    """
+    Read the primary within the block.
+    """
+    token = _primary.set(True)
+    try:
+        yield
+    finally:
+        _primary.reset(token)
+
+
+@sync_and_async_middleware
+def replica_middleware(get_response):
+    """
+    Let ``ReplicaRouter`` route the queries of the request.
+    """
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            if not settings.AUCTION_DB_REPLICAS:
+                return await get_response(request)
+            state = RequestState(request)
+            token = _state.set(state)
+            try:
+                response = await get_response(request)
+            finally:
+                _state.reset(token)
+            return await sync_to_async(state.finish)(response)
+
+        return markcoroutinefunction(middleware)
+
+    def middleware(request):
+        if not settings.AUCTION_DB_REPLICAS:
+            return get_response(request)
+        state = RequestState(request)
+        token = _state.set(state)
+        try:
+            response = get_response(request)
+        finally:
+            _state.reset(token)
+        return state.finish(response)
+
+    return middleware
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if (state is None or _primary.get() or model._meta.app_label not in REPLICA_APPS
+                or connections[DEFAULT_DB_ALIAS].in_atomic_block or state.pinned()):
+            return DEFAULT_DB_ALIAS
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        databases = {DEFAULT_DB_ALIAS, *settings.AUCTION_DB_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, **hints):
+        if db in settings.AUCTION_DB_REPLICAS:
+            return False
+        return None
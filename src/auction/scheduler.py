@@ -0,0 +1,111 @@
+"""
+Auction status transitions.
+
+Auctions move upcoming -> live at ``auction_start_date`` and to completed at ``auction_end_date``
+(cancelled auctions are left alone). ``python manage.py run_scheduler`` applies the due
+transitions with bulk conditional UPDATEs and sleeps until the next start or end date, so reads
+never have to fix the status up themselves.
+
+End dates move with soft close, so closing is driven by the deadline sorted set of
+``src.auction.deadlines`` rather than by scanning the table: only auctions whose deadline has
+passed are checked, and those that were extended in the meantime get their deadline back.
+
+Every run records how late the transitions were applied (lag behind the start/end date) in the
+cache; ``transition_metrics()`` returns the last run.
+"""
+import logging
+
+from django.core.cache import cache
+from django.db.models import Min
+from django.utils.timezone import now
+
+from src.auction import artists, deadlines, detail, leaderboard, related
+from src.auction.live import publish
+from src.auction.models import Auction
+
+logger = logging.getLogger(__name__)
+
+METRICS_KEY = 'scheduler:metrics'
+
+Status = Auction.StatusChoices
+
+
+def _transition(queryset, date_field, new_status, current_time):
+    """
+    Move every auction in ``queryset`` to ``new_status``; returns ``(ids, lags in seconds)``.
+    """
+    due = list(queryset.values_list('id', date_field))
+    if not due:
+        return [], []
+    ids = [auction_id for auction_id, _ in due]
+    # The UPDATE repeats the conditions, so a concurrent run or an edit in between is respected.
+    queryset.filter(id__in=ids).update(status=new_status, updated_at=now())
+    detail.invalidate_live(*ids)
+    for auction_id in ids:
+        publish(auction_id, 'status', {'auction': auction_id, 'status': new_status})
+    return ids, [(current_time - date).total_seconds() for _, date in due]
+
+
+def closed(*auction_ids):
+    """
+    Closed auctions stop being tracked for their deadline, and leave the leaderboards and the related
+    lists they are in.
+    """
+    deadlines.untrack(*auction_ids)
+    leaderboard.remove(*auction_ids)
+    related.mark_dirty(*auction_ids)
+
+
+def advance_statuses(current_time=None):
+    """
+    Apply all transitions that are due. Returns the ids that went live and that completed.
+    """
+    current_time = current_time or now()
+    started, start_lags = _transition(
+        Auction.objects.filter(status=Status.UPCOMING, auction_start_date__lte=current_time,
+                               auction_end_date__gte=current_time),
+        'auction_start_date', Status.LIVE, current_time,
+    )
+    due = deadlines.due(current_time)
+    completed, end_lags = [], []
+    if due:
+        completed, end_lags = _transition(
+            Auction.objects.filter(id__in=due, status__in=deadlines.OPEN_STATUSES, auction_end_date__lt=current_time),
+            'auction_end_date', Status.COMPLETED, current_time,
+        )
+        closed(*completed)
+        # Extended by a bid (or edited) after the deadline was read, track the new end date.
+        deadlines.resync(sorted(set(due) - set(completed)))
+
+    # Live and sold counts of the artists changed, the UPDATEs bypass the signals.
+    artists.refresh_auctions(started + completed)
+
+    lags = start_lags + end_lags
+    metrics = {
+        'run_at': current_time,
+        'started': len(started),
+        'completed': len(completed),
+        'max_lag_seconds': max(lags, default=0),
+        'avg_lag_seconds': sum(lags) / len(lags) if lags else 0,
+    }
+    cache.set(METRICS_KEY, metrics, None)
+    if lags:
+        logger.info("Auction status transitions: %(started)s live, %(completed)s completed, "
+                    "max lag %(max_lag_seconds).2fs", metrics)
+    return started, completed
+
+
+def next_transition_at(current_time=None):
+    """
+    The earliest start or end date still ahead, or None when nothing is scheduled.
+    """
+    current_time = current_time or now()
+    next_start = Auction.objects.filter(
+        status=Status.UPCOMING, auction_start_date__gt=current_time,
+    ).aggregate(at=Min('auction_start_date'))['at']
+    next_end = deadlines.next_deadline()
+    return min((at for at in (next_start, next_end) if at), default=None)
+
+
+def transition_metrics():
+    return cache.get(METRICS_KEY)
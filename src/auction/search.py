@@ -0,0 +1,249 @@
+"""
+Full text search over auctions.
+
+The searchable text of an auction (name, piece title, artist, medium, description and category
+name) is kept in a side table, ``auction_search``:
+
+* SQLite: an FTS5 virtual table (rowid = auction id), ranked with ``bm25``,
+* PostgreSQL: a weighted ``tsvector`` per auction with a GIN index, ranked with ``ts_rank``,
+* other databases fall back to ``icontains`` without ranking.
+
+The table is created after ``migrate`` and kept up to date from ``post_save``/``post_delete``
+(``src.auction.signals``) in the same transaction as the change. Bulk inserts and updates
+bypass the signals, ``python manage.py rebuild_search_index`` recreates it from scratch.
+"""
+import re
+
+from django.db import connection, transaction
+from django.db.models import Q
+
+from src.auction.models import Auction
+
+SEARCH_TABLE = 'auction_search'
+
+# (column, Auction lookup, FTS5 bm25 weight, PostgreSQL weight class)
+COLUMNS = (
+    ('name', 'name', 10.0, 'A'),
+    ('piece_title', 'piece_title', 5.0, 'B'),
+    ('artist_name', 'artist_name', 5.0, 'B'),
+    ('medium', 'medium', 2.0, 'C'),
+    ('category', 'category_id__name', 2.0, 'C'),
+    ('description', 'description', 1.0, 'D'),
+)
+
+# Auction fields the documents are built from, saves that touch none of them are not reindexed
+INDEXED_FIELDS = frozenset(lookup.split('__')[0] for _, lookup, _, _ in COLUMNS)
+
+
+def terms(text):
+    """
+    The words of a search query; anything else (quotes, operators) is dropped.
+    """
+    return re.findall(r'\w+', text.lower())
+
+
+class SqliteBackend:
+    def create_schema(self, cursor):
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5("
+            f"{', '.join(column for column, *_ in COLUMNS)}, tokenize='unicode61 remove_diacritics 2')"
+        )
+
+    def index(self, cursor, rows):
+        self.remove(cursor, [row[0] for row in rows])
+        cursor.executemany(
+            f"INSERT INTO {SEARCH_TABLE} (rowid, {', '.join(column for column, *_ in COLUMNS)}) "
+            f"VALUES (%s{', %s' * len(COLUMNS)})",
+            [(row[0], *(value or '' for value in row[1:])) for row in rows],
+        )
+
+    def remove(self, cursor, auction_ids):
+        if auction_ids:
+            cursor.execute(f"DELETE FROM {SEARCH_TABLE} WHERE rowid IN ({', '.join(['%s'] * len(auction_ids))})",
+                           auction_ids)
+
+    def clear(self, cursor):
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE}")
+
+    def _match(self, words):
+        # Every word must match, the last one as a prefix so results show up while typing.
+        return ' '.join(f'"{word}"' for word in words[:-1]) + f' "{words[-1]}"*'
+
+    def count(self, cursor, words):
+        cursor.execute(f"SELECT count(*) FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s", [self._match(words)])
+        return cursor.fetchone()[0]
+
+    def ids(self, cursor, words, offset, limit):
+        weights = ', '.join(str(weight) for _, _, weight, _ in COLUMNS)
+        cursor.execute(
+            f"SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s "
+            f"ORDER BY bm25({SEARCH_TABLE}, {weights}), rowid LIMIT %s OFFSET %s",
+            [self._match(words), limit, offset],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+class PostgresBackend:
+    def create_schema(self, cursor):
+        cursor.execute(f"CREATE TABLE IF NOT EXISTS {SEARCH_TABLE} ("
+                       f"auction_id bigint PRIMARY KEY, document tsvector NOT NULL)")
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {SEARCH_TABLE}_document_idx ON {SEARCH_TABLE} "
+                       f"USING GIN (document)")
+
+    def index(self, cursor, rows):
+        document = ' || '.join(
+            f"setweight(to_tsvector('simple', coalesce(%s, '')), '{weight}')" for _, _, _, weight in COLUMNS)
+        cursor.executemany(
+            f"INSERT INTO {SEARCH_TABLE} (auction_id, document) VALUES (%s, {document}) "
+            f"ON CONFLICT (auction_id) DO UPDATE SET document = EXCLUDED.document",
+            rows,
+        )
+
+    def remove(self, cursor, auction_ids):
+        if auction_ids:
+            cursor.execute(f"DELETE FROM {SEARCH_TABLE} WHERE auction_id = ANY(%s)", [list(auction_ids)])
+
+    def clear(self, cursor):
+        cursor.execute(f"TRUNCATE {SEARCH_TABLE}")
+
+    def _query(self, words):
+        return ' & '.join(words[:-1] + [f'{words[-1]}:*'])
+
+    def count(self, cursor, words):
+        cursor.execute(f"SELECT count(*) FROM {SEARCH_TABLE} WHERE document @@ to_tsquery('simple', %s)",
+                       [self._query(words)])
+        return cursor.fetchone()[0]
+
+    def ids(self, cursor, words, offset, limit):
+        cursor.execute(
+            f"SELECT auction_id FROM {SEARCH_TABLE}, to_tsquery('simple', %s) query WHERE document @@ query "
+            f"ORDER BY ts_rank(document, query) DESC, auction_id LIMIT %s OFFSET %s",
+            [self._query(words), limit, offset],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+class FallbackBackend:
+    """
+    No index: ``icontains`` on every column, newest first.
+    """
+
+    def create_schema(self, cursor):
+        pass
+
+    def index(self, cursor, rows):
+        pass
+
+    def remove(self, cursor, auction_ids):
+        pass
+
+    def clear(self, cursor):
+        pass
+
+    def _queryset(self, words):
+        queryset = Auction.objects.all()
+        for word in words:
+            match = Q()
+            for _, lookup, _, _ in COLUMNS:
+                match |= Q(**{f'{lookup}__icontains': word})
+            queryset = queryset.filter(match)
+        return queryset
+
+    def count(self, cursor, words):
+        return self._queryset(words).count()
+
+    def ids(self, cursor, words, offset, limit):
+        return list(self._queryset(words).order_by('-id').values_list('id', flat=True)[offset:offset + limit])
+
+
+def backend():
+    return {'sqlite': SqliteBackend, 'postgresql': PostgresBackend}.get(connection.vendor, FallbackBackend)()
+
+
+def create_schema(**kwargs):
+    """
+    ``post_migrate`` handler: create the search table when it does not exist yet.
+    """
+    with connection.cursor() as cursor:
+        backend().create_schema(cursor)
+
+
+def _rows(queryset):
+    return list(queryset.values_list('id', *(lookup for _, lookup, _, _ in COLUMNS)))
+
+
+def index_auctions(auction_ids):
+    """
+    (Re)index the given auctions.
+    """
+    rows = _rows(Auction.objects.filter(id__in=auction_ids))
+    if rows:
+        with connection.cursor() as cursor:
+            backend().index(cursor, rows)
+
+
+def remove_auctions(auction_ids):
+    with connection.cursor() as cursor:
+        backend().remove(cursor, list(auction_ids))
+
+
+def rebuild(batch_size=2000):
+    """
+    Recreate the whole index. Returns the number of auctions indexed.
+    """
+    search_backend, count = backend(), 0
+    auction_ids = list(Auction.objects.order_by('id').values_list('id', flat=True))
+    with transaction.atomic(), connection.cursor() as cursor:
+        search_backend.create_schema(cursor)
+        search_backend.clear(cursor)
+        for start in range(0, len(auction_ids), batch_size):
+            batch = auction_ids[start:start + batch_size]
+            rows = _rows(Auction.objects.filter(id__in=batch))
+            search_backend.index(cursor, rows)
+            count += len(rows)
+    return count
+
+
+class SearchResults:
+    """
+    Ranked search results that fetch only what is sliced, so they can be handed to a paginator.
+
+    ``count()`` runs one COUNT on the index; a slice runs one ranked id query plus one query for
+    the ``only`` columns of those auctions.
+    """
+
+    def __init__(self, text, only=()):
+        self.words = terms(text)
+        self.only = only
+        self._count = None
+
+    def count(self):
+        if self._count is None:
+            if not self.words:
+                self._count = 0
+            else:
+                with connection.cursor() as cursor:
+                    self._count = backend().count(cursor, self.words)
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, item):
+        if not isinstance(item, slice):
+            return self[item:item + 1][0]
+        start = item.start or 0
+        stop = item.stop if item.stop is not None else self.count()
+        if not self.words or stop <= start:
+            return []
+        with connection.cursor() as cursor:
+            auction_ids = backend().ids(cursor, self.words, start, stop - start)
+        queryset = Auction.objects.all()
+        if self.only:
+            queryset = queryset.only(*self.only)
+        auctions = queryset.in_bulk(auction_ids)
+        return [auctions[auction_id] for auction_id in auction_ids if auction_id in auctions]
+
+
+def search_auctions(text, only=()):
+    return SearchResults(text, only)
@@ -1,12 +1,38 @@
 from datetime import timedelta
+
 from django.utils.timesince import timesince
+from rest_framework.fields import DecimalField as DecimalSerializerField, ImageField as ImageSerializerField, \
+    ReadOnlyField
 from rest_framework.serializers import ModelSerializer, SerializerMethodField, HiddenField, CurrentUserDefault, \
     ValidationError, Serializer
 
+from src.auction import media
 from src.auction.models import *
+from src.auction.pagination import bid_history_page
 from django.utils.timezone import now, localtime
 
 
+class ImageURLField(ReadOnlyField):
+    """
+    URL (``src.auction.media``) of an image, or of its ``size`` derivative (``src.auction.images``)
+    when it has one: lists ask for ``thumb``, the detail view for the full image.
+    """
+    def __init__(self, size=None, **kwargs):
+        self.size = size
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        return media.url(value.name, self.size) if value else None
+
+
+class MediaImageField(ImageSerializerField):
+    """
+    DRF's ImageField (uploads) represented by its ``src.auction.media`` URL.
+    """
+    def to_representation(self, value):
+        return media.url(value.name) if value else None
+
+
 class ContactSerializer(ModelSerializer):
     class Meta:
         model = Contact
@@ -70,6 +96,8 @@ class FaqModelSerializer(ModelSerializer):
 
 
 class AboutImageModelSerializer(ModelSerializer):
+    image = ImageURLField(size='medium')
+
     class Meta:
         model = AboutImage
         fields = ('id', 'image')
@@ -84,49 +112,73 @@ class AboutModelSerializer(ModelSerializer):
 
 
 class CategoryModelSerializer(ModelSerializer):
+    image = ImageURLField(size='thumb')
+
     class Meta:
         model = Category
         fields = ('id', 'name', 'image')
 
 
+def bid_history_entry(bid):
+    """
+    What ``bid_history_item`` shows of a bid, before the time is made relative (cacheable).
+    """
+    return {
+        "id": bid.id,
+        "user": bid.user.full_name,
+        "user_image": media.url(bid.user.image.name, 'thumb'),
+        "bid_time": bid.bid_time,
+        "bid_amount": bid.bid_amount,
+    }
+
+
+def render_bid_history_entry(entry, current_time):
+    return {
+        "id": entry["id"],
+        "user": entry["user"],
+        "user_image": entry["user_image"],
+        "bid_time": f"Bid {timesince(entry['bid_time'], now=current_time)} ago for {entry['bid_amount']} $"
+    }
+
+
+def bid_history_item(bid, current_time):
+    return render_bid_history_entry(bid_history_entry(bid), current_time)
+
+
 class AuctionDetailSerializer(ModelSerializer):
     images = SerializerMethodField()
     bid_history = SerializerMethodField()
+    bid_history_next = SerializerMethodField()
 
     class Meta:
         model = Auction
         fields = (
-            'id', 'name', 'location', 'current_bid', 'description', 'status', 'images', 'video', 'view', 'bid_history')
+            'id', 'name', 'location', 'current_bid', 'description', 'status', 'images', 'video', 'view', 'bid_history',
+            'bid_history_next')
 
     def get_images(self, obj):
-        base_url = "http://aristoback.ikramovna.me"
-        images = []
-        if obj.image1:
-            images.append(f"{base_url}{obj.image1.url}")
-        if obj.image2:
-            images.append(f"{base_url}{obj.image2.url}")
-        if obj.image3:
-            images.append(f"{base_url}{obj.image3.url}")
-        if obj.image4:
-            images.append(f"{base_url}{obj.image4.url}")
-        return images
+        return [media.url(image.name) for image in (obj.image1, obj.image2, obj.image3, obj.image4) if image]
+
+    def _bid_history_page(self, obj):
+        # The first page is shared by bid_history and bid_history_next.
+        if getattr(self, '_bid_page', (None,))[0] != obj.id:
+            self._bid_page = (obj.id, bid_history_page(obj.id))
+        return self._bid_page[1]
 
     def get_bid_history(self, obj):
-        base_url = "https://aristoback.ikramovna.me"
-        bids = obj.bids.all().order_by('-bid_amount')
-        return [
-            {
-                "id": bid.id,
-                "user": bid.user.full_name,
-                "user_image": f"{base_url}{bid.user.image.url}" if bid.user.image else None,
-                "bid_time": f"Bid {timesince(bid.bid_time)} ago for {bid.bid_amount} $"
-            } for bid in bids
-        ]
+        bids, _ = self._bid_history_page(obj)
+        current_time = now()
+        return [bid_history_item(bid, current_time) for bid in bids]
+
+    def get_bid_history_next(self, obj):
+        _, cursor = self._bid_history_page(obj)
+        return cursor
 
 class AuctionListSerializer(ModelSerializer):
+    image1 = ImageURLField(size='thumb')
     remaining_time = SerializerMethodField()
     owner_full_name = SerializerMethodField()
-    owner_image = SerializerMethodField()
+    owner_image = ImageURLField(size='thumb', source='artist_image')
 
     class Meta:
         model = Auction
@@ -142,12 +194,57 @@ class AuctionListSerializer(ModelSerializer):
     def get_owner_full_name(self, obj):
         return obj.artist_name
 
-    def get_owner_image(self, obj):
-        base_url = "https://aristoback.ikramovna.me"
-        return f"{base_url}{obj.artist_image.url}" if obj.artist_image else None
+
+# Columns read by AuctionListSerializer (plus the pagination ordering)
+AUCTION_LIST_COLUMNS = ('id', 'image1', 'name', 'price', 'auction_end_date', 'artist_name', 'artist_image',
+                        'current_bid')
+
+
+class AuctionListRows:
+    """
+    Fast path of ``AuctionListSerializer`` for ``values()`` rows of ``AUCTION_LIST_COLUMNS``.
+
+    Builds the same dicts without model instances or per-field serializer calls: image URLs are
+    plain string operations (``src.auction.media``) and ``remaining_time`` uses a single ``now()``.
+    """
+    fields = AUCTION_LIST_COLUMNS
+    current_bid_field = DecimalSerializerField(max_digits=10, decimal_places=2)
+
+    def __init__(self, request):
+        self.request = request
+        self.current_time = now()
+
+    def remaining_time(self, end_date):
+        remaining = end_date - self.current_time
+        if remaining.total_seconds() <= 0:
+            remaining = timedelta()
+        end_time = self.current_time + timedelta(days=remaining.days, seconds=remaining.seconds)
+        # Same as strftime('%Y-%m-%dT%H:%M:%S') for years from 1000, in half the time
+        return end_time.isoformat()[:19]
+
+    def decimal(self, value):
+        # Values read from the database already have the field's 2 decimal places
+        if value.as_tuple().exponent == -2:
+            return f'{value:f}'
+        return self.current_bid_field.to_representation(value)
+
+    def __call__(self, rows):
+        return [{
+            'id': row['id'],
+            'image1': media.url(row['image1'], 'thumb'),
+            'name': row['name'],
+            'price': row['price'],
+            'remaining_time': self.remaining_time(row['auction_end_date']),
+            'owner_full_name': row['artist_name'],
+            'owner_image': media.url(row['artist_image'], 'thumb'),
+            'current_bid': None if row['current_bid'] is None else self.decimal(row['current_bid']),
+        } for row in rows]
 
 
 class AuctionTopSerilizer(ModelSerializer):
+    image1 = ImageURLField(size='thumb')
+    image2 = ImageURLField(size='thumb')
+
     class Meta:
         model = Auction
         fields = ['id', 'image1', 'image2', 'name', 'price', 'status', 'view']
@@ -155,7 +252,7 @@ class AuctionTopSerilizer(ModelSerializer):
 
 class RelatedAuctionSerializer(ModelSerializer):
     auction_end_date = SerializerMethodField()
-    image1 = SerializerMethodField()
+    image1 = ImageURLField(size='thumb')
 
     class Meta:
         model = Auction
@@ -164,10 +261,8 @@ class RelatedAuctionSerializer(ModelSerializer):
     def get_auction_end_date(self, obj):
         return localtime(obj.auction_end_date).strftime('%Y-%m-%dT%H:%M:%S')
 
-    def get_image1(self, obj):
-        if obj.image1:
-            return f"https://aristoback.ikramovna.me{obj.image1.url}"
-        return None
+
+RELATED_AUCTION_COLUMNS = ('id', 'image1', 'name', 'lot_ref_num', 'price', 'auction_end_date', 'current_bid')
 
 
 class BestArtistSerializer(Serializer):
@@ -178,6 +273,15 @@ class BestArtistSerializer(Serializer):
     auction_count = IntegerField()
 
 
+class ArtistStatsSerializer(ModelSerializer):
+    artist_image = ImageURLField(size='thumb')
+
+    class Meta:
+        model = ArtistStats
+        fields = ('artist_name', 'artist_birth_date', 'artist_death_date', 'artist_image', 'auction_count',
+                  'live_count', 'sold_count', 'total_hammer_value', 'average_final_bid')
+
+
 # Bid
 
 class AuctionSerializer(ModelSerializer):
@@ -192,3 +296,11 @@ class BidSerializer(ModelSerializer):
     class Meta:
         model = Bid
         fields = ['id', 'auction', 'user', 'bid_amount', 'bid_time']
+
+
+class ProxyBidSerializer(ModelSerializer):
+    user = HiddenField(default=CurrentUserDefault())
+
+    class Meta:
+        model = ProxyBid
+        fields = ['id', 'auction', 'user', 'max_amount', 'created_at']
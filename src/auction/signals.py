@@ -0,0 +1,95 @@
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from django.utils.timezone import now
+
+from src.auction import artists, deadlines, detail, leaderboard, related, search
+from src.auction.cache import invalidate_on
+from src.auction.models import Auction, Category, Faq, About, AboutImage
+
+# Versioned response cache of the homepage resources (CachedResponseMixin views)
+invalidate_on('faq', Faq)
+invalidate_on('about', About, AboutImage, About.image.through)
+invalidate_on('category', Category)
+# Part of the auction list validator, see src.auction.conditional
+invalidate_on('auction', Auction)
+
+
+@receiver(post_save, sender=Auction)
+def track_deadline(sender, instance, **kwargs):
+    auction_id, end_date = instance.id, instance.auction_end_date
+    if instance.status in deadlines.OPEN_STATUSES:
+        transaction.on_commit(lambda: deadlines.track(auction_id, end_date))
+    else:
+        transaction.on_commit(lambda: deadlines.untrack(auction_id))
+
+
+@receiver(post_delete, sender=Auction)
+def untrack_deadline(sender, instance, **kwargs):
+    auction_id = instance.id
+    transaction.on_commit(lambda: deadlines.untrack(auction_id))
+
+
+@receiver(post_save, sender=Auction)
+def update_leaderboard(sender, instance, **kwargs):
+    # Ended auctions that are still listed (rolled back saves, missed closes) are dropped on read.
+    if instance.status in leaderboard.OPEN_STATUSES and instance.auction_end_date > now():
+        leaderboard.track(instance.id, instance.view)
+    else:
+        leaderboard.remove(instance.id)
+
+
+@receiver(post_delete, sender=Auction)
+def remove_from_leaderboard(sender, instance, **kwargs):
+    leaderboard.remove(instance.id)
+
+
+@receiver(post_save, sender=Auction)
+def mark_related_dirty(sender, instance, **kwargs):
+    # New or edited auctions get (and enter) related lists on the next `manage.py refresh_dirty_related` pass.
+    auction_id = instance.id
+    transaction.on_commit(lambda: related.mark_dirty(auction_id))
+
+
+@receiver(post_save, sender=Auction)
+def index_auction(sender, instance, update_fields=None, **kwargs):
+    # Status transitions, view flushes and image renames leave the document as it is.
+    if update_fields is None or update_fields & search.INDEXED_FIELDS:
+        search.index_auctions([instance.id])
+
+
+@receiver(post_delete, sender=Auction)
+def remove_auction_from_index(sender, instance, **kwargs):
+    search.remove_auctions([instance.id])
+
+
+@receiver(post_save, sender=Category)
+def reindex_category(sender, instance, created, **kwargs):
+    # The category name is part of every auction's document.
+    if not created:
+        search.index_auctions(Auction.objects.filter(category_id=instance).values_list('id', flat=True))
+
+
+@receiver(pre_save, sender=Auction)
+def remember_artist(sender, instance, update_fields=None, **kwargs):
+    # An edit may move the auction to another artist, whose stats must be recomputed as well.
+    instance._previous_artist = None
+    if not instance._state.adding and (update_fields is None or set(update_fields) & set(artists.ARTIST_FIELDS)):
+        instance._previous_artist = Auction.objects.filter(id=instance.id).values_list(*artists.ARTIST_FIELDS).first()
+
+
+@receiver(post_save, sender=Auction)
+def refresh_artist_stats(sender, instance, **kwargs):
+    artists.refresh([getattr(instance, '_previous_artist', None), artists.artist_of(instance)])
+
+
+@receiver(post_delete, sender=Auction)
+def refresh_artist_stats_on_delete(sender, instance, **kwargs):
+    artists.refresh([artists.artist_of(instance)])
+
+
+@receiver(post_save, sender=Auction)
+@receiver(post_delete, sender=Auction)
+def invalidate_detail(sender, instance, **kwargs):
+    auction_id = instance.id
+    transaction.on_commit(lambda: detail.invalidate(auction_id))
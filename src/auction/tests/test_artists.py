@@ -0,0 +1,100 @@
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+from django.contrib import admin
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils.timezone import now
+from rest_framework.test import APIClient
+
+from src.auction import artists, deadlines
+from src.auction.models import Auction, ArtistStats
+from src.auction.scheduler import advance_statuses
+
+
+def stats(artist_name):
+    return ArtistStats.objects.get(artist_name=artist_name)
+
+
+@pytest.mark.django_db
+def test_stats_follow_creates_edits_and_deletes(make_auction):
+    first = make_auction(artist_name="Monet")
+    make_auction(artist_name="Monet", status=Auction.StatusChoices.COMPLETED, current_bid=Decimal("300.00"))
+    make_auction(artist_name="Monet", status=Auction.StatusChoices.COMPLETED, current_bid=Decimal("101.00"))
+    make_auction(artist_name="Monet", status=Auction.StatusChoices.COMPLETED)  # no bids, not sold
+
+    monet = stats("Monet")
+    assert (monet.auction_count, monet.live_count, monet.sold_count) == (4, 1, 2)
+    assert monet.total_hammer_value == Decimal("401.00")
+    assert monet.average_final_bid == Decimal("200.50")
+
+    # Moving an auction to another artist updates both
+    first.artist_name = "Turner"
+    first.save()
+    assert (stats("Monet").auction_count, stats("Monet").live_count) == (3, 0)
+    assert (stats("Turner").auction_count, stats("Turner").live_count) == (1, 1)
+
+    first.delete()
+    assert not ArtistStats.objects.filter(artist_name="Turner").exists()
+
+    # Auctions without an artist are not counted
+    make_auction(artist_name=None)
+    assert ArtistStats.objects.count() == 1
+
+
+@pytest.mark.django_db
+def test_scheduler_transitions_update_the_stats(make_auction):
+    auction = make_auction(artist_name="Monet", ends_in=timedelta(minutes=1))
+    Auction.objects.filter(id=auction.id).update(current_bid=Decimal("250.00"))
+
+    advance_statuses(now() + timedelta(minutes=2))
+
+    monet = stats("Monet")
+    assert (monet.live_count, monet.sold_count, monet.total_hammer_value) == (0, 1, Decimal("250.00"))
+
+
+@pytest.mark.django_db
+def test_admin_actions_update_the_stats(make_auction):
+    sold, other = make_auction(artist_name="Monet", current_bid=Decimal("250.00")), make_auction(artist_name="Monet")
+    auction_admin = admin.site._registry[Auction]
+
+    auction_admin.mark_as_completed(None, Auction.objects.filter(id=sold.id))
+    monet = stats("Monet")
+    assert (monet.live_count, monet.sold_count, monet.total_hammer_value) == (1, 1, Decimal("250.00"))
+    assert deadlines.deadline(sold.id) is None
+
+    auction_admin.mark_as_pending(None, Auction.objects.filter(id=other.id))
+    assert stats("Monet").live_count == 0
+
+
+@pytest.mark.django_db
+def test_backfill_matches_incremental_stats(make_auction):
+    for artist_name, count in (("Monet", 3), ("Turner", 5), ("Rodin", 1)):
+        for _ in range(count):
+            make_auction(artist_name=artist_name, status=Auction.StatusChoices.COMPLETED, current_bid=Decimal("10.00"))
+    make_auction(artist_name="Monet", artist_image="artist_image/monet.jpg")
+    incremental = {row.key: (row.auction_count, row.live_count, row.sold_count, row.total_hammer_value,
+                             row.average_final_bid) for row in ArtistStats.objects.all()}
+
+    ArtistStats.objects.all().delete()
+    call_command('rebuild_artist_stats')
+
+    assert {row.key: (row.auction_count, row.live_count, row.sold_count, row.total_hammer_value,
+                      row.average_final_bid) for row in ArtistStats.objects.all()} == incremental
+    # The image is part of the artist, like in the GROUP BY this replaces
+    assert [(row.artist_name, row.auction_count) for row in artists.top_artists(2)] == [("Turner", 5), ("Monet", 3)]
+
+
+@pytest.mark.django_db
+def test_top_artists_endpoint(make_auction):
+    for artist_name, count in (("Monet", 2), ("Turner", 3), ("Rodin", 1)):
+        for _ in range(count):
+            make_auction(artist_name=artist_name)
+
+    response = APIClient().get(reverse('top-artists'), {'limit': 2})
+    assert [(item['artist_name'], item['auction_count']) for item in response.data] == [("Turner", 3), ("Monet", 2)]
+    assert response.data[0]['live_count'] == 3
+
+    assert APIClient().get(reverse('best-artist')).data['artist_name'] == "Turner"
+    assert APIClient().get(reverse('top-artists'), {'limit': 'x'}).status_code == 400
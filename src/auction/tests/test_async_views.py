@@ -0,0 +1,158 @@
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+from django.urls import reverse
+from django.utils.timezone import now
+from rest_framework.test import APIClient
+
+from src.auction import async_views, detail, models, serializers
+from src.auction.bidding import place_bid
+from src.auction.counters import record_view
+from src.auction.models import Category, Auction, Faq
+
+
+@pytest.fixture
+def auctions(create_user, create_auction, django_capture_on_commit_callbacks, monkeypatch):
+    current_time = now()
+    for module in (models, serializers, detail):
+        monkeypatch.setattr(module, 'now', lambda: current_time)
+    owner, category = create_user(), Category.objects.create(name="Art", image="category/a.png")
+    Faq.objects.create(question="Why?", answer="Because")
+    created = []
+    with django_capture_on_commit_callbacks(execute=True):
+        for i in range(7):
+            created.append(create_auction(
+                name=f"Auction {i}", location="Tashkent", piece_title="Untitled", price=100 + i,
+                auction_start_date=current_time - timedelta(hours=1),
+                auction_end_date=current_time + timedelta(days=1, seconds=i), status=Auction.StatusChoices.LIVE,
+                category_id=category, owner=owner, view=40 - i, image1=f"auction_images/{i} ü.jpg",
+                artist_name=f"Artist {i % 2}", artist_image="artist_image/a.png",
+            ))
+        place_bid(created[3].id, create_user(), Decimal("150.00"))
+    record_view(created[5].id)
+    return created
+
+
+@pytest.fixture
+def get(settings):
+    """
+    ``get(url, urlconf, **params)`` with the sync views (``root.urls``) or the async ones.
+    """
+    def _get(url, urlconf, headers=None, **params):
+        settings.ROOT_URLCONF = urlconf
+        response = APIClient().get(url, params, headers=headers)
+        is_async = getattr(response.resolver_match.func, '__module__', None) == async_views.__name__
+        assert is_async == (urlconf == 'root.async_urls')
+        return response
+    return _get
+
+
+def both(get, url, **params):
+    sync, async_ = get(url, 'root.urls', **params), get(url, 'root.async_urls', **params)
+    assert async_.status_code == sync.status_code
+    assert async_['Content-Type'] == sync['Content-Type']
+    assert async_.get('ETag') == sync.get('ETag')
+    return sync, async_
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('name', ['list', 'category'])
+def test_auction_lists(auctions, get, name):
+    url = reverse('list') if name == 'list' else f"/api/v1/auction/category/{auctions[0].category_id_id}"
+    next_url, pages = url, 0
+    while next_url:
+        sync, async_ = both(get, next_url, **({'page_size': 3} if next_url == url else {}))
+        assert async_.content == sync.content
+        next_url, pages = sync.json()['next'], pages + 1
+    assert pages == 3
+
+    # Previous pages, reversed cursors
+    previous = sync.json()['previous']
+    sync, async_ = both(get, previous)
+    assert async_.content == sync.content and sync.json()['previous']
+
+    etag = get(url, 'root.async_urls')['ETag']
+    assert get(url, 'root.async_urls', headers={'If-None-Match': etag}).status_code == 304
+    assert get(url, 'root.async_urls', cursor='x').json() == {'detail': 'Invalid cursor'}
+
+
+@pytest.mark.django_db
+def test_cursors_across_tied_positions(auctions, get, create_auction):
+    # The cursor position is the end date alone, the rows sharing one are counted with an offset
+    for i in range(4):
+        create_auction(name=f"Tied {i}", auction_end_date=auctions[2].auction_end_date,
+                       category_id=auctions[2].category_id, owner=auctions[2].owner)
+    url, seen = reverse('list'), []
+    next_url = f"{url}?page_size=2"
+    while next_url:
+        sync, async_ = both(get, next_url)
+        assert async_.content == sync.content
+        seen += [item['id'] for item in sync.json()['results']]
+        next_url, previous = sync.json()['next'], sync.json()['previous']
+    assert len(seen) == len(set(seen)) == 11
+
+    while previous:
+        sync, async_ = both(get, previous)
+        assert async_.content == sync.content
+        previous = sync.json()['previous']
+
+
+@pytest.mark.django_db
+def test_missing_category(auctions, get):
+    sync, async_ = both(get, "/api/v1/auction/category/999999")
+    assert sync.status_code == 404 and async_.json() == sync.json()
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('name', ['faq', 'category', 'top', 'best-artist'])
+def test_same_responses(auctions, get, name):
+    sync, async_ = both(get, reverse(name))
+    assert sync.status_code == 200
+    assert async_.content == sync.content
+    if name == 'top':
+        # The bid (+10) first, the pending view ties 5 with 4
+        assert [item['id'] for item in async_.json()] == [auctions[i].id for i in (3, 0, 1, 2, 5, 4, 6)]
+    # Served from the shared response cache the second time
+    assert get(reverse(name), 'root.async_urls').content == sync.content
+
+
+@pytest.mark.django_db
+def test_top_parameters(auctions, get):
+    sync, async_ = both(get, reverse('top'), order='x')
+    assert sync.status_code == 400 and async_.json() == sync.json()
+    sync, async_ = both(get, reverse('top'), status='completed', limit=2)
+    assert async_.json() == sync.json() == []
+    sync, async_ = both(get, reverse('top'), order='trending', limit=2)
+    assert async_.content == sync.content
+
+
+@pytest.mark.django_db
+def test_detail(auctions, get, monkeypatch):
+    url = reverse('detail', kwargs={'auction_id': auctions[3].id})
+    # Built by the sync code on a cold cache
+    async_ = get(url, 'root.async_urls')
+    sync = get(url, 'root.urls')
+    assert async_['ETag'] == sync['ETag']
+    assert async_.json() == {**sync.json(), 'view': sync.json()['view'] - 1}
+    assert len(async_.json()['bid_history']) == 1
+
+    def cold(auction_id):
+        raise AssertionError("read from the cache")
+
+    monkeypatch.setattr(detail, 'fragments', cold)
+    warm = get(url, 'root.async_urls')
+    assert warm.json() == {**sync.json(), 'view': sync.json()['view'] + 1}
+    not_modified = get(url, 'root.async_urls', headers={'If-None-Match': warm['ETag']})
+    assert not_modified.status_code == 304 and not_modified['ETag'] == warm['ETag']
+    # Not modified is still a view
+    assert get(url, 'root.async_urls').json()['view'] == warm.json()['view'] + 2
+
+
+@pytest.mark.django_db
+def test_missing_auction_and_methods(get, settings):
+    response = get(reverse('detail', kwargs={'auction_id': 999999}), 'root.async_urls')
+    assert response.status_code == 404 and response.json() == {'detail': 'Not found.'}
+    settings.ROOT_URLCONF = 'root.async_urls'
+    assert APIClient().post(reverse('list')).status_code == 405
+    assert APIClient().head(reverse('faq')).status_code == 200
@@ -0,0 +1,67 @@
+from decimal import Decimal
+
+import pytest
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from src.auction.bidding import place_bid, register_proxy_bid, BidRejected
+from src.auction.models import Bid
+
+
+@pytest.fixture
+def auction(create_auction):
+    return create_auction()
+
+
+def history(auction):
+    return [(bid.user_id, bid.bid_amount) for bid in Bid.objects.filter(auction=auction).order_by('id')]
+
+
+@pytest.mark.django_db
+def test_single_proxy_opens_one_increment_above_price(auction, create_user):
+    alice = create_user()
+    register_proxy_bid(auction.id, alice, Decimal("500"))
+    assert history(auction) == [(alice.id, Decimal("101"))]
+
+
+@pytest.mark.django_db
+def test_competing_proxies_settle_in_one_pass(auction, create_user):
+    alice, bob = create_user(), create_user()
+    register_proxy_bid(auction.id, alice, Decimal("500"))
+    register_proxy_bid(auction.id, bob, Decimal("300"))
+
+    assert history(auction) == [(alice.id, Decimal("101")), (bob.id, Decimal("300")), (alice.id, Decimal("301"))]
+    auction.refresh_from_db()
+    assert auction.current_bid == Decimal("301")
+
+
+@pytest.mark.django_db
+def test_equal_maximums_go_to_the_earlier_registration(auction, create_user):
+    alice, bob = create_user(), create_user()
+    register_proxy_bid(auction.id, alice, Decimal("300"))
+    register_proxy_bid(auction.id, bob, Decimal("300"))
+    assert history(auction)[-1] == (alice.id, Decimal("300"))
+
+
+@pytest.mark.django_db
+def test_manual_bid_is_answered_by_proxy(auction, create_user):
+    alice, bob = create_user(), create_user()
+    register_proxy_bid(auction.id, alice, Decimal("500"))
+    place_bid(auction.id, bob, Decimal("250"))
+
+    assert history(auction)[-1] == (alice.id, Decimal("251"))
+    with pytest.raises(BidRejected):
+        register_proxy_bid(auction.id, bob, Decimal("200"))
+
+
+@pytest.mark.django_db
+def test_proxy_bid_api_view(auction, create_user):
+    user = create_user()
+    client = APIClient()
+    client.force_authenticate(user=user)
+
+    response = client.post(reverse('proxy-bid'), {"auction": auction.id, "max_amount": "400"})
+    assert response.status_code == status.HTTP_201_CREATED
+    assert response.data["leading"] is True
+    assert response.data["current_bid"] == "101.00"
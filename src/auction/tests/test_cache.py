@@ -0,0 +1,136 @@
+import threading
+import time
+
+import pytest
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from src.auction import cache as auction_cache
+from src.auction.cache import get_version, bump_version, remember, VERSION_KEY, LOCK_KEY
+from src.auction.models import Faq, About, AboutImage, Category
+
+
+def test_versions():
+    version = get_version('faq')
+    assert get_version('faq') == version
+    assert bump_version('faq') == version + 1
+
+    cache.delete(VERSION_KEY.format('faq'))
+    assert bump_version('faq') > version + 1
+
+
+@pytest.mark.django_db
+def test_cached_bytes_are_served_without_queries(django_assert_num_queries, django_capture_on_commit_callbacks):
+    client = APIClient()
+    with django_capture_on_commit_callbacks(execute=True):
+        faq = Faq.objects.create(question="Q?", answer="A.")
+
+    first = client.get(reverse('faq'))
+    with django_assert_num_queries(0):
+        second = client.get(reverse('faq'))
+    assert second.content == first.content
+    assert second['Content-Type'] == 'application/json'
+    # The query string is not part of the key
+    with django_assert_num_queries(0):
+        assert client.get(reverse('faq'), {'x': 1}).content == first.content
+
+    with django_capture_on_commit_callbacks(execute=True):
+        faq.answer = "B."
+        faq.save()
+    assert client.get(reverse('faq')).json()[0]["answer"] == "B."
+
+    with django_capture_on_commit_callbacks(execute=True):
+        faq.delete()
+    assert client.get(reverse('faq')).json() == []
+
+
+@pytest.mark.django_db
+def test_many_to_many_changes_invalidate(django_capture_on_commit_callbacks):
+    client = APIClient()
+    with django_capture_on_commit_callbacks(execute=True):
+        about = About.objects.create(title="About us")
+    assert client.get(reverse('about')).json()[0]["image"] == []
+
+    with django_capture_on_commit_callbacks(execute=True):
+        about.image.add(AboutImage.objects.create(image="about/a.jpg"))
+    assert len(client.get(reverse('about')).json()[0]["image"]) == 1
+
+
+@pytest.mark.django_db
+def test_changes_are_invisible_until_commit(django_capture_on_commit_callbacks):
+    client = APIClient()
+    client.get(reverse('category'))
+    with django_capture_on_commit_callbacks(execute=False) as callbacks:
+        Category.objects.create(name="Art")
+    assert client.get(reverse('category')).json() == []
+
+    for callback in callbacks:
+        callback()
+    assert [item["name"] for item in client.get(reverse('category')).json()] == ["Art"]
+
+
+@pytest.mark.django_db
+def test_browsable_api_is_not_cached(django_assert_num_queries):
+    client = APIClient()
+    client.get(reverse('faq'), HTTP_ACCEPT='text/html')
+    with django_assert_num_queries(1):
+        client.get(reverse('faq'), HTTP_ACCEPT='text/html')
+
+
+class Counter:
+    def __init__(self, seconds=0.0):
+        self.calls, self.seconds = 0, seconds
+
+    def __call__(self):
+        self.calls += 1
+        time.sleep(self.seconds)
+        return self.calls
+
+
+def test_concurrent_misses_compute_once():
+    compute, results = Counter(seconds=0.2), []
+    threads = [threading.Thread(target=lambda: results.append(remember('hot', compute, 60))) for _ in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert compute.calls == 1
+    assert results == [1] * 16
+
+
+def test_stale_while_revalidate():
+    compute = Counter()
+    # Expired a second ago, still within AUCTION_CACHE_STALE_TIMEOUT
+    cache.set('hot', ('stale', time.time() - 1, 0.0), 60)
+
+    lock = cache.lock(LOCK_KEY.format('hot'))
+    lock.acquire()
+    assert remember('hot', compute, 60) == 'stale'
+    assert compute.calls == 0
+
+    lock.release()
+    assert remember('hot', compute, 60) == 1
+    assert remember('hot', compute, 60) == 1
+
+
+def test_early_expiration(monkeypatch):
+    compute = Counter()
+    # Expires in 5 seconds and took 2 seconds to compute
+    cache.set('hot', ('cached', time.time() + 5, 2.0), 60)
+
+    monkeypatch.setattr(auction_cache.random, 'random', lambda: 0.5)
+    assert remember('hot', compute, 60) == 'cached'
+    # Unlucky draw: 2 * -log(0.01) > 5 seconds
+    monkeypatch.setattr(auction_cache.random, 'random', lambda: 0.99)
+    assert remember('hot', compute, 60) == 1
+
+
+def test_failures_are_not_cached():
+    def fail():
+        raise ValueError
+
+    with pytest.raises(ValueError):
+        remember('hot', fail, 60)
+    assert remember('hot', Counter(), 60) == 1
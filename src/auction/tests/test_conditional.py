@@ -0,0 +1,98 @@
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+from django.urls import reverse
+from django.utils.timezone import now
+from rest_framework.test import APIClient
+
+from src.auction import related
+from src.auction.bidding import place_bid
+from src.auction.counters import pending_views
+from src.auction.models import Auction, Faq
+from src.auction.scheduler import advance_statuses
+
+
+def revalidate(url, response):
+    return APIClient().get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+
+
+@pytest.mark.django_db
+def test_auction_detail(make_auction, django_assert_num_queries, django_capture_on_commit_callbacks, create_user):
+    auction = make_auction()
+    url = reverse('detail', kwargs={'auction_id': auction.id})
+    first = APIClient().get(url)
+    assert first.status_code == 200 and first['ETag'].startswith('W/"') and first['Last-Modified']
+
+    with django_assert_num_queries(0):
+        not_modified = revalidate(url, first)
+    assert not_modified.status_code == 304 and not_modified.content == b""
+    assert not_modified['ETag'] == first['ETag']
+    # Still counted as a view
+    assert pending_views([auction.id]) == {auction.id: 2}
+    assert APIClient().get(url, HTTP_IF_MODIFIED_SINCE=first['Last-Modified']).status_code == 304
+
+    with django_capture_on_commit_callbacks(execute=True):
+        place_bid(auction.id, create_user(), Decimal("150.00"))
+    changed = revalidate(url, first)
+    assert changed.status_code == 200 and changed['ETag'] != first['ETag']
+    assert changed.json()['current_bid'] == "150.00"
+
+
+@pytest.mark.django_db
+def test_auction_detail_follows_the_related_auctions(make_auction, django_capture_on_commit_callbacks):
+    auction, other = make_auction(artist_name="Artist"), make_auction(artist_name="Artist")
+    with django_capture_on_commit_callbacks(execute=True):
+        related.refresh()
+    url = reverse('detail', kwargs={'auction_id': auction.id})
+    first = APIClient().get(url)
+    assert [item['id'] for item in first.json()['best_related_auctions']] == [other.id]
+
+    # Recomputed with the same result
+    with django_capture_on_commit_callbacks(execute=True):
+        related.refresh([auction.id])
+    assert revalidate(url, first).status_code == 304
+
+    Auction.objects.filter(id=other.id).update(price=120, updated_at=now())
+    with django_capture_on_commit_callbacks(execute=True):
+        related.refresh([auction.id])
+    changed = revalidate(url, first)
+    assert changed.status_code == 200 and changed.json()['best_related_auctions'][0]['price'] == 120
+
+
+@pytest.mark.django_db
+def test_auction_lists(make_auction, django_capture_on_commit_callbacks):
+    auction = make_auction(auction_end_date=now() + timedelta(minutes=1))
+    url = reverse('list')
+    first = APIClient().get(url)
+    assert revalidate(url, first).status_code == 304
+    assert 'Last-Modified' not in first
+
+    # Bulk updates skip the signals
+    advance_statuses(now() + timedelta(minutes=2))
+    second = revalidate(url, first)
+    assert second.status_code == 200
+
+    with django_capture_on_commit_callbacks(execute=True):
+        auction.delete()
+    assert revalidate(url, second).status_code == 200
+    assert revalidate(reverse('filter'), APIClient().get(reverse('filter'))).status_code == 304
+
+
+@pytest.mark.django_db
+def test_cached_resources(django_assert_num_queries, django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        faq = Faq.objects.create(question="Q?", answer="A.")
+    url = reverse('faq')
+    first = APIClient().get(url)
+
+    with django_assert_num_queries(0):
+        assert revalidate(url, first).status_code == 304
+
+    with django_capture_on_commit_callbacks(execute=True):
+        faq.answer = "B."
+        faq.save()
+    assert revalidate(url, first).status_code == 200
+
+    # The browsable API is not validated
+    assert 'ETag' not in APIClient().get(url, {'format': 'api'})
@@ -0,0 +1,51 @@
+import pytest
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from src.auction import counters
+
+
+@pytest.fixture
+def auction(create_auction):
+    return create_auction(view=29)
+
+
+@pytest.mark.django_db
+def test_views_are_counted_in_redis_and_flushed(auction):
+    client = APIClient()
+    url = reverse('detail', kwargs={'auction_id': auction.id})
+
+    assert [client.get(url).data['view'] for _ in range(3)] == [30, 31, 32]
+    auction.refresh_from_db()
+    assert auction.view == 29
+
+    assert counters.flush() == 3
+    auction.refresh_from_db()
+    assert auction.view == 32
+    assert counters.pending_views([auction.id]) == {}
+    assert client.get(url).data['view'] == 33
+
+
+@pytest.mark.django_db
+def test_interrupted_flush_is_replayed(auction):
+    counters.record_view(auction.id)
+    conn = counters._connection()
+    conn.rename(counters.PENDING_KEY, counters.PROCESSING_KEY)  # flush died after claiming
+    counters.record_view(auction.id)
+    assert counters.pending_views([auction.id]) == {auction.id: 2}
+
+    assert counters.flush() == 1
+    assert counters.flush() == 1
+    auction.refresh_from_db()
+    assert auction.view == 31
+
+
+@pytest.mark.django_db
+def test_top_auctions_include_unflushed_views(auction):
+    client = APIClient()
+    assert client.get(reverse('top')).data == []
+
+    counters.record_view(auction.id)
+    counters.record_view(auction.id)
+    response = client.get(reverse('top'))
+    assert [(item['id'], item['view']) for item in response.data] == [(auction.id, 31)]
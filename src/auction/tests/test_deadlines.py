@@ -0,0 +1,78 @@
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+from django.utils.timezone import now
+
+from src.auction import deadlines, orderbook
+from src.auction.bidding import place_bid, submit_bid
+from src.auction.models import Auction
+from src.auction.scheduler import advance_statuses
+
+
+@pytest.mark.django_db
+def test_deadlines_follow_saves_and_deletes(make_auction, django_capture_on_commit_callbacks):
+    auction = make_auction(ends_in=timedelta(hours=1))
+    assert deadlines.deadline(auction.id) == auction.auction_end_date
+
+    with django_capture_on_commit_callbacks(execute=True):
+        auction.status = Auction.StatusChoices.CANCELLED
+        auction.save()
+    assert deadlines.deadline(auction.id) is None
+
+    other = make_auction(ends_in=timedelta(hours=2))
+    with django_capture_on_commit_callbacks(execute=True):
+        other.delete()
+    assert deadlines.next_deadline() is None
+
+
+@pytest.mark.django_db
+def test_bid_in_the_last_seconds_extends_the_auction(settings, make_auction, create_user,
+                                                    django_capture_on_commit_callbacks):
+    settings.AUCTION_SOFT_CLOSE_WINDOW, settings.AUCTION_SOFT_CLOSE_EXTENSION = 60, 120
+    auction = make_auction(ends_in=timedelta(seconds=30))
+    end_date = auction.auction_end_date
+
+    with django_capture_on_commit_callbacks(execute=True):
+        place_bid(auction.id, create_user(), Decimal("150"))
+    auction.refresh_from_db()
+    assert auction.auction_end_date == end_date + timedelta(seconds=120)
+    assert deadlines.deadline(auction.id) == auction.auction_end_date
+
+    # Outside the window again: no further extension.
+    with django_capture_on_commit_callbacks(execute=True):
+        place_bid(auction.id, create_user(), Decimal("160"))
+    auction.refresh_from_db()
+    assert auction.auction_end_date == end_date + timedelta(seconds=120)
+
+
+@pytest.mark.django_db
+def test_order_book_extends_atomically_and_flush_persists_it(settings, make_auction, create_user):
+    settings.AUCTION_ORDER_BOOK = True
+    settings.AUCTION_SOFT_CLOSE_WINDOW, settings.AUCTION_SOFT_CLOSE_EXTENSION = 60, 120
+    auction = make_auction(ends_in=timedelta(seconds=30))
+    extended = auction.auction_end_date + timedelta(seconds=120)
+
+    submit_bid(auction.id, create_user(), Decimal("150"))
+    assert abs(deadlines.deadline(auction.id) - extended) < timedelta(milliseconds=1)
+    auction.refresh_from_db()
+    assert auction.auction_end_date < extended
+
+    orderbook.flush()
+    auction.refresh_from_db()
+    assert abs(auction.auction_end_date - extended) < timedelta(milliseconds=1)
+
+
+@pytest.mark.django_db
+def test_scheduler_only_closes_auctions_that_are_really_due(make_auction):
+    ended = make_auction(ends_in=timedelta(seconds=-5))
+    extended = make_auction(ends_in=timedelta(minutes=2))
+    # Deadline read before an extension was tracked.
+    deadlines.track(extended.id, now() - timedelta(seconds=5))
+
+    started, completed = advance_statuses()
+    assert completed == [ended.id]
+    assert deadlines.deadline(ended.id) is None
+    assert deadlines.deadline(extended.id) == extended.auction_end_date
+    extended.refresh_from_db()
+    assert extended.status == Auction.StatusChoices.LIVE
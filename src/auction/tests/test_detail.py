@@ -0,0 +1,69 @@
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+from django.urls import reverse
+from django.utils.timezone import now
+from rest_framework.test import APIClient
+
+from src.auction import counters
+from src.auction.bidding import place_bid
+from src.auction.models import Auction
+from src.auction.scheduler import advance_statuses
+
+
+@pytest.fixture
+def auction(create_auction, django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        return create_auction(
+            location="Tashkent", piece_title="Untitled", auction_start_date=now() - timedelta(hours=1),
+            auction_end_date=now() + timedelta(minutes=1), status=Auction.StatusChoices.LIVE,
+            image1="auction_images/a.jpg", artist_name="Artist",
+        )
+
+
+def get(auction):
+    response = APIClient().get(reverse('detail', kwargs={'auction_id': auction.id}))
+    assert response.status_code == 200
+    return response.json()
+
+
+@pytest.mark.django_db
+def test_cached_fragments(auction, django_assert_num_queries):
+    first = get(auction)
+    with django_assert_num_queries(0):
+        second = get(auction)
+    assert second == {**first, 'view': 2}
+    assert list(second) == [
+        'id', 'name', 'location', 'current_bid', 'description', 'status', 'images', 'video', 'view', 'bid_history',
+        'bid_history_next', 'time_remaining', 'additional_details', 'best_related_auctions',
+    ]
+    assert second['additional_details'][0]['artist_name'] == "Artist"
+    assert APIClient().get(reverse('detail', kwargs={'auction_id': 0})).status_code == 404
+
+
+@pytest.mark.django_db
+def test_static_fragment_follows_saves(auction, django_capture_on_commit_callbacks):
+    get(auction)
+    with django_capture_on_commit_callbacks(execute=True):
+        auction.description = "Oil on canvas"
+        auction.save()
+    assert get(auction)['description'] == "Oil on canvas"
+
+
+@pytest.mark.django_db
+def test_live_fragment_follows_the_bid_state(auction, django_capture_on_commit_callbacks, create_user):
+    get(auction)
+    bidder = create_user()
+    with django_capture_on_commit_callbacks(execute=True):
+        place_bid(auction.id, bidder, Decimal("150.00"))
+    data = get(auction)
+    assert data['current_bid'] == "150.00"
+    assert [bid['user'] for bid in data['bid_history']] == [bidder.full_name]
+
+    # Views flushed to the row are not counted twice
+    counters.flush()
+    assert get(auction)['view'] == 3
+
+    advance_statuses(now() + timedelta(minutes=10))
+    assert get(auction)['status'] == Auction.StatusChoices.COMPLETED
@@ -0,0 +1,80 @@
+import io
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.urls import reverse
+from PIL import Image
+from rest_framework.test import APIClient
+
+from src.auction.images import image_storage, derivative_name
+from src.auction.models import Category
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path)
+    return tmp_path
+
+
+def png(width=1200, height=800, color=(200, 30, 30)):
+    output = io.BytesIO()
+    Image.new('RGB', (width, height), color).save(output, 'PNG')
+    return output.getvalue()
+
+
+def size_of(name):
+    with image_storage.open(name) as file, Image.open(file) as image:
+        return image.format, image.size
+
+
+@pytest.mark.django_db
+def test_upload_makes_hashed_derivatives():
+    category = Category.objects.create(name="Art", image=SimpleUploadedFile("Screenshot 1.PNG", png()))
+    name = category.image.name
+    assert name.startswith('category/') and name.endswith('.png') and len(name) == len('category/') + 64 + 4
+
+    assert size_of(derivative_name(name, 'thumb')) == ('WEBP', (320, 213))
+    assert size_of(derivative_name(name, 'medium')) == ('WEBP', (960, 640))
+    assert size_of(name) == ('PNG', (1200, 800))
+    # Smaller images are not scaled up
+    small = Category.objects.create(name="Small", image=SimpleUploadedFile("s.png", png(100, 50))).image.name
+    assert size_of(derivative_name(small, 'medium')) == ('WEBP', (100, 50))
+
+    # Same content, same files
+    again = Category.objects.create(name="Again", image=SimpleUploadedFile("other.png", png()))
+    assert again.image.name == name
+    assert derivative_name(name, 'unknown') == name
+
+
+@pytest.mark.django_db
+def test_files_without_derivatives_keep_their_url():
+    name = Category.objects.create(name="Art", image=SimpleUploadedFile("notes.png", b"not an image")).image.name
+    assert name == 'category/notes.png'
+    assert derivative_name(name, 'thumb') == name
+
+
+@pytest.mark.django_db
+def test_lists_ship_thumbnails_and_the_detail_full_images(create_auction):
+    auction = create_auction(
+        image1=SimpleUploadedFile("a.jpg", png()), artist_image=SimpleUploadedFile("b.jpg", png(color=(0, 0, 0))),
+    )
+    thumb = derivative_name(auction.image1.name, 'thumb')
+
+    item = APIClient().get(reverse('list')).json()['results'][0]
+    assert item['image1'] == f"https://aristoback.ikramovna.me/media/{thumb}"
+    assert item['owner_image'].endswith(derivative_name(auction.artist_image.name, 'thumb'))
+    detail = APIClient().get(reverse('detail', kwargs={'auction_id': auction.id})).json()
+    assert detail['images'] == [f"https://aristoback.ikramovna.me/media/{auction.image1.name}"]
+
+
+@pytest.mark.django_db
+def test_backfill(media_root):
+    (media_root / 'category').mkdir()
+    (media_root / 'category' / 'old.png').write_bytes(png())
+    category = Category.objects.create(name="Art", image='category/old.png')
+
+    call_command('make_image_derivatives', stdout=io.StringIO())
+    category.refresh_from_db()
+    assert category.image.name != 'category/old.png'
+    assert size_of(derivative_name(category.image.name, 'thumb'))[0] == 'WEBP'
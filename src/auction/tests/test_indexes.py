@@ -0,0 +1,133 @@
+"""
+EXPLAIN checks: the main query of each hot endpoint must be answered from an index.
+
+The SQL an endpoint really runs is captured and explained on the test database, and each test names
+the indexes its queries must go through. SQLite must plan a ``SEARCH`` through one of them (or walk
+one in order for a first page); PostgreSQL (with ``enable_seqscan`` off, the tables are tiny) must
+not plan a ``Seq Scan`` and must use them.
+"""
+import re
+from contextlib import contextmanager
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.urls import reverse
+from django.utils.timezone import now
+from rest_framework.test import APIClient
+
+from src.auction.models import Category, Bid
+from src.auction.scheduler import advance_statuses, next_transition_at
+
+# Lookups by id, the rowid on SQLite
+PRIMARY_KEY = 'INTEGER PRIMARY KEY'
+
+
+@contextmanager
+def capture_sql():
+    queries = []
+
+    def wrapper(execute, sql, params, many, context):
+        queries.append((sql, params))
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(wrapper):
+        yield queries
+
+
+def plan(sql, params):
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            cursor.execute(f"EXPLAIN {sql}", params)
+        else:
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+        return "\n".join(str(row[-1]) for row in cursor.fetchall())
+
+
+def assert_uses_index(queries, table, *indexes, walked=()):
+    """
+    Every query on ``table`` must look its rows up through one of ``indexes`` (``SEARCH``), or read them
+    in the order of one of the ``walked`` indexes (``SCAN ... USING INDEX``, a first page), and every
+    index named must be used.
+    """
+    main = [(sql, params) for sql, params in queries if sql.startswith('SELECT') and f'FROM "{table}"' in sql]
+    assert main, f"no query on {table}"
+    used = set()
+    for sql, params in main:
+        explained = plan(sql, params)
+        if connection.vendor == 'postgresql':
+            assert f"Seq Scan on {table}" not in explained, f"{sql}\n{explained}"
+            names = {name: f"{table}_pkey" if name == PRIMARY_KEY else name for name in (*indexes, *walked)}
+            used.update(name for name, index in names.items() if f" {index} " in f"{explained} ")
+            continue
+        for line in explained.splitlines():
+            if not re.match(rf"(SEARCH|SCAN) {table}\b", line):
+                continue
+            match = re.match(rf"(SEARCH|SCAN) {table} USING (?:COVERING )?(?:INDEX (\w+)|({PRIMARY_KEY}))", line)
+            name = match and (match.group(2) or match.group(3))
+            allowed = indexes if match and match.group(1) == 'SEARCH' else walked
+            assert name in allowed, f"{line!r} is not a lookup through {indexes or walked}:\n{sql}\n{explained}"
+            used.add(name)
+    assert used == {*indexes, *walked}, f"{ {*indexes, *walked} - used} not used on {table}"
+
+
+@pytest.fixture
+def auction(create_user, create_auction):
+    owner, category = create_user(), Category.objects.create(name="Art")
+    auctions = [create_auction(
+        name=f"Auction {i}", price=100 + i, auction_start_date=now() + timedelta(hours=i - 2),
+        category_id=category, owner=owner, view=10 * i,
+    ) for i in range(5)]
+    for amount in (110, 120):
+        Bid.objects.create(auction=auctions[0], user=owner, bid_amount=amount)
+    return auctions[0]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('name, params, indexes, walked', [
+    ('list', {}, ['auction_updated_idx'], ['auction_end_idx']),
+    ('filter', {'status': 'upcoming'}, ['auction_updated_idx', 'auction_status_end_idx'], []),
+    ('filter', {'auction_period': 'evening'}, ['auction_updated_idx', 'auction_period_end_idx'], []),
+    ('filter', {'min_price': 101, 'max_price': 103}, ['auction_updated_idx', 'auction_price_idx'], []),
+    # The leaderboard ranks the auctions in Redis, the rows are loaded by id
+    ('top', {}, [PRIMARY_KEY], []),
+    ('top', {'status': 'live'}, [PRIMARY_KEY], []),
+])
+def test_auction_lists_use_an_index(auction, name, params, indexes, walked):
+    with capture_sql() as queries:
+        assert APIClient().get(reverse(name), params).status_code == 200
+    assert_uses_index(queries, 'auction_auction', *indexes, walked=walked)
+
+
+@pytest.mark.django_db
+def test_category_list_uses_an_index(auction):
+    with capture_sql() as queries:
+        APIClient().get(reverse('category', kwargs={'category_id': auction.category_id_id}))
+    assert_uses_index(queries, 'auction_auction', 'auction_updated_idx', 'auction_category_end_idx')
+
+
+@pytest.mark.django_db
+def test_detail_related_auctions_and_bids_use_an_index(auction):
+    with capture_sql() as queries:
+        APIClient().get(reverse('detail', kwargs={'auction_id': auction.id}))
+    assert_uses_index(queries, 'auction_auction', PRIMARY_KEY, 'auction_category_end_idx')
+    assert_uses_index(queries, 'auction_bid', 'bid_history_idx')
+
+
+@pytest.mark.django_db
+def test_scheduler_queries_use_an_index(auction):
+    with capture_sql() as queries:
+        advance_statuses()
+        next_transition_at()
+    assert_uses_index(queries, 'auction_auction', 'auction_status_start_idx', PRIMARY_KEY)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('name', ['best-artist', 'top-artists'])
+def test_top_artists_use_an_index(auction, name):
+    auction.artist_name = "Artist"
+    auction.save()
+    with capture_sql() as queries:
+        assert APIClient().get(reverse(name)).status_code == 200
+    assert_uses_index(queries, 'artist_stats', walked=['artist_top_idx'])
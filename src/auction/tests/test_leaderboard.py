@@ -0,0 +1,111 @@
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+from django.urls import reverse
+from django.utils.timezone import now
+from rest_framework.test import APIClient
+
+from src.auction import leaderboard
+from src.auction.bidding import place_bid
+from src.auction.counters import record_view
+from src.auction.models import Auction
+from src.auction.scheduler import advance_statuses
+
+
+def top(**params):
+    response = APIClient().get(reverse('top'), params)
+    assert response.status_code == 200, response.content
+    return [item['id'] for item in response.data]
+
+
+@pytest.mark.django_db
+def test_views_and_bids_rank_the_auctions(make_auction, django_capture_on_commit_callbacks, create_user):
+    viewed, bid_on, quiet = make_auction(view=40), make_auction(view=35), make_auction(view=31)
+    assert top() == [viewed.id, bid_on.id, quiet.id]
+
+    with django_capture_on_commit_callbacks(execute=True):
+        place_bid(bid_on.id, create_user(), Decimal("150.00"))
+    for _ in range(3):
+        record_view(quiet.id)
+
+    # 35 + a bid (10) > 40 > 31 + 3 views
+    assert top() == [bid_on.id, viewed.id, quiet.id]
+    assert top(limit=2) == [bid_on.id, viewed.id]
+    assert APIClient().get(reverse('top'), {'limit': 'x'}).status_code == 400
+    assert APIClient().get(reverse('top'), {'order': 'x'}).status_code == 400
+
+
+@pytest.mark.django_db
+def test_ended_auctions_drop_out(make_auction, django_capture_on_commit_callbacks):
+    closing = make_auction(view=60, ends_in=timedelta(minutes=1))
+    cancelled, running = make_auction(view=50), make_auction(view=40)
+    assert top() == [closing.id, cancelled.id, running.id]
+
+    cancelled.status = Auction.StatusChoices.CANCELLED
+    cancelled.save()
+    advance_statuses(now() + timedelta(minutes=2))
+    assert top() == [running.id]
+
+    # A late view does not bring it back
+    record_view(closing.id)
+    assert leaderboard.top() == [(running.id, 40)]
+
+
+@pytest.mark.django_db
+def test_stale_entries_are_dropped_on_read(make_auction):
+    auction, other = make_auction(view=50), make_auction(view=40)
+    # Ended without the scheduler noticing yet
+    Auction.objects.filter(id=auction.id).update(auction_end_date=now() - timedelta(minutes=1))
+
+    assert top() == [other.id]
+    assert [auction_id for auction_id, _ in leaderboard.top()] == [other.id]
+
+
+@pytest.mark.django_db
+def test_status_filter_reads_past_the_first_window(make_auction):
+    live = make_auction(view=35)
+    upcoming = [make_auction(view=50 - i, status=Auction.StatusChoices.UPCOMING) for i in range(3)]
+
+    assert top(status='live', limit=2) == [live.id]
+    assert top(status='upcoming', limit=2) == [upcoming[0].id, upcoming[1].id]
+    assert top(status='completed') == []
+
+
+@pytest.mark.django_db
+def test_trending_favours_recent_activity(make_auction, monkeypatch, settings):
+    settings.AUCTION_TRENDING_HALF_LIFE = 3600
+    clock = [1_000_000.0]
+    monkeypatch.setattr(leaderboard.time, 'time', lambda: clock[0])
+    old, recent = make_auction(view=100), make_auction()
+
+    for _ in range(4):
+        record_view(old.id)
+    clock[0] += 3 * 3600
+    record_view(recent.id)
+    # 4 views three half-lives ago weigh less than 1 view now
+    assert top(order='trending') == [recent.id, old.id]
+    assert top() == [old.id]
+
+    # Far in the future the scores are scaled back instead of growing without bound
+    clock[0] += (leaderboard.REBASE_AFTER + 1) * 3600
+    record_view(recent.id)
+    scores = dict(leaderboard.top('trending'))
+    assert scores[recent.id] == pytest.approx(1)
+    assert scores[old.id] == pytest.approx(4 * 2.0 ** -68)
+
+
+@pytest.mark.django_db
+def test_rebuild_from_the_database(make_auction, django_capture_on_commit_callbacks, create_user):
+    auction, other = make_auction(view=20), make_auction(view=35)
+    with django_capture_on_commit_callbacks(execute=True):
+        place_bid(auction.id, create_user(), Decimal("150.00"))
+        place_bid(auction.id, create_user(), Decimal("160.00"))
+    make_auction(view=90, status=Auction.StatusChoices.COMPLETED)
+    before = leaderboard.top()
+
+    leaderboard._connection().delete(leaderboard.POPULAR_KEY, leaderboard.TRENDING_KEY)
+    assert leaderboard.rebuild() == 2
+
+    assert leaderboard.top() == before == [(auction.id, 40), (other.id, 35)]
+    assert [auction_id for auction_id, _ in leaderboard.top('trending')] == [auction.id, other.id]
@@ -0,0 +1,86 @@
+import asyncio
+import json
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+from asgiref.sync import async_to_sync, sync_to_async
+from django.test import AsyncClient
+from django.urls import reverse
+from django.utils.timezone import now
+
+from django_redis import get_redis_connection
+
+from src.auction import live
+from src.auction.bidding import place_bid
+from src.auction.models import Auction
+
+
+def parse(frame):
+    text = frame.decode() if isinstance(frame, bytes) else frame
+    lines = dict(line.split(": ", 1) for line in text.strip().splitlines())
+    return lines["event"], json.loads(lines["data"])
+
+
+@pytest.mark.django_db(transaction=True)
+def test_stream_pushes_snapshot_and_bids(create_user, create_auction):
+    auction = create_auction(
+        name="Live Auction", auction_start_date=now() - timedelta(hours=1), auction_end_date=now() + timedelta(hours=1),
+        status=Auction.StatusChoices.LIVE,
+    )
+    bidder = create_user()
+
+    async def scenario():
+        response = await AsyncClient().get(reverse("stream", kwargs={"auction_id": auction.id}))
+        assert response["Content-Type"] == "text/event-stream"
+        stream = response.streaming_content
+        try:
+            event, data = parse(await anext(stream))
+            assert (event, data["status"], data["current_bid"]) == ("snapshot", "live", None)
+
+            await sync_to_async(place_bid)(auction.id, bidder, Decimal("150.00"))
+            event, data = parse(await asyncio.wait_for(anext(stream), timeout=5))
+            assert (event, data["bid_amount"], data["user"]) == ("bid", "150.00", bidder.full_name)
+        finally:
+            await stream.aclose()
+
+    async_to_sync(scenario)()
+
+
+@pytest.mark.django_db
+def test_stream_of_unknown_auction_is_404():
+    response = async_to_sync(AsyncClient().get)(reverse("stream", kwargs={"auction_id": 999}))
+    assert response.status_code == 404
+
+
+def test_broadcaster_survives_bad_messages_and_lost_connections(monkeypatch, caplog):
+    monkeypatch.setattr(live, 'RECONNECT_DELAY', 0.05)
+    redis = get_redis_connection('default')
+
+    async def scenario():
+        broadcaster = live.Broadcaster()
+        queue = await broadcaster.subscribe(1)
+        try:
+            redis.publish(live.channel_name(1), b'not json')
+            live.publish(1, 'bid', {'n': 1})
+            payload, _ = await asyncio.wait_for(queue.get(), timeout=5)
+            assert payload == {'event': 'bid', 'data': {'n': 1}}
+
+            # Redis restarted: the subscription is restored
+            redis.client_kill_filter(_type='pubsub')
+            for _ in range(100):
+                live.publish(1, 'bid', {'n': 2})
+                try:
+                    payload, _ = await asyncio.wait_for(queue.get(), timeout=0.1)
+                    break
+                except asyncio.TimeoutError:
+                    continue
+            assert payload == {'event': 'bid', 'data': {'n': 2}}
+            assert broadcaster._reader is not None and not broadcaster._reader.done()
+        finally:
+            await broadcaster.unsubscribe(1, queue)
+            await broadcaster.close()
+
+    async_to_sync(scenario)()
+    assert "malformed live event" in caplog.text
+    assert "Lost the live events subscription" in caplog.text
@@ -0,0 +1,86 @@
+import pytest
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from src.auction import media
+from src.auction.images import image_storage
+from src.auction.models import Category
+
+HASH = 'a' * 64
+
+
+@pytest.mark.parametrize('name', ['auction_images/a.jpg', 'auction_images/a b ü.jpg', 'auction_images/../x.jpg',
+                                  'artist_image/./y.jpg', '/leading.png', "odd/!*()'~.png"])
+def test_urls_match_the_storage(name):
+    assert media.url(name) == f"https://aristoback.ikramovna.me{image_storage.url(name)}"
+
+
+def test_derivatives_and_empty_names():
+    assert media.url(f'auction_images/{HASH}.jpg', 'thumb') == \
+           f"https://aristoback.ikramovna.me/media/derivatives/{HASH}-thumb.webp"
+    assert media.url('auction_images/old.jpg', 'thumb') == \
+           "https://aristoback.ikramovna.me/media/auction_images/old.jpg"
+    assert media.url('') is None and media.url(None) is None
+
+
+def test_cdn_host_and_version(settings):
+    settings.AUCTION_MEDIA_HOST = 'https://cdn.example.com/aristo/'
+    settings.AUCTION_MEDIA_VERSION = '7'
+    assert media.url('auction_images/a.jpg') == "https://cdn.example.com/aristo/media/auction_images/a.jpg?v=7"
+    # Content-hashed names change with the content already
+    assert media.url(f'auction_images/{HASH}.jpg', 'thumb') == \
+           f"https://cdn.example.com/aristo/media/derivatives/{HASH}-thumb.webp"
+
+    settings.MEDIA_URL = 'https://files.example.com/m/'
+    assert media.url(f'auction_images/{HASH}.jpg') == f"https://files.example.com/m/auction_images/{HASH}.jpg"
+
+
+def test_signed_urls(settings, monkeypatch):
+    settings.AUCTION_MEDIA_SIGNING_KEY = 'secret'
+    settings.AUCTION_MEDIA_VERSION = '2'
+    url = media.url('auction_images/a b.jpg')
+    assert url.startswith("https://aristoback.ikramovna.me/media/auction_images/a%20b.jpg?v=2&signature=")
+    path = url[len("https://aristoback.ikramovna.me"):]
+    assert media.check_signature(path)
+    assert not media.check_signature(path.replace('v=2', 'v=3'))
+    assert not media.check_signature(path.replace('a%20b', 'c'))
+
+    settings.AUCTION_MEDIA_SIGNED_TTL = 3600
+    monkeypatch.setattr(media.time, 'time', lambda: 10 * 3600 + 5)
+    url = media.url('auction_images/a.jpg')
+    assert '&expires=43200&signature=' in url
+    # Same URL for the whole hour
+    monkeypatch.setattr(media.time, 'time', lambda: 11 * 3600 - 1)
+    assert media.url('auction_images/a.jpg') == url
+    assert media.check_signature(url[len("https://aristoback.ikramovna.me"):])
+    monkeypatch.setattr(media.time, 'time', lambda: 43201)
+    assert not media.check_signature(url[len("https://aristoback.ikramovna.me"):])
+
+
+@pytest.mark.django_db
+def test_cached_payloads_follow_the_signing_window(settings, monkeypatch):
+    settings.AUCTION_MEDIA_SIGNING_KEY = 'secret'
+    settings.AUCTION_MEDIA_SIGNED_TTL = 3600
+    monkeypatch.setattr(media.time, 'time', lambda: 10 * 3600 + 5)
+    Category.objects.create(name="Art", image="category/a.png")
+    first = APIClient().get(reverse('category'))
+    assert 'expires=43200' in first.json()[0]['image']
+    assert APIClient().get(reverse('category'), headers={'If-None-Match': first['ETag']}).status_code == 304
+
+    # Next window: new ETag, nothing served from the response cache of the previous one
+    monkeypatch.setattr(media.time, 'time', lambda: 11 * 3600 + 5)
+    second = APIClient().get(reverse('category'), headers={'If-None-Match': first['ETag']})
+    assert second.status_code == 200
+    assert 'expires=46800' in second.json()[0]['image']
+
+def test_nginx_access_check(settings, rf):
+    def access(uri):
+        return media.access(rf.get('/api/v1/auction/media-access', HTTP_X_ORIGINAL_URI=uri)).status_code
+
+    # Nothing to check without a key
+    assert access('/media/auction_images/a.jpg') == 204
+    settings.AUCTION_MEDIA_SIGNING_KEY = 'secret'
+    signed = media.url('auction_images/a.jpg')[len("https://aristoback.ikramovna.me"):]
+    assert access(signed) == 204
+    assert access('/media/auction_images/a.jpg') == 403
+    assert access(signed.replace('a.jpg', 'b.jpg')) == 403
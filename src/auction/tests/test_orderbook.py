@@ -0,0 +1,89 @@
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+from django.utils.timezone import now
+from django_redis import get_redis_connection
+
+from src.auction import orderbook
+from src.auction.bidding import submit_bid, BidRejected
+from src.auction.models import Auction, Bid
+
+
+@pytest.fixture
+def live_auction(create_auction):
+    return create_auction(
+        name="Live Auction",
+        auction_start_date=now() - timedelta(hours=1),
+        auction_end_date=now() + timedelta(hours=1),
+        status=Auction.StatusChoices.LIVE,
+    )
+
+
+@pytest.mark.django_db
+def test_bids_are_validated_against_the_book(settings, live_auction, create_user):
+    settings.AUCTION_ORDER_BOOK = True
+    user = create_user()
+
+    bid = submit_bid(live_auction.id, user, Decimal("150.00"))
+    assert bid.pk is None
+    with pytest.raises(BidRejected):
+        submit_bid(live_auction.id, user, Decimal("150.00"))
+
+    assert orderbook.high_bid(live_auction.id) == (Decimal("150.00"), user.id)
+    assert [entry["bid_amount"] for entry in orderbook.recent_bids(live_auction.id)] == ["150.00"]
+    assert Bid.objects.count() == 0
+
+
+@pytest.mark.django_db
+def test_flush_persists_pending_bids(settings, live_auction, create_user):
+    settings.AUCTION_ORDER_BOOK = True
+    user = create_user()
+    submit_bid(live_auction.id, user, Decimal("150.00"))
+    accepted = submit_bid(live_auction.id, user, Decimal("175.50"))
+
+    assert orderbook.flush() == 2
+    assert list(Bid.objects.order_by("id").values_list("bid_amount", flat=True)) == [Decimal("150"), Decimal("175.5")]
+    assert Bid.objects.get(bid_amount=Decimal("175.50")).bid_time == accepted.bid_time
+    live_auction.refresh_from_db()
+    assert live_auction.current_bid == Decimal("175.50")
+
+
+@pytest.mark.django_db
+def test_flush_replays_an_interrupted_batch_once(settings, live_auction, create_user):
+    settings.AUCTION_ORDER_BOOK = True
+    user = create_user()
+    submit_bid(live_auction.id, user, Decimal("150.00"))
+    orderbook.flush()
+
+    # Simulate a flush that committed but died before clearing the processing list.
+    conn = get_redis_connection("default")
+    conn.rpush(orderbook.PROCESSING_KEY, orderbook._entry(live_auction.id, user.id, Decimal("150.00"), now()))
+    submit_bid(live_auction.id, user, Decimal("160.00"))
+
+    assert orderbook.flush() == 1
+    assert Bid.objects.count() == 2
+    assert conn.llen(orderbook.PROCESSING_KEY) == 0
+
+
+@pytest.mark.django_db
+def test_auctions_that_are_not_live_use_the_database(settings, live_auction, create_user):
+    settings.AUCTION_ORDER_BOOK = True
+    Auction.objects.filter(id=live_auction.id).update(status=Auction.StatusChoices.UPCOMING)
+
+    bid = submit_bid(live_auction.id, create_user(), Decimal("150.00"))
+    assert bid.pk is not None
+    assert orderbook.high_bid(live_auction.id) is None
+
+
+@pytest.mark.django_db
+def test_handed_over_auctions_persist_the_book_before_the_database_decides(settings, live_auction, create_user):
+    settings.AUCTION_ORDER_BOOK = True
+    submit_bid(live_auction.id, create_user(), Decimal("200.00"))
+    # A hand over that has not flushed yet (waiting for the flush lock)
+    orderbook._mark_proxied(live_auction.id)
+
+    with pytest.raises(BidRejected):
+        submit_bid(live_auction.id, create_user(), Decimal("150.00"))
+    assert Bid.objects.get().bid_amount == Decimal("200.00")
+    assert submit_bid(live_auction.id, create_user(), Decimal("250.00")).pk is not None
@@ -0,0 +1,97 @@
+import uuid
+
+import pytest
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from src.auction import views
+from src.auction.counters import record_view
+from src.auction.models import Category, Bid, Faq, About, AboutImage, AuctionFavorite
+
+
+@pytest.fixture
+def category():
+    return Category.objects.create(name="Art")
+
+
+@pytest.fixture
+def add_auctions(category, create_user, create_auction):
+    owner = create_user()
+
+    def _add_auctions(count, **fields):
+        return [create_auction(
+            category_id=category, owner=owner, artist_name="Artist", image1="auction_images/a.jpg",
+            artist_image="artist_image/a.jpg", **fields,
+        ) for _ in range(count)]
+    return _add_auctions
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('name, view, params', [
+    ('list', views.AuctionListView, {}),
+    ('filter', views.FilteredAuctionListView, {'category': 'art', 'min_price': 1}),
+    ('search', views.SearchAuctionByNameView, {'name': 'Test'}),
+    ('top', views.TopAuctionsAPIView, {}),
+])
+def test_auction_lists(assert_query_budget, add_auctions, name, view, params):
+    assert_query_budget(reverse(name), view, lambda n: add_auctions(n, view=50), **params)
+
+
+@pytest.mark.django_db
+def test_category_auction_list(assert_query_budget, add_auctions, category):
+    url = reverse('category', kwargs={'category_id': category.id})
+    assert_query_budget(url, views.CategoryAuctionListView, add_auctions)
+
+
+@pytest.mark.django_db
+def test_auction_detail_and_bid_history(assert_query_budget, add_auctions, create_user):
+    auction = add_auctions(1)[0]
+
+    def grow(n):
+        add_auctions(n)  # related auctions
+        for user in [create_user() for _ in range(n)]:
+            Bid.objects.create(auction=auction, user=user, bid_amount=100 + Bid.objects.count() + 1)
+        record_view(auction.id)
+
+    assert_query_budget(reverse('detail', kwargs={'auction_id': auction.id}), views.AuctionDetailView, grow)
+    assert_query_budget(reverse('bid-history', kwargs={'auction_id': auction.id}), views.AuctionBidHistoryView, grow)
+
+
+@pytest.mark.django_db
+def test_static_lists(assert_query_budget, category):
+    def add_about(n):
+        for _ in range(n):
+            about = About.objects.create(title="About")
+            about.image.add(*[AboutImage.objects.create(image="about/a.jpg") for _ in range(2)])
+
+    assert_query_budget(reverse('faq'), views.FaqAPIView,
+                        lambda n: Faq.objects.bulk_create([Faq(question="Q", answer="A") for _ in range(n)]))
+    assert_query_budget(reverse('about'), views.AboutAPIView, add_about)
+
+
+@pytest.mark.django_db
+def test_favorites(assert_query_budget, add_auctions, create_user):
+    user = create_user()
+    client = APIClient()
+    client.force_authenticate(user)
+
+    def grow(n):
+        for auction in add_auctions(n):
+            AuctionFavorite.objects.create(auction=auction, user=user, liked=True)
+
+    assert_query_budget(reverse('favorites'), views.AuctionFavoriteListCreateAPIView, grow, client=client)
+
+
+@pytest.mark.django_db
+def test_best_artist(assert_query_budget, add_auctions):
+    assert_query_budget(reverse('best-artist'), views.BestArtistAPIView, add_auctions)
+
+
+@pytest.mark.django_db
+def test_top_artists(assert_query_budget, add_auctions):
+    def grow(n):
+        for auction in add_auctions(n):
+            auction.artist_name = f"Artist {uuid.uuid4()}"
+            auction.save()
+
+    assert_query_budget(reverse('top-artists'), views.TopArtistsAPIView, grow, limit=100)
@@ -0,0 +1,115 @@
+import io
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils.timezone import now
+from rest_framework.test import APIClient
+
+from src.auction import related
+from src.auction.models import Category, Auction, RelatedAuction
+from src.auction.scheduler import advance_statuses
+
+
+@pytest.fixture
+def make_auction(make_auction):
+    def _make_auction(name, category, **fields):
+        return make_auction(name=name, piece_title=name, category_id=category, **fields)
+    return _make_auction
+
+
+def related_ids(auction):
+    return list(RelatedAuction.objects.filter(auction=auction).order_by('rank').values_list('related_id', flat=True))
+
+
+@pytest.mark.django_db
+def test_neighbours_are_ranked_by_shared_attributes(make_auction):
+    paintings, sculptures = Category.objects.create(name="Paintings"), Category.objects.create(name="Sculptures")
+    auction = make_auction("Sunset", paintings, artist_name="Monet", medium="Oil")
+    same_artist_and_medium = make_auction("Sunrise", paintings, artist_name="Monet", medium="oil ")
+    same_artist = make_auction("Water lilies", paintings, artist_name="Monet", medium="Pastel")
+    same_category = make_auction("Harbour", paintings, artist_name="Turner", price=5000)
+    other_category_same_artist = make_auction("Bust", sculptures, artist_name="Monet", medium="Bronze")
+    make_auction("Unrelated", sculptures, artist_name="Rodin", price=5000)
+
+    related.refresh()
+
+    assert related_ids(auction) == [
+        same_artist_and_medium.id, same_artist.id, other_category_same_artist.id, same_category.id,
+    ]
+    assert RelatedAuction.objects.get(auction=auction, rank=0).score > RelatedAuction.objects.get(
+        auction=auction, rank=1).score
+
+
+@pytest.mark.django_db
+def test_top_k_and_closed_auctions_are_excluded(make_auction, settings):
+    settings.AUCTION_RELATED_COUNT = 3
+    category = Category.objects.create(name="Paintings")
+    auction = make_auction("Sunset", category)
+    others = [make_auction(f"Painting {i}", category, view=i) for i in range(5)]
+    make_auction("Closed", category, status=Auction.StatusChoices.COMPLETED)
+
+    related.refresh([auction.id])
+
+    # Everything else being equal the most viewed come first
+    assert related_ids(auction) == [others[4].id, others[3].id, others[2].id]
+
+
+@pytest.mark.django_db
+def test_refresh_dirty_follows_new_and_closed_auctions(make_auction):
+    category = Category.objects.create(name="Paintings")
+    auction = make_auction("Sunset", category, artist_name="Monet")
+    closing = make_auction("Closing", category, ends_in=timedelta(minutes=1))
+    assert related.refresh_dirty() == 2
+    assert related_ids(auction) == [closing.id]
+
+    # A new, closer match enters the list of the existing auction
+    newcomer = make_auction("Sunrise", category, artist_name="Monet")
+    related.refresh_dirty()
+    assert related_ids(auction) == [newcomer.id, closing.id]
+    assert related_ids(newcomer) == [auction.id, closing.id]
+
+    # A completed auction leaves the lists it was in
+    advance_statuses(now() + timedelta(minutes=2))
+    related.refresh_dirty()
+    assert related_ids(auction) == [newcomer.id]
+    assert related_ids(newcomer) == [auction.id]
+    assert related.refresh_dirty() == 0
+
+
+@pytest.mark.django_db
+def test_refresh_dirty_related_scans_open_auctions_only(make_auction):
+    category = Category.objects.create(name="Paintings")
+    closed = make_auction("Old sunset", category, artist_name="Monet", status=Auction.StatusChoices.COMPLETED)
+    auction = make_auction("Sunset", category, artist_name="Monet")
+    related.refresh()
+    related._connection().delete(related.DIRTY_KEY)
+
+    newcomer = make_auction("Sunrise", category, artist_name="Monet")
+    # The closed auction would rank it too, but closed auctions are left to `manage.py refresh_related`
+    assert related._affected([newcomer.id]) == {auction.id}
+    # Picked up by its own command, not by the scheduler
+    call_command('run_scheduler', '--once', stdout=io.StringIO())
+    assert related_ids(auction) == []
+    call_command('refresh_dirty_related', '--once', stdout=io.StringIO())
+    assert related_ids(auction) == [newcomer.id]
+    assert related_ids(newcomer) == [auction.id]
+    assert related_ids(closed) == [auction.id]
+
+
+@pytest.mark.django_db
+def test_detail_view_reads_the_precomputed_neighbours(make_auction):
+    category = Category.objects.create(name="Paintings")
+    auction = make_auction("Sunset", category, artist_name="Monet")
+    best = make_auction("Sunrise", category, artist_name="Monet")
+    other = make_auction("Harbour", category, artist_name="Turner")
+    url = reverse('detail', kwargs={'auction_id': auction.id})
+
+    # Not computed yet: same category
+    response = APIClient().get(url)
+    assert {item['id'] for item in response.data['best_related_auctions']} == {best.id, other.id}
+
+    related.refresh()
+    response = APIClient().get(url)
+    assert [item['id'] for item in response.data['best_related_auctions']] == [best.id, other.id]
@@ -0,0 +1,205 @@
+from datetime import timedelta
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.db import connections, transaction
+from django.http import HttpResponse
+from django.test import AsyncClient, RequestFactory
+from django.urls import reverse
+from django.utils.timezone import now
+from rest_framework.test import APIClient
+
+from src.auction import leaderboard, routers
+from src.auction.models import Auction, AuctionFavorite, Faq
+from src.users.models import User
+
+
+@pytest.fixture
+def replica(settings, monkeypatch):
+    """
+    A ``replica1`` alias on the test database, like ``TEST['MIRROR']``; returns the aliases the reads went to.
+    """
+    settings.AUCTION_DB_REPLICAS = ['replica1']
+    monkeypatch.setitem(connections.settings, 'replica1', connections.settings['default'])
+    connections['replica1'] = connections['default']
+    reads = []
+    db_for_read = routers.ReplicaRouter.db_for_read
+
+    def record(self, model, **hints):
+        alias = db_for_read(self, model, **hints)
+        reads.append((model._meta.model_name, alias))
+        return alias
+
+    monkeypatch.setattr(routers.ReplicaRouter, 'db_for_read', record)
+    yield reads
+    del connections['replica1']
+
+
+@pytest.fixture
+def auction(create_auction):
+    return create_auction(auction_start_date=now() - timedelta(hours=1), status=Auction.StatusChoices.LIVE)
+
+
+def serve(view, cookies=None):
+    request = RequestFactory().get('/')
+    request.COOKIES.update(cookies or {})
+    return routers.replica_middleware(view)(request)
+
+
+# Not in a test case transaction: reads in a transaction go to the primary
+@pytest.mark.django_db(transaction=True)
+def test_requests_read_the_replica(replica):
+    seen = {}
+
+    def view(request):
+        seen['auction'] = Auction.objects.all().db
+        seen['user'] = User.objects.all().db
+        with transaction.atomic():
+            seen['atomic'] = Auction.objects.all().db
+        return HttpResponse()
+
+    response = serve(view)
+    assert seen == {'auction': 'replica1', 'user': 'default', 'atomic': 'default'}
+    assert routers.PIN_COOKIE not in response.cookies
+    # Outside requests: commands, flushers
+    assert Auction.objects.all().db == 'default'
+
+
+@pytest.mark.django_db
+def test_no_replicas(settings):
+    settings.AUCTION_DB_REPLICAS = []
+    seen = []
+    serve(lambda request: seen.append(Auction.objects.all().db) or HttpResponse())
+    assert seen == ['default']
+
+
+@pytest.mark.django_db(transaction=True)
+def test_anonymous_writers_are_pinned_with_a_cookie(replica, auction, create_user):
+    user, seen = create_user(), []
+
+    def view(request):
+        replica_auction = Auction.objects.get(id=auction.id)
+        seen.append(replica_auction._state.db)
+        # Rows read from a replica are related to rows of the primary
+        AuctionFavorite.objects.create(auction=replica_auction, user=user)
+        seen.append(Auction.objects.all().db)
+        return HttpResponse()
+
+    response = serve(view)
+    assert seen == ['replica1', 'default']
+    cookie = response.cookies[routers.PIN_COOKIE]
+    assert cookie['max-age'] == 10
+
+    seen.clear()
+    serve(lambda request: seen.append(Auction.objects.all().db) or HttpResponse(), {cookie.key: cookie.value})
+    assert seen == ['default']
+
+
+@pytest.mark.django_db(transaction=True)
+def test_authenticated_writers_read_their_writes(replica, auction, settings, create_user):
+    user, other = create_user(), create_user()
+    client = APIClient()
+    client.force_authenticate(user)
+    url = reverse('favorites')
+
+    assert client.get(url).status_code == 200
+    assert ('auctionfavorite', 'replica1') in replica
+    # get_or_create and the likes counted after it use the primary
+    replica.clear()
+    response = client.post(url, {'auction': auction.id, 'liked': True})
+    assert response.json()['likes_count'] == 1
+    assert {alias for _, alias in replica} == {'default'}
+    assert AuctionFavorite.objects.using('default').get().user == user
+    assert routers.PIN_COOKIE not in response.cookies
+
+    replica.clear()
+    assert len(client.get(url).json()) == 1
+    assert {alias for _, alias in replica} == {'default'}
+
+    client.force_authenticate(other)
+    replica.clear()
+    client.get(url)
+    assert {alias for _, alias in replica} == {'replica1'}
+
+    # The pin expires
+    routers.cache.delete(routers.pin_key(user.pk))
+    client.force_authenticate(user)
+    replica.clear()
+    client.get(url)
+    assert {alias for _, alias in replica} == {'replica1'}
+
+
+@pytest.mark.django_db(transaction=True)
+def test_async_views_read_the_replica(replica, auction, settings):
+    Auction.objects.filter(id=auction.id).update(view=40)
+    leaderboard.rebuild()
+    settings.ROOT_URLCONF = 'root.async_urls'
+    replica.clear()
+    response = async_to_sync(AsyncClient().get)(reverse('top'))
+    assert [item['id'] for item in response.json()] == [auction.id]
+    assert {alias for _, alias in replica} == {'replica1'}
+
+
+@pytest.mark.django_db(transaction=True)
+def test_etag_validated_lists_read_the_primary(replica, auction, create_auction, settings):
+    url = reverse('list')
+    etag = APIClient().get(url)['ETag']
+    assert APIClient().get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+    # A delete bumps the version in the ETag on commit, the list must not come from a replica without it
+    create_auction().delete()
+    replica.clear()
+    response = APIClient().get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200 and len(response.json()['results']) == 1
+    settings.ROOT_URLCONF = 'root.async_urls'
+    assert len(async_to_sync(AsyncClient().get)(url).json()['results']) == 1
+    assert replica and {alias for _, alias in replica} == {'default'}
+
+
+@pytest.mark.django_db(transaction=True)
+def test_caches_are_refilled_from_the_primary(replica, auction, settings, create_user):
+    bidder = APIClient()
+    bidder.force_authenticate(create_user())
+    url = reverse('detail', kwargs={'auction_id': auction.id})
+    assert APIClient().get(url).json()['current_bid'] is None
+    assert APIClient().get(reverse('faq')).status_code == 200
+
+    response = bidder.post(reverse('bid'), {'auction': auction.id, 'bid_amount': '150.00'})
+    assert response.status_code == 201, response.content
+    # Another client, not pinned: the fragments of the new version are rebuilt from the primary
+    replica.clear()
+    assert APIClient().get(url).json()['current_bid'] == '150.00'
+    assert replica and {alias for _, alias in replica} == {'default'}
+
+    Faq.objects.create(question="New?", answer="Yes")
+    replica.clear()
+    assert len(APIClient().get(reverse('faq')).json()) == 1
+    settings.ROOT_URLCONF = 'root.async_urls'
+    Faq.objects.create(question="Newer?", answer="Yes")
+    assert len(async_to_sync(AsyncClient().get)(reverse('faq')).json()) == 2
+    assert replica and {alias for _, alias in replica} == {'default'}
+
+
+@pytest.mark.django_db(transaction=True)
+def test_bids_read_the_primary(replica, auction, settings, create_user):
+    settings.AUCTION_ORDER_BOOK = True
+
+    def post(name, **data):
+        # A new bidder each time, not pinned by an earlier write
+        client = APIClient()
+        client.force_authenticate(create_user())
+        replica.clear()
+        assert client.post(reverse(name), {'auction': auction.id, **data}).status_code == 201
+        assert replica and {alias for _, alias in replica} == {'default'}
+
+    # Seeds the order book from the auction, its proxies and its bids
+    post('bid', bid_amount='150.00')
+    # Hands the auction over to the database
+    post('proxy-bid', max_amount='300')
+    post('bid', bid_amount='400.00')
+
+
+def test_replicas_are_not_migrated(settings):
+    settings.AUCTION_DB_REPLICAS = ['replica1']
+    router = routers.ReplicaRouter()
+    assert router.allow_migrate('replica1', 'auction') is False
+    assert router.allow_migrate('default', 'auction') is None
@@ -0,0 +1,58 @@
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from src.auction.models import Auction
+from src.auction.scheduler import advance_statuses, next_transition_at, transition_metrics
+
+
+@pytest.fixture
+def make_auction(make_auction):
+    def _make_auction(start, end, status=Auction.StatusChoices.UPCOMING):
+        return make_auction(starts_in=start, ends_in=end, status=status)
+    return _make_auction
+
+
+@pytest.mark.django_db
+def test_advance_statuses(make_auction):
+    starting = make_auction(timedelta(minutes=-1), timedelta(hours=1))
+    ending = make_auction(timedelta(hours=-2), timedelta(seconds=-30), Auction.StatusChoices.LIVE)
+    future = make_auction(timedelta(hours=1), timedelta(hours=2))
+    cancelled = make_auction(timedelta(hours=-2), timedelta(hours=-1), Auction.StatusChoices.CANCELLED)
+
+    started, completed = advance_statuses()
+
+    assert (started, completed) == ([starting.id], [ending.id])
+    statuses = dict(Auction.objects.values_list('id', 'status'))
+    assert statuses == {starting.id: 'live', ending.id: 'completed', future.id: 'upcoming', cancelled.id: 'cancelled'}
+    assert 60 <= transition_metrics()['max_lag_seconds'] < 90
+    assert advance_statuses() == ([], [])
+
+
+@pytest.mark.django_db
+def test_next_transition_at(make_auction, django_capture_on_commit_callbacks):
+    assert next_transition_at() is None
+    live = make_auction(timedelta(hours=-1), timedelta(minutes=10), Auction.StatusChoices.LIVE)
+    upcoming = make_auction(timedelta(minutes=5), timedelta(hours=1))
+    assert next_transition_at() == upcoming.auction_start_date
+    with django_capture_on_commit_callbacks(execute=True):
+        upcoming.delete()
+    assert next_transition_at() == live.auction_end_date
+
+
+@pytest.mark.django_db
+def test_run_scheduler_once(make_auction):
+    auction = make_auction(timedelta(minutes=-1), timedelta(hours=1))
+    call_command('run_scheduler', '--once')
+    auction.refresh_from_db()
+    assert auction.status == Auction.StatusChoices.LIVE
+
+
+@pytest.mark.django_db
+def test_detail_view_does_not_write_the_status(make_auction):
+    auction = make_auction(timedelta(minutes=-1), timedelta(hours=1))
+    response = APIClient().get(reverse('detail', kwargs={'auction_id': auction.id}))
+    assert response.data['status'] == 'upcoming'
@@ -0,0 +1,110 @@
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from src.auction import search
+from src.auction.models import Category, Auction
+
+
+@pytest.fixture
+def make_auction(create_user, create_auction):
+    owner, categories = create_user(), {}
+
+    def _make_auction(name, category="Art", **fields):
+        if category not in categories:
+            categories[category] = Category.objects.create(name=category)
+        return create_auction(
+            name=name, location="Tashkent", piece_title="Untitled", category_id=categories[category], owner=owner,
+            **fields,
+        )
+    return _make_auction
+
+
+def found(text):
+    return [auction.name for auction in search.search_auctions(text)[:20]]
+
+
+@pytest.mark.django_db
+def test_results_are_ranked_across_fields(make_auction):
+    make_auction("Evening landscape", description="A quiet sunset over the river")
+    make_auction("Sunset", medium="Oil on canvas")
+    make_auction("Portrait", artist_name="Sunsetova")
+    make_auction("Still life", category="Sculpture")
+
+    # name before artist (prefix of the last word) before description
+    assert found("sunset") == ["Sunset", "Portrait", "Evening landscape"]
+    assert found("sunset oil") == ["Sunset"]
+    assert found("sculp") == ["Still life"]
+    assert found('oil* "(') == ["Sunset"]  # query syntax is not passed through
+    assert found("!!!") == []
+
+
+@pytest.mark.django_db
+def test_index_follows_saves_and_deletes(make_auction):
+    auction = make_auction("Blue horse")
+    assert found("horse") == ["Blue horse"]
+
+    auction.name = "Red cow"
+    auction.save()
+    assert found("horse") == [] and found("cow") == ["Red cow"]
+
+    auction.category_id.name = "Animals"
+    auction.category_id.save()
+    assert found("animals") == ["Red cow"]
+
+    auction.delete()
+    assert found("cow") == []
+
+
+@pytest.mark.django_db
+def test_saves_of_other_fields_are_not_reindexed(make_auction, monkeypatch):
+    auction = make_auction("Blue horse")
+    indexed = []
+    monkeypatch.setattr(search, 'index_auctions', indexed.extend)
+
+    auction.update_status()
+    auction.view = 5
+    auction.save(update_fields=['view'])
+    assert indexed == []
+
+    auction.name = "Red cow"
+    auction.save(update_fields=['name', 'updated_at'])
+    auction.save()
+    assert indexed == [auction.id, auction.id]
+
+
+@pytest.mark.django_db
+def test_rebuild_indexes_bulk_inserted_auctions(make_auction):
+    template = make_auction("Template")
+    Auction.objects.bulk_create([Auction(
+        name=f"Bulk lot {i}", location="x", lot_ref_num="LOT", lot_num_two="01", piece_title="x", price=1,
+        auction_start_date=template.auction_start_date, auction_end_date=template.auction_end_date,
+        category_id=template.category_id, owner=template.owner,
+    ) for i in range(3)])
+    assert found("bulk") == []
+
+    call_command('rebuild_search_index')
+    assert len(found("bulk")) == 3
+
+
+@pytest.mark.django_db
+def test_search_view_is_paginated(make_auction):
+    for i in range(5):
+        make_auction(f"Vase {i}")
+
+    response = APIClient().get(reverse('search'), {"name": "vase", "page_size": 2})
+    assert response.data["count"] == 5
+    assert len(response.data["results"]) == 2
+    assert set(response.data["results"][0]) >= {"id", "name", "remaining_time"}
+    assert response.data["next"]
+    assert APIClient().get(reverse('search')).status_code == 400
+
+
+@pytest.mark.django_db
+def test_fallback_backend(make_auction):
+    make_auction("Golden vase", description="Porcelain")
+    backend = search.FallbackBackend()
+    assert backend.count(None, ["porcel", "vase"]) == 1
+    assert backend.ids(None, ["nothing"], 0, 10) == []
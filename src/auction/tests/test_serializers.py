@@ -0,0 +1,77 @@
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+from django.urls import reverse
+from django.utils.timezone import now
+from rest_framework.renderers import JSONRenderer, BrowsableAPIRenderer
+from rest_framework.test import APIClient
+
+from src.auction import models, serializers, views
+from src.auction.models import Category, Auction
+from src.auction.renderers import FastJSONRenderer
+
+
+@pytest.fixture
+def category(create_user, create_auction):
+    owner, category = create_user(), Category.objects.create(name="Art")
+    start = now()
+    rows = [
+        dict(name="Plain"),
+        dict(name="Ünïcödé   \"quoted\" </script>", image1="auction_images/a b.jpg",
+             artist_image="artist_image/ü.png", artist_name="Ärtist", current_bid=Decimal("150")),
+        dict(name="Ended", auction_end_date=start - timedelta(days=1), current_bid=Decimal("99999999.99")),
+        dict(name="Odd path", image1="auction_images/../x.jpg", artist_image="artist_image/./y.jpg",
+             current_bid=Decimal("0.5")),
+    ]
+    for i, fields in enumerate(rows * 3):
+        create_auction(**{
+            'location': "Tashkent", 'piece_title': "Untitled", 'price': 100 + i, 'auction_start_date': start,
+            'auction_end_date': start + timedelta(days=1, seconds=i, microseconds=i * 7919),
+            'category_id': category, 'owner': owner, **fields,
+        })
+    return category
+
+
+@pytest.fixture
+def frozen_now(monkeypatch):
+    current_time = now()
+    for module in (models, serializers):
+        monkeypatch.setattr(module, 'now', lambda: current_time)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('name, view, params', [
+    ('list', views.AuctionListView, {'page_size': 5}),
+    ('filter', views.FilteredAuctionListView, {'min_price': 101, 'page_size': 5}),
+    ('category', views.CategoryAuctionListView, {'page_size': 5}),
+])
+def test_fast_path_is_byte_compatible(category, frozen_now, monkeypatch, name, view, params):
+    url = reverse(name, kwargs={'category_id': category.id}) if name == 'category' else reverse(name)
+
+    def pages():
+        responses, next_url = [], url
+        while next_url:
+            response = APIClient().get(next_url, params if next_url == url else None)
+            assert response.status_code == 200
+            responses.append(response.content)
+            next_url = response.json()['next']
+        return responses
+
+    fast = pages()
+    monkeypatch.setattr(view, 'row_serializer_class', None)
+    monkeypatch.setattr(view, 'renderer_classes', (JSONRenderer, BrowsableAPIRenderer))
+    assert pages() == fast
+    assert len(fast) > 1
+
+
+def test_fast_renderer_matches_the_json_renderer():
+    data = {
+        'text': "ünïcödé    \x00\x1f\" \\ / </script>", 'int': 2 ** 63 - 1, 'big': 2 ** 70,
+        'float': 0.1, 'decimal': Decimal("1.50"), 'date': now(), 'uuid': uuid.uuid4(), 'nested': [{1: None}, True],
+        'status': Auction.StatusChoices.LIVE,
+    }
+    assert FastJSONRenderer().render(data) == JSONRenderer().render(data)
+    assert FastJSONRenderer().render(data, 'application/json; indent=4') == JSONRenderer().render(
+        data, 'application/json; indent=4')
@@ -1,10 +1,13 @@
+import base64
+
 import pytest
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient
-from src.auction.models import Contact, AuctionFavorite, Region, District, Mahalla, Category, Auction, Bid
-from src.users.models import User
+from src.auction.models import Contact, AuctionFavorite, Region, District, Mahalla, Auction, Bid
+from src.auction.pagination import AuctionCursorPagination
 from datetime import timedelta
+from decimal import Decimal
 from django.utils.timezone import now
 
 
@@ -13,40 +16,6 @@ def api_client():
     return APIClient()
 
 
-import uuid
-
-@pytest.fixture
-def create_user():
-    def _create_user(email=None, password="password123", username=None, full_name="Test User"):
-        if not email:
-            email = f"testuser-{uuid.uuid4()}@example.com"  # Generate a unique email
-        if not username:
-            username = f"testuser-{uuid.uuid4()}"  # Generate a unique username
-        return User.objects.create_user(email=email, password=password, username=username, full_name=full_name)
-    return _create_user
-
-
-
-@pytest.fixture
-def create_auction(create_user):
-    def _create_auction():
-        category = Category.objects.create(name="Art")
-        user = create_user()
-        return Auction.objects.create(
-            name="Test Auction",
-            location="Test Location",
-            lot_ref_num="LOT123",
-            lot_num_two="01",
-            piece_title="Test Piece",
-            price=100,
-            auction_start_date=now(),
-            auction_end_date=now() + timedelta(days=1),
-            category_id=category,
-            owner=user
-        )
-    return _create_auction
-
-
 ### Tests for ContactAPIView
 @pytest.mark.django_db
 def test_contact_api_view(api_client):
@@ -124,6 +93,31 @@ def test_auction_detail_view(api_client, create_auction):
     assert response.data['name'] == auction.name
 
 
+@pytest.mark.django_db
+def test_auction_bid_history_is_paginated(api_client, settings, create_user, create_auction):
+    settings.AUCTION_BID_HISTORY_PAGE_SIZE = 2
+    auction = create_auction()
+    user = create_user()
+    for amount in (110, 120, 130, 140, 150):
+        Bid.objects.create(auction=auction, user=user, bid_amount=amount)
+
+    response = api_client.get(reverse('detail', kwargs={'auction_id': auction.id}))
+    assert [bid["bid_time"][-8:] for bid in response.data['bid_history']] == ["150.00 $", "140.00 $"]
+
+    cursor, seen = response.data['bid_history_next'], []
+    while cursor:
+        page = api_client.get(reverse('bid-history', kwargs={'auction_id': auction.id}), {"cursor": cursor})
+        assert page.status_code == status.HTTP_200_OK
+        seen += [bid["bid_time"][-8:] for bid in page.data['results']]
+        cursor = page.data['next']
+    assert seen == ["130.00 $", "120.00 $", "110.00 $"]
+
+    for cursor in ("NaN|1", "Infinity|1", "-Infinity|1", "sNaN|1", "1|x", "1"):
+        encoded = base64.urlsafe_b64encode(cursor.encode()).decode()
+        page = api_client.get(reverse('bid-history', kwargs={'auction_id': auction.id}), {"cursor": encoded})
+        assert page.status_code == status.HTTP_400_BAD_REQUEST, cursor
+
+
 ### Tests for PlaceBidAPIView
 @pytest.mark.django_db
 def test_place_bid_api_view(api_client, create_user, create_auction):
@@ -138,6 +132,65 @@ def test_place_bid_api_view(api_client, create_user, create_auction):
     assert Bid.objects.count() == 1
 
 
+@pytest.mark.django_db
+def test_place_bid_rejects_lower_bid(api_client, create_user, create_auction):
+    user = create_user()
+    auction = create_auction()
+    api_client.force_authenticate(user=user)
+
+    url = reverse('bid')
+    assert api_client.post(url, {"auction": auction.id, "bid_amount": "100.50"}).status_code == status.HTTP_201_CREATED
+    response = api_client.post(url, {"auction": auction.id, "bid_amount": "100.50"})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    auction.refresh_from_db()
+    assert auction.current_bid == Decimal("100.50")
+    assert Bid.objects.count() == 1
+
+
+@pytest.mark.django_db
+def test_place_bid_on_ended_auction(api_client, create_user, create_auction):
+    user = create_user()
+    auction = create_auction()
+    Auction.objects.filter(id=auction.id).update(auction_end_date=now() - timedelta(minutes=1))
+    api_client.force_authenticate(user=user)
+
+    response = api_client.post(reverse('bid'), {"auction": auction.id, "bid_amount": "500"})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.data["error"] == "Auction does not exist or has ended."
+    assert Bid.objects.count() == 0
+
+
+@pytest.mark.django_db
+def test_place_bid_invalid_amount(api_client, create_user, create_auction):
+    user = create_user()
+    auction = create_auction()
+    api_client.force_authenticate(user=user)
+
+    response = api_client.post(reverse('bid'), {"auction": auction.id, "bid_amount": "abc"})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.data["error"] == "Invalid bid amount."
+
+
+### Tests for the paginated auction lists
+@pytest.mark.django_db
+def test_auction_list_is_cursor_paginated(api_client, monkeypatch, create_auction):
+    auctions = [create_auction() for _ in range(5)]
+    expected = sorted(auctions, key=lambda auction: (auction.auction_end_date, auction.id))
+
+    response = api_client.get(reverse('list'), {"page_size": 2})
+    assert set(response.data) == {"next", "previous", "results"}
+    seen = [item["id"] for item in response.data["results"]]
+    while response.data["next"]:
+        response = api_client.get(response.data["next"])
+        seen += [item["id"] for item in response.data["results"]]
+    assert seen == [auction.id for auction in expected]
+
+    monkeypatch.setattr(AuctionCursorPagination, 'max_page_size', 3)
+    response = api_client.get(reverse('list'), {"page_size": 1000})
+    assert len(response.data["results"]) == 3
+    assert response.data["next"]
+
+
 ### Tests for TopAuctionsAPIView
 @pytest.mark.django_db
 def test_top_auctions_api_view(api_client, create_auction):
@@ -1,5 +1,7 @@
 from django.urls import path
 
+from src.auction import media
+from src.auction.live import auction_stream
 from src.auction.views import *
 
 urlpatterns = [
@@ -12,12 +14,17 @@ urlpatterns = [
     path('category/<int:category_id>', CategoryAuctionListView.as_view(), name='category'),
     path('list', AuctionListView.as_view(), name='list'),
     path('<int:auction_id>', AuctionDetailView.as_view(), name='detail'),
+    path('<int:auction_id>/bids', AuctionBidHistoryView.as_view(), name='bid-history'),
+    path('<int:auction_id>/stream', auction_stream, name='stream'),
     path('filter', FilteredAuctionListView.as_view(), name='filter'),
     path('search', SearchAuctionByNameView.as_view(), name='search'),
     path('favorites', AuctionFavoriteListCreateAPIView.as_view(), name='favorites'),
     path('top', TopAuctionsAPIView.as_view(), name='top'),
     path('contact', ContactAPIView.as_view(), name='contact'),
     path('bid', PlaceBidAPIView.as_view(), name='bid'),
+    path('proxy-bid', ProxyBidAPIView.as_view(), name='proxy-bid'),
     path('best-artist', BestArtistAPIView.as_view(), name='best-artist'),
+    path('top-artists', TopArtistsAPIView.as_view(), name='top-artists'),
+    path('media-access', media.access, name='media-access'),
 
 ]
@@ -1,17 +1,25 @@
+from django.conf import settings
 from django.shortcuts import get_object_or_404
 from django.utils.timezone import localtime
 from django_filters.rest_framework import DjangoFilterBackend
 from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework import status
-from rest_framework.exceptions import NotFound
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.generics import ListAPIView, ListCreateAPIView, CreateAPIView
 from rest_framework.generics import RetrieveAPIView
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from src.auction import conditional, detail, leaderboard, media
+from src.auction.artists import top_artists
+from src.auction.bidding import submit_bid, register_proxy_bid, BidRejected, AUCTION_ENDED_MESSAGE
+from src.auction.counters import record_view, pending_views
 from src.auction.filters import AuctionFilter
+from src.auction.mixins import QueryShapeMixin, CachedResponseMixin, ValuesListMixin, ConditionalGetMixin
+from src.auction.pagination import AuctionCursorPagination, AuctionSearchPagination
+from src.auction.search import search_auctions
 from src.auction.serializers import *
 
 
@@ -35,7 +43,7 @@ class ContactAPIView(CreateAPIView):
         )
 
 
-class AuctionFavoriteListCreateAPIView(ListCreateAPIView):
+class AuctionFavoriteListCreateAPIView(QueryShapeMixin, ListCreateAPIView):
     """
     API endpoint that allows users to create and list their favorite auctions.
 
@@ -52,6 +60,8 @@ class AuctionFavoriteListCreateAPIView(ListCreateAPIView):
     queryset = AuctionFavorite.objects.all()
     serializer_class = AuctionFavoriteSerializer
     permission_classes = [IsAuthenticated]
+    only_fields = ('id', 'auction', 'liked')
+    query_budget = 1
 
     def get_queryset(self):
         user = self.request.user
@@ -92,7 +102,7 @@ class AuctionFavoriteListCreateAPIView(ListCreateAPIView):
         return Response(response_data)
 
 
-class RegionListAPIView(ListAPIView):
+class RegionListAPIView(QueryShapeMixin, ListAPIView):
     """
     API view for get a regions
 
@@ -101,9 +111,10 @@ class RegionListAPIView(ListAPIView):
     queryset = Region.objects.all()
     serializer_class = RegionModelSerializer
     permission_classes = (AllowAny,)
+    query_budget = 1
 
 
-class DistrictListAPIView(ListAPIView):
+class DistrictListAPIView(QueryShapeMixin, ListAPIView):
     """
     API view for get a districts
 
@@ -112,6 +123,7 @@ class DistrictListAPIView(ListAPIView):
     queryset = District.objects.all()
     serializer_class = DistrictModelSerializer
     permission_classes = (AllowAny,)
+    query_budget = 1
 
     @swagger_auto_schema(
         manual_parameters=[openapi.Parameter('region_id', openapi.IN_QUERY, type=openapi.TYPE_INTEGER)])
@@ -122,7 +134,7 @@ class DistrictListAPIView(ListAPIView):
         return super().get(request, *args, **kwargs)
 
 
-class MahallaListAPIView(ListAPIView):
+class MahallaListAPIView(QueryShapeMixin, ListAPIView):
     """
     API view for get a mahallas
 
@@ -131,6 +143,7 @@ class MahallaListAPIView(ListAPIView):
     queryset = Mahalla.objects.all()
     serializer_class = MahallaModelSerializer
     permission_classes = (AllowAny,)
+    query_budget = 1
 
     @swagger_auto_schema(
         manual_parameters=[openapi.Parameter('district_id', openapi.IN_QUERY, type=openapi.TYPE_INTEGER)])
@@ -141,27 +154,35 @@ class MahallaListAPIView(ListAPIView):
         return super().get(request, *args, **kwargs)
 
 
-class FaqAPIView(ListAPIView):
+class FaqAPIView(ConditionalGetMixin, CachedResponseMixin, QueryShapeMixin, ListAPIView):
     permission_classes = [AllowAny]
     serializer_class = FaqModelSerializer
     queryset = Faq.objects.all()
+    cache_name = 'faq'
+    query_budget = 1
+
+    def get_validators(self, request):
+        return conditional.cached_resource_validators(self.cache_name)
 
     @swagger_auto_schema(operation_description="Frequently Asked Questions")
     def get(self, request, *args, **kwargs):
         return super().get(request, *args, **kwargs)
 
 
-class AboutAPIView(ListAPIView):
+class AboutAPIView(CachedResponseMixin, QueryShapeMixin, ListAPIView):
     permission_classes = [AllowAny]
     serializer_class = AboutModelSerializer
     queryset = About.objects.all()
+    cache_name = 'about'
+    prefetch_related_fields = ('image',)
+    query_budget = 2
 
     @swagger_auto_schema(operation_description="About Us")
     def get(self, request, *args, **kwargs):
         return super().get(request, *args, **kwargs)
 
 
-class CategoryListCreateAPIView(ListAPIView):
+class CategoryListCreateAPIView(ConditionalGetMixin, CachedResponseMixin, QueryShapeMixin, ListAPIView):
     """
     API for list category
 
@@ -170,99 +191,114 @@ class CategoryListCreateAPIView(ListAPIView):
     queryset = Category.objects.all()
     serializer_class = CategoryModelSerializer
     permission_classes = (AllowAny,)
+    cache_name = 'category'
+    query_budget = 1
+
+    def get_validators(self, request):
+        return conditional.cached_resource_validators(self.cache_name)
 
 
-class CategoryAuctionListView(ListAPIView):
+class CategoryAuctionListView(ConditionalGetMixin, ValuesListMixin, QueryShapeMixin, ListAPIView):
     serializer_class = AuctionListSerializer
+    row_serializer_class = AuctionListRows
+    pagination_class = AuctionCursorPagination
+    only_fields = AUCTION_LIST_COLUMNS
+    # The validator, the category and the page
+    query_budget = 3
+
+    def get_validators(self, request):
+        return conditional.auction_list_validators()
 
     def get_queryset(self):
         category_id = self.kwargs.get('category_id')
         category = get_object_or_404(Category, id=category_id)
         return Auction.objects.filter(category_id=category)
 
-    def list(self, request, *args, **kwargs):
-        queryset = self.get_queryset()
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
-
 
-class AuctionDetailView(RetrieveAPIView):
-    queryset = Auction.objects.all()
+class AuctionDetailView(ConditionalGetMixin, RetrieveAPIView):
+    """
+    Auction detail, put together from the cached fragments of `src.auction.detail`.
+    """
     serializer_class = AuctionDetailSerializer
+    # On a cold cache: the auction, the first bid history page and the related auctions
+    # (+1 when they are not computed yet). Nothing when the fragments are cached.
+    query_budget = 4
+
+    def get_fragments(self):
+        if getattr(self, 'fragments', None) is None:
+            self.fragments = detail.fragments(self.kwargs['auction_id'])
+            if self.fragments is None:
+                raise NotFound()
+        return self.fragments
+
+    def get_validators(self, request):
+        return detail.validators(self.kwargs['auction_id'], self.get_fragments())
 
-    def get_object(self):
-        # Retrieve the auction and update its status
-        auction = get_object_or_404(Auction, id=self.kwargs['auction_id'])
-        auction.update_status()
-        return auction
+    def count_view(self, auction_id):
+        """
+        Count the view in Redis (flushed to the row by `manage.py flush_views`); returns the views
+        to show on top of the stored count.
+        """
+        return record_view(auction_id)
+
+    def conditional_response(self, request, response):
+        # Not modified is still a view
+        if response.status_code == status.HTTP_304_NOT_MODIFIED:
+            self.count_view(self.kwargs['auction_id'])
+        return response
 
     def retrieve(self, request, *args, **kwargs):
-        # Retrieve the auction instance
-        instance = self.get_object()
-
-        # Increment view count
-        instance.view += 1
-        instance.save()
-
-        # Prepare bidding history
-
-
-        # Calculate time difference (Auction end time - current time)
-        time_diff = instance.auction_end_date - now()
-        end_time = now() + timedelta(days=time_diff.days, seconds=time_diff.seconds)
-        time_remaining = end_time.strftime('%Y-%m-%dT%H:%M:%S')
-
-        # Serialize the auction instance
-        serializer = self.get_serializer(instance)
-        auction_data = serializer.data
-
-        # Add bidding history and time remaining
-        auction_data['time_remaining'] = time_remaining
-
-        # Add additional fields
-        additional_data = [{
-            "lot_ref_num": instance.lot_ref_num,
-            "lot_num_two": instance.lot_num_two,
-            "piece_title": instance.piece_title,
-            "price": instance.price,
-            "dimensions": instance.dimensions,
-            "framed_text": instance.framed_text,
-            "body_style": instance.body_style,
-            "medium": instance.medium,
-            "color_scheme": instance.color_scheme,
-            "condition": instance.condition,
-            "warranty": instance.warranty,
-            "date_prod": instance.date_prod,
-            "artist_name": instance.artist_name,
-            "artist_birth_date": instance.artist_birth_date,
-            "artist_death_date": instance.artist_death_date,
-        }]
-        auction_data['additional_details'] = additional_data
-
-        # Fetch best related auctions
-        related_auctions = Auction.objects.filter(
-            category_id=instance.category_id,
-            auction_end_date__gt=now()
-        ).exclude(id=instance.id)[:5]
-
-        # Serialize related auctions
-        related_serializer = RelatedAuctionSerializer(related_auctions, many=True)
-        auction_data['best_related_auctions'] = related_serializer.data
-
-        return Response(auction_data, status=status.HTTP_200_OK)
-
-
-class AuctionListView(ListAPIView):
+        fragments = self.get_fragments()
+        views = self.count_view(self.kwargs['auction_id'])
+        return Response(detail.response_data(fragments, views), status=status.HTTP_200_OK)
+
+
+class AuctionBidHistoryView(APIView):
+    """
+    API endpoint for older bids of an auction, highest first.
+
+    Pass the `bid_history_next` value of the auction detail (or `next` of the previous page) as `cursor`.
+    """
+    query_budget = 1
+
+    @swagger_auto_schema(
+        manual_parameters=[openapi.Parameter('cursor', openapi.IN_QUERY, type=openapi.TYPE_STRING)])
+    def get(self, request, *args, **kwargs):
+        bids, next_cursor = bid_history_page(self.kwargs['auction_id'], request.query_params.get('cursor'))
+        current_time = now()
+        return Response({
+            "results": [bid_history_item(bid, current_time) for bid in bids],
+            "next": next_cursor,
+        }, status=status.HTTP_200_OK)
+
+
+class AuctionListView(ConditionalGetMixin, ValuesListMixin, QueryShapeMixin, ListAPIView):
     queryset = Auction.objects.all()
     serializer_class = AuctionListSerializer
+    row_serializer_class = AuctionListRows
+    pagination_class = AuctionCursorPagination
+    only_fields = AUCTION_LIST_COLUMNS
+    # The validator and the page
+    query_budget = 2
 
+    def get_validators(self, request):
+        return conditional.auction_list_validators()
 
-class FilteredAuctionListView(ListAPIView):
+
+class FilteredAuctionListView(ConditionalGetMixin, ValuesListMixin, QueryShapeMixin, ListAPIView):
     queryset = Auction.objects.all()
     serializer_class = AuctionListSerializer
+    row_serializer_class = AuctionListRows
+    pagination_class = AuctionCursorPagination
+    only_fields = AUCTION_LIST_COLUMNS
+    # The validator and the page
+    query_budget = 2
     filter_backends = [DjangoFilterBackend]
     filterset_class = AuctionFilter
 
+    def get_validators(self, request):
+        return conditional.auction_list_validators()
+
     @swagger_auto_schema(
         manual_parameters=[
             openapi.Parameter('min_price', openapi.IN_QUERY, description="Minimum price", type=openapi.TYPE_NUMBER),
@@ -285,11 +321,18 @@ class FilteredAuctionListView(ListAPIView):
 
 
 class SearchAuctionByNameView(ListAPIView):
+    """
+    API endpoint for full text search over the auction name, piece title, artist, medium,
+    description and category name, best matches first.
+    """
     serializer_class = AuctionListSerializer
+    pagination_class = AuctionSearchPagination
+    # Count, ranked ids of the page, the auctions of the page
+    query_budget = 3
 
     @swagger_auto_schema(
         manual_parameters=[
-            openapi.Parameter('name', openapi.IN_QUERY, description="Auction name to search for",
+            openapi.Parameter('name', openapi.IN_QUERY, description="Words to search for",
                               type=openapi.TYPE_STRING)
         ]
     )
@@ -298,57 +341,133 @@ class SearchAuctionByNameView(ListAPIView):
         if not name_query:
             return Response({"error": "The 'name' query parameter is required."}, status=status.HTTP_400_BAD_REQUEST)
 
-        queryset = Auction.objects.filter(name__icontains=name_query)
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        page = self.paginate_queryset(search_auctions(name_query, only=AUCTION_LIST_COLUMNS))
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
 
 
-class TopAuctionsAPIView(ListAPIView):
+class TopAuctionsAPIView(QueryShapeMixin, ListAPIView):
     """
-    API endpoint to list top auctions where the view count is higher than 30.
+    API endpoint to list the most popular running auctions, best first.
+
+    Ranked by the Redis leaderboards of `src.auction.leaderboard`: `order=popular` (default) lists
+    auctions with more than 30 views (a bid counts as `AUCTION_LEADERBOARD_BID_WEIGHT` views),
+    `order=trending` weighs recent views and bids more.
     """
     serializer_class = AuctionTopSerilizer
+    only_fields = ('id', 'image1', 'image2', 'name', 'price', 'status', 'view')
+    query_budget = 1
+    min_views = 30
+    default_limit = 20
+
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter('order', openapi.IN_QUERY, description="popular (default) or trending",
+                              type=openapi.TYPE_STRING),
+            openapi.Parameter('status', openapi.IN_QUERY, description="Auction status (upcoming, live)",
+                              type=openapi.TYPE_STRING),
+            openapi.Parameter('limit', openapi.IN_QUERY, description="Number of auctions (default 20)",
+                              type=openapi.TYPE_INTEGER),
+        ]
+    )
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
 
     def get_queryset(self):
-        queryset = Auction.objects.filter(view__gt=30, auction_end_date__gt=now())
-        status = self.request.query_params.get('status')
-        if status:
-            queryset = queryset.filter(status=status)
-        return queryset
+        return Auction.objects.filter(status__in=leaderboard.OPEN_STATUSES, auction_end_date__gt=now())
+
+    def get_params(self):
+        return self.parse_params(self.request.query_params)
+
+    @classmethod
+    def parse_params(cls, query_params):
+        board = query_params.get('order', 'popular')
+        if board not in leaderboard.BOARDS:
+            raise ValidationError({'order': f"Must be one of: {', '.join(leaderboard.BOARDS)}."})
+        try:
+            limit = int(query_params.get('limit', cls.default_limit))
+        except ValueError:
+            raise ValidationError({'limit': "A valid integer is required."})
+        return board, min(max(limit, 1), settings.AUCTION_MAX_PAGE_SIZE), query_params.get('status')
+
+    def list(self, request, *args, **kwargs):
+        board, limit, status = self.get_params()
+        if status and status not in leaderboard.OPEN_STATUSES:
+            # Only running auctions are ranked
+            return Response([])
+
+        queryset = self.filter_queryset(self.get_queryset())
+        min_score = self.min_views if board == 'popular' else None
+        auctions, ended, offset = [], [], 0
+        while len(auctions) < limit:
+            # One query per window of the board; more than one only when `status` skips entries
+            ranked = [auction_id for auction_id, _ in leaderboard.top(board, offset, limit, min_score)]
+            found = queryset.in_bulk(ranked)
+            ended += [auction_id for auction_id in ranked if auction_id not in found]
+            auctions += [found[auction_id] for auction_id in ranked
+                         if auction_id in found and (not status or found[auction_id].status == status)]
+            if len(ranked) < limit:
+                break
+            offset += limit
+        leaderboard.remove(*ended)
+
+        auctions = auctions[:limit]
+        # Views not flushed to the database yet are added on top, see `src.auction.counters`
+        views = pending_views(auction.id for auction in auctions)
+        for auction in auctions:
+            auction.view += views.get(auction.id, 0)
+        serializer = self.get_serializer(auctions, many=True)
+        return Response(serializer.data)
 
 
 class BestArtistAPIView(APIView):
     """
     API to fetch the artist with the highest number of auctions.
     """
+    query_budget = 1
 
     def get(self, request, *args, **kwargs):
-        # Aggregate auctions by artist and group them
-        best_artist = (
-            Auction.objects.values(
-                'artist_name', 'artist_birth_date', 'artist_death_date', 'artist_image'
-            )
-            .annotate(auction_count=Count('id'))  # Group by artist and count auctions
-            .order_by('-auction_count')  # Order by the highest number of auctions
-            .first()  # Fetch the top artist
-        )
+        # Maintained per artist by `src.auction.artists`, read from the artist_top_idx index
+        best_artist = top_artists(1).first()
 
         if not best_artist:
             return Response({"message": "No artists found."}, status=status.HTTP_404_NOT_FOUND)
 
         # Prepare response data
         data = {
-            "artist_name": best_artist['artist_name'],
-            "artist_birth_date": best_artist['artist_birth_date'],
-            "artist_death_date": best_artist['artist_death_date'],
-            "artist_image": request.build_absolute_uri(best_artist['artist_image']) if best_artist[
-                'artist_image'] else None,
-            "auction_count": best_artist['auction_count'],
+            "artist_name": best_artist.artist_name,
+            "artist_birth_date": best_artist.artist_birth_date,
+            "artist_death_date": best_artist.artist_death_date,
+            "artist_image": media.url(best_artist.artist_image.name, 'thumb'),
+            "auction_count": best_artist.auction_count,
         }
 
         return Response(data, status=status.HTTP_200_OK)
 
 
+class TopArtistsAPIView(ListAPIView):
+    """
+    API endpoint to list the artists with the most auctions, with their sales figures.
+    """
+    serializer_class = ArtistStatsSerializer
+    pagination_class = None
+    query_budget = 1
+    default_limit = 10
+
+    @swagger_auto_schema(
+        manual_parameters=[openapi.Parameter('limit', openapi.IN_QUERY, description="Number of artists (default 10)",
+                                             type=openapi.TYPE_INTEGER)])
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+    def get_queryset(self):
+        try:
+            limit = int(self.request.query_params.get('limit', self.default_limit))
+        except ValueError:
+            raise ValidationError({'limit': "A valid integer is required."})
+        return top_artists(min(max(limit, 1), settings.AUCTION_MAX_PAGE_SIZE))
+
+
 #  Bid
 
 class PlaceBidAPIView(CreateAPIView):
@@ -356,32 +475,61 @@ class PlaceBidAPIView(CreateAPIView):
     permission_classes = [IsAuthenticated]
 
     def create(self, request, *args, **kwargs):
-        auction_id = request.data.get('auction')
-        auction = Auction.objects.filter(id=auction_id, auction_end_date__gt=now()).first()
-
-        if not auction:
-            return Response({"error": "Auction does not exist or has ended."}, status=status.HTTP_400_BAD_REQUEST)
-
-        bid_amount = request.data.get('bid_amount')
         try:
-            bid_amount = float(bid_amount)
+            auction_id = int(request.data.get('auction'))
         except (TypeError, ValueError):
+            return Response({"error": AUCTION_ENDED_MESSAGE}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            bid_amount = self.get_serializer().fields['bid_amount'].to_internal_value(request.data.get('bid_amount'))
+        except ValidationError:
             return Response({"error": "Invalid bid amount."}, status=status.HTTP_400_BAD_REQUEST)
 
-        current_bid = auction.current_bid if auction.current_bid is not None else auction.price
-        if bid_amount <= current_bid:
-            return Response({"error": "Bid amount must be higher than the current bid or starting price."},
-                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            bid = submit_bid(auction_id, request.user, bid_amount)
+        except BidRejected as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Create bid
-        data = request.data.copy()
-        data['auction'] = auction_id  # Add auction ID to the data
-        serializer = self.get_serializer(data=data)
-        serializer.is_valid(raise_exception=True)
-        serializer.save()
+        serializer = self.get_serializer(bid)
+        return Response({"message": "Bid placed successfully!", "bid": serializer.data}, status=status.HTTP_201_CREATED)
 
-        # Update the auction's current bid
-        auction.current_bid = bid_amount
-        auction.save()
 
-        return Response({"message": "Bid placed successfully!", "bid": serializer.data}, status=status.HTTP_201_CREATED)
+class ProxyBidAPIView(CreateAPIView):
+    """
+    API endpoint to register a maximum amount for an auction. The engine then bids on the user's
+    behalf, one increment above competitors, up to that maximum.
+
+    Example request:
+    POST /api/v1/auction/proxy-bid
+    {
+        "auction": 1,
+        "max_amount": "500.00"
+    }
+    """
+    serializer_class = ProxyBidSerializer
+    permission_classes = [IsAuthenticated]
+
+    def create(self, request, *args, **kwargs):
+        try:
+            auction_id = int(request.data.get('auction'))
+        except (TypeError, ValueError):
+            return Response({"error": AUCTION_ENDED_MESSAGE}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            max_amount = self.get_serializer().fields['max_amount'].to_internal_value(request.data.get('max_amount'))
+        except ValidationError:
+            return Response({"error": "Invalid maximum amount."}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            proxy_bid = register_proxy_bid(auction_id, request.user, max_amount)
+        except BidRejected as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        leader = Bid.objects.filter(auction_id=auction_id).order_by('-id').values('user_id', 'bid_amount').first()
+        serializer = self.get_serializer(proxy_bid)
+        return Response({
+            "message": "Proxy bid registered successfully!",
+            "proxy_bid": serializer.data,
+            "current_bid": serializer.fields['max_amount'].to_representation(leader['bid_amount']) if leader else None,
+            "leading": bool(leader) and leader['user_id'] == request.user.id,
+        }, status=status.HTTP_201_CREATED)
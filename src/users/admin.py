@@ -2,7 +2,7 @@ from django.contrib import admin
 
 
 from src.auction.models import Address
-from src.users.models import User
+from src.users.models import User, OutboundEmail
 
 
 class UserAdmin(admin.ModelAdmin):
@@ -13,4 +13,14 @@ class UserAdmin(admin.ModelAdmin):
 
 admin.site.register(User, UserAdmin)
 
+
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = ('id', 'subject', 'to', 'status', 'attempts', 'next_attempt_at', 'sent_at')
+    list_filter = ('status',)
+    search_fields = ('to', 'subject')
+    ordering = ('-id',)
+
+
+admin.site.register(OutboundEmail, OutboundEmailAdmin)
+
 admin.site.register(Address)
@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from src.users.outbox import Sender
+
+
+class Command(BaseCommand):
+    help = "Send the emails waiting in the outbox, retrying the failed ones with backoff."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=1.0, help="Seconds between polls of the outbox.")
+        parser.add_argument('--once', action='store_true', help="Send one batch and exit.")
+
+    def handle(self, *args, **options):
+        sender = Sender()
+        try:
+            while True:
+                sent, failed = sender.send_due()
+                if sent or failed:
+                    self.stdout.write(f"Sent {sent} emails, {failed} failed")
+                if options['once']:
+                    break
+                if not (sent or failed):
+                    # Keep draining full batches, sleep once the outbox is empty
+                    time.sleep(options['interval'])
+        finally:
+            sender.close()
@@ -2,6 +2,9 @@ from django.contrib.auth.base_user import BaseUserManager, AbstractBaseUser
 from django.contrib.auth.models import PermissionsMixin
 from django.core.cache import cache
 from django.db import models
+from django.utils.timezone import now
+
+from src.auction.images import image_storage
 
 
 class CustomUserManager(BaseUserManager):
@@ -36,7 +39,7 @@ class User(AbstractBaseUser, PermissionsMixin):
     bio = models.TextField(blank=True, null=True)
     address = models.ForeignKey('auction.Address', on_delete=models.CASCADE, related_name='users', blank=True,
                                 null=True)
-    image = models.ImageField(upload_to='users/', blank=True, null=True)
+    image = models.ImageField(upload_to='users/', storage=image_storage, blank=True, null=True)
 
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)
@@ -50,6 +53,38 @@ class User(AbstractBaseUser, PermissionsMixin):
         return self.full_name
 
 
+class OutboundEmail(models.Model):
+    """
+    Email waiting in the outbox, sent by `manage.py send_emails` (see src.users.outbox).
+    """
+    class StatusChoices(models.TextChoices):
+        PENDING = 'pending', 'Pending'
+        SENT = 'sent', 'Sent'
+        FAILED = 'failed', 'Failed'
+
+    subject = models.CharField(max_length=255)
+    from_email = models.CharField(max_length=255)
+    to = models.EmailField(max_length=255)
+    body = models.TextField()
+    html = models.TextField(blank=True)
+    status = models.CharField(max_length=10, choices=StatusChoices.choices, default=StatusChoices.PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        db_table = 'outbound_email'
+        indexes = [
+            # The worker polls the due pending emails
+            models.Index(fields=['next_attempt_at'], condition=models.Q(status='pending'), name='email_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} to {self.to}"
+
+
 def getKey(key):
     return cache.get(key)
 
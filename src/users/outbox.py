@@ -0,0 +1,142 @@
+"""
+Outbox of the emails sent to users (account activation, password reset).
+
+Requests never talk to the mail server: ``enqueue()`` renders the message and stores it as an
+``OutboundEmail`` (in the request's transaction), ``manage.py send_emails`` sends the due ones with a
+``Sender``. The sender keeps one connection to the mail server open across batches, and retries the
+emails that failed with exponential backoff: ``AUCTION_EMAIL_RETRY_DELAY`` seconds doubled per
+attempt, up to ``AUCTION_EMAIL_RETRY_MAX_DELAY``, until ``AUCTION_EMAIL_MAX_ATTEMPTS``.
+
+A batch is claimed in a short transaction that moves its ``next_attempt_at`` ``AUCTION_EMAIL_LEASE``
+seconds ahead, then sent outside of it, and each result is recorded as soon as it is known: no row
+lock or transaction is held while the mail server answers. Delivery is at least once: an email sent
+by a worker that dies before recording it is sent again once its lease runs out.
+
+Templates are loaded and compiled once per process.
+"""
+import functools
+import smtplib
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.template import loader
+from django.utils.html import strip_tags
+from django.utils.timezone import now
+
+from src.users.models import OutboundEmail
+
+FROM_EMAIL = "Fotheby Auction <{}>"
+
+# Errors the mail server answered with, the connection is still usable
+SERVER_REFUSALS = (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused)
+
+
+@functools.lru_cache(maxsize=None)
+def get_template(name):
+    return loader.get_template(name)
+
+
+def render(template_name, context):
+    """
+    ``(html, text)`` versions of an email template.
+    """
+    html = get_template(template_name).render(context)
+    return html, strip_tags(html)
+
+
+def enqueue(subject, template_name, context, to):
+    html, body = render(template_name, context)
+    return OutboundEmail.objects.create(subject=subject, from_email=FROM_EMAIL.format(settings.EMAIL_HOST_USER),
+                                        to=to, body=body, html=html)
+
+
+def retry_delay(attempts):
+    return timedelta(seconds=min(settings.AUCTION_EMAIL_RETRY_DELAY * 2 ** (attempts - 1),
+                                 settings.AUCTION_EMAIL_RETRY_MAX_DELAY))
+
+
+def make_message(email):
+    message = EmailMultiAlternatives(subject=email.subject, body=email.body, from_email=email.from_email,
+                                     to=[email.to])
+    if email.html:
+        message.attach_alternative(email.html, "text/html")
+    return message
+
+
+class Sender:
+    """
+    Sends the due outbox emails over one mail server connection, kept open between batches.
+    """
+    def __init__(self, connection=None):
+        self.connection = connection or get_connection()
+        self.is_open = False
+
+    def open(self):
+        if not self.is_open:
+            self.connection.open()
+            self.is_open = True
+
+    def close(self):
+        if self.is_open:
+            self.is_open = False
+            try:
+                self.connection.close()
+            except Exception:
+                pass
+
+    def send(self, message):
+        reused = self.is_open
+        self.open()
+        try:
+            self.connection.send_messages([message])
+        except SERVER_REFUSALS:
+            raise
+        except Exception:
+            self.close()
+            if not reused:
+                raise
+            # The server may have dropped the idle connection, once more on a new one
+            self.open()
+            self.connection.send_messages([message])
+
+    def claim(self, batch_size=None):
+        """
+        Lease up to ``batch_size`` due emails to this sender.
+        """
+        with transaction.atomic():
+            # Workers running side by side skip each other's batches
+            emails = list(OutboundEmail.objects.select_for_update(skip_locked=True)
+                          .filter(status=OutboundEmail.StatusChoices.PENDING, next_attempt_at__lte=now())
+                          .order_by('next_attempt_at')[:batch_size or settings.AUCTION_EMAIL_BATCH_SIZE])
+            lease_until = now() + timedelta(seconds=settings.AUCTION_EMAIL_LEASE)
+            for email in emails:
+                email.attempts += 1
+                email.next_attempt_at = lease_until
+            OutboundEmail.objects.bulk_update(emails, ['attempts', 'next_attempt_at'])
+        return emails
+
+    def send_due(self, batch_size=None):
+        """
+        Send up to ``batch_size`` due emails, returns how many were sent and how many failed.
+        """
+        sent = failed = 0
+        for email in self.claim(batch_size):
+            try:
+                self.send(make_message(email))
+            except Exception as error:
+                if not isinstance(error, SERVER_REFUSALS):
+                    self.close()
+                email.last_error = f"{type(error).__name__}: {error}"[:1000]
+                if email.attempts >= settings.AUCTION_EMAIL_MAX_ATTEMPTS:
+                    email.status = OutboundEmail.StatusChoices.FAILED
+                else:
+                    email.next_attempt_at = now() + retry_delay(email.attempts)
+                failed += 1
+            else:
+                email.status = OutboundEmail.StatusChoices.SENT
+                email.sent_at = now()
+                sent += 1
+            email.save(update_fields=['status', 'next_attempt_at', 'last_error', 'sent_at'])
+        return sent, failed
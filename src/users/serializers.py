@@ -1,13 +1,10 @@
 import random
 
-from django.conf import settings
 from django.contrib.auth.hashers import make_password
-from django.core.mail import EmailMultiAlternatives
-from django.template.loader import render_to_string
-from django.utils.html import strip_tags
 from rest_framework import serializers
 
 from src.auction.serializers import *
+from src.users import outbox
 from src.users.models import User, getKey, setKey
 
 
@@ -35,20 +32,9 @@ class UserRegisterSerializer(serializers.ModelSerializer):
             },
             timeout=1000
         )
-        subject = "Activate Your Account"
-        html_content = render_to_string('activation.html', {'user': user, 'activate_code': activate_code})
-        text_content = strip_tags(html_content)
         print(getKey(key=attrs['email']))
-
-        from_email = f" Fotheby Auction <{settings.EMAIL_HOST_USER}>"
-        email = EmailMultiAlternatives(
-            subject=subject,
-            body=text_content,
-            from_email=from_email,
-            to=[attrs['email']]
-        )
-        email.attach_alternative(html_content, "text/html")
-        email.send()
+        outbox.enqueue("Activate Your Account", 'activation.html', {'user': user, 'activate_code': activate_code},
+                       attrs['email'])
 
         return super().validate(attrs)
 
@@ -90,6 +76,7 @@ class ResetPasswordConfirmSerializer(serializers.Serializer):
 
 
 class UserSerializer(serializers.ModelSerializer):
+    image = MediaImageField(required=False, allow_null=True)
     # services = serializers.SerializerMethodField()
 
     class Meta:
@@ -123,6 +110,7 @@ class UserModelSerializer(serializers.ModelSerializer):
 
 class UserServiceModelSerializer(ModelSerializer):
     address = AddressSerializer(read_only=True)
+    image = MediaImageField(required=False, allow_null=True)
 
     class Meta:
         model = User
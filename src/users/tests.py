@@ -1 +1,174 @@
-from django.test import TestCase
+import io
+import smtplib
+from datetime import timedelta
+
+import pytest
+from django.core import mail
+from django.core.management import call_command
+from django.db import connections
+from django.utils.timezone import now
+from rest_framework.test import APIClient
+
+from src.users import outbox
+from src.users.models import User, OutboundEmail
+
+
+@pytest.fixture(autouse=True)
+def email_backend(settings):
+    settings.EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
+    settings.EMAIL_HOST_USER = 'noreply@example.com'
+
+
+@pytest.mark.django_db
+def test_register_queues_the_activation_email():
+    response = APIClient().post('/api/v1/users/register', {
+        'full_name': "Ann Bidder", 'email': 'ann@example.com', 'username': 'ann', 'password': 'secret123'})
+    assert response.status_code == 201
+    # Nothing is sent within the request
+    assert mail.outbox == []
+    email = OutboundEmail.objects.get()
+    assert (email.to, email.status) == ('ann@example.com', OutboundEmail.StatusChoices.PENDING)
+
+    assert outbox.Sender().send_due() == (1, 0)
+    message, = mail.outbox
+    assert message.subject == "Activate Your Account"
+    assert message.from_email == "Fotheby Auction <noreply@example.com>"
+    assert "Dear Ann Bidder" in message.body and "<html" not in message.body
+    assert message.alternatives[0][1] == "text/html"
+    email.refresh_from_db()
+    assert email.status == OutboundEmail.StatusChoices.SENT and email.sent_at is not None
+    assert outbox.Sender().send_due() == (0, 0)
+
+
+@pytest.mark.django_db
+def test_reset_password_email_has_the_code():
+    user = User.objects.create_user(username='bob', full_name="Bob", email='bob@example.com', password='x')
+    response = APIClient().post('/api/v1/users/reset-password', {'email': 'bob@example.com'})
+    assert response.status_code == 200
+    assert mail.outbox == []
+
+    call_command('send_emails', '--once', stdout=io.StringIO())
+    message, = mail.outbox
+    code = next(word for word in message.body.split() if word.isdigit() and len(word) == 6)
+    user.refresh_from_db()
+    assert user.check_password(code)
+
+
+class FlakyConnection:
+    """
+    locmem-like connection that fails the first ``failures`` sends and counts the connections opened.
+    """
+    def __init__(self, failures=0, error=smtplib.SMTPServerDisconnected):
+        self.failures, self.error = failures, error
+        self.opened = self.sent = 0
+
+    def open(self):
+        self.opened += 1
+
+    def close(self):
+        pass
+
+    def send_messages(self, messages):
+        if self.failures:
+            self.failures -= 1
+            raise self.error("down")
+        self.sent += len(messages)
+        return len(messages)
+
+
+def queue(count):
+    for i in range(count):
+        outbox.enqueue("Hello", 'activation.html', {'activate_code': i}, f'user{i}@example.com')
+
+
+@pytest.mark.django_db
+def test_one_connection_across_batches():
+    queue(5)
+    connection = FlakyConnection()
+    sender = outbox.Sender(connection)
+    assert sender.send_due(batch_size=2) == (2, 0)
+    assert sender.send_due(batch_size=2) == (2, 0)
+    assert sender.send_due(batch_size=2) == (1, 0)
+    assert (connection.opened, connection.sent) == (1, 5)
+
+
+@pytest.mark.django_db
+def test_dropped_connection_is_reopened_once():
+    queue(2)
+    connection = FlakyConnection()
+    sender = outbox.Sender(connection)
+    sender.send_due(batch_size=1)
+    connection.failures = 1
+    assert sender.send_due() == (1, 0)
+    assert connection.opened == 2
+
+
+@pytest.mark.django_db
+def test_failures_are_retried_with_backoff(settings):
+    settings.AUCTION_EMAIL_MAX_ATTEMPTS = 3
+    queue(1)
+    sender = outbox.Sender(FlakyConnection(failures=10))
+    delays = []
+    for _ in range(3):
+        started = now()
+        assert sender.send_due() == (0, 1)
+        email = OutboundEmail.objects.get()
+        delays.append(round((email.next_attempt_at - started).total_seconds()))
+        # Not due before its next attempt
+        assert sender.send_due() == (0, 0)
+        OutboundEmail.objects.update(next_attempt_at=now() - timedelta(seconds=1))
+
+    assert delays[:2] == [30, 60]
+    assert (email.status, email.attempts) == (OutboundEmail.StatusChoices.FAILED, 3)
+    assert email.last_error == "SMTPServerDisconnected: down"
+    assert sender.send_due() == (0, 0)
+
+
+@pytest.mark.django_db
+def test_refused_recipients_keep_the_connection():
+    queue(2)
+    connection = FlakyConnection(failures=1, error=lambda message: smtplib.SMTPDataError(550, message))
+    assert outbox.Sender(connection).send_due() == (1, 1)
+    assert connection.opened == 1
+
+
+class Crash(BaseException):
+    pass
+
+
+@pytest.mark.django_db(transaction=True)
+def test_emails_are_sent_outside_the_claiming_transaction(settings):
+    queue(3)
+    seen = []
+
+    class Connection(FlakyConnection):
+        def send_messages(self, messages):
+            # Rows are neither locked nor in an open transaction while the server answers
+            seen.append(connections['default'].in_atomic_block)
+            if len(seen) == 2:
+                raise Crash()
+            return super().send_messages(messages)
+
+    with pytest.raises(Crash):
+        outbox.Sender(Connection()).send_due()
+    assert seen == [False, False]
+    # The worker died: what was sent is recorded, the rest is leased
+    first, second, third = OutboundEmail.objects.order_by('id')
+    assert first.status == OutboundEmail.StatusChoices.SENT
+    assert second.status == third.status == OutboundEmail.StatusChoices.PENDING
+    assert second.next_attempt_at > now() + timedelta(seconds=settings.AUCTION_EMAIL_LEASE - 60)
+    assert outbox.Sender(FlakyConnection()).send_due() == (0, 0)
+
+    # Until the lease runs out
+    OutboundEmail.objects.update(next_attempt_at=now() - timedelta(seconds=1))
+    connection = FlakyConnection()
+    assert outbox.Sender(connection).send_due() == (2, 0)
+    assert connection.sent == 2
+    assert OutboundEmail.objects.get(id=second.id).attempts == 2
+
+
+def test_templates_are_compiled_once():
+    outbox.get_template.cache_clear()
+    outbox.render('activation.html', {'activate_code': 1})
+    outbox.render('activation.html', {'activate_code': 2})
+    assert outbox.get_template.cache_info().misses == 1
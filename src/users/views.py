@@ -1,15 +1,12 @@
 import random
 
-from django.core.mail import EmailMultiAlternatives
-from django.template.loader import render_to_string
-from django.utils.html import strip_tags
 from rest_framework import status
 from rest_framework.generics import GenericAPIView, CreateAPIView, RetrieveUpdateDestroyAPIView
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework_simplejwt.tokens import RefreshToken
 
-from root import settings
+from src.users import outbox
 from src.users.models import User, getKey
 from src.users.serializers import (UserRegisterSerializer, CheckActivationCodeSerializer, ResetPasswordSerializer,
                                    ResetPasswordConfirmSerializer, UserSerializer, UserModelSerializer)
@@ -77,20 +74,9 @@ class ResetPasswordView(CreateAPIView):
             user.set_password(activation_code)
             user.save()
 
-            # Send email with activation code
-            subject = "Password Reset Confirmation"
-            html_content = render_to_string('forget_password.html', {'activation_code': activation_code})
-            text_content = strip_tags(html_content)
-
-            from_email = f"Fotheby Auction <{settings.EMAIL_HOST_USER}>"
-            email = EmailMultiAlternatives(
-                subject=subject,
-                body=text_content,
-                from_email=from_email,
-                to=[email]
-            )
-            email.attach_alternative(html_content, "text/html")
-            email.send()
+            # Queue the email with the activation code
+            outbox.enqueue("Password Reset Confirmation", 'forget_password.html',
+                           {'user': user, 'reset_code': activation_code}, email)
 
             return Response({"detail": "Password reset code sent to your email."}, status=status.HTTP_200_OK)
         else: